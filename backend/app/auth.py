@@ -1,11 +1,15 @@
+import hmac
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 from jose import jwt, JWTError
 from passlib.context import CryptContext
-from fastapi import HTTPException, status, Depends
+from fastapi import HTTPException, status, Depends, Request
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from .deps import get_db
+from .deps import get_async_db
 from . import models
 from .config import settings
 
@@ -30,32 +34,112 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode.update({"exp": expire})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(strict_oauth2),  # 👈 usamos el esquema estricto aquí
+def _bearer(request: Request) -> str | None:
+    parts = (request.headers.get("Authorization") or "").strip().split(None, 1)
+    if len(parts) == 2 and parts[0].lower() == "bearer":
+        return parts[1].strip()
+    return None
+
+def token_claims(request: Request) -> dict | None:
+    """
+    Claims del Bearer del request, decodificados una sola vez: el resultado queda en
+    request.state y lo reusan RequestLogMiddleware y get_current_user.
+    None = sin token o token inválido.
+    """
+    if hasattr(request.state, "token_claims"):
+        return request.state.token_claims
+
+    claims = None
+    token = _bearer(request)
+    if token:
+        try:
+            claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            claims = None
+    request.state.token_claims = claims
+    return claims
+
+
+class UserCache:
+    """
+    Usuarios activos por id, con TTL: evita ir a la tabla users en cada request
+    autenticado. Un usuario desactivado deja de valer a lo sumo tras TTL segundos.
+    Guarda instancias desacopladas de la sesión (solo se leen id/role/...).
+    """
+
+    def __init__(self, ttl: float, max_size: int = 1024):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._items: dict[str, tuple[float, models.User]] = {}
+
+    def get(self, user_id: str) -> models.User | None:
+        with self._lock:
+            hit = self._items.get(user_id)
+            if hit and hit[0] > time.monotonic():
+                return hit[1]
+            self._items.pop(user_id, None)
+            return None
+
+    def put(self, user: models.User) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if len(self._items) >= self.max_size:
+                self._items = {k: v for k, v in self._items.items() if v[0] > now}
+                if len(self._items) >= self.max_size:
+                    self._items.clear()
+            self._items[str(user.id)] = (now + self.ttl, user)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._items.pop(str(user_id), None)
+
+
+user_cache = UserCache(ttl=settings.USER_CACHE_TTL_SECONDS)
+
+
+async def get_current_user(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    token: str = Depends(strict_oauth2),  # 👈 usamos el esquema estricto aquí (401 si falta)
 ) -> models.User:
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        user_id: str | None = payload.get("sub")
-        if not user_id:
-            raise credentials_exception
-    except JWTError:
+    payload = token_claims(request)
+    user_id: str | None = payload.get("sub") if payload else None
+    if not user_id:
         raise credentials_exception
 
-    # ✅ API moderna de SQLAlchemy
-    user = db.get(models.User, user_id)
-    if not user or not user.is_active:
-        raise credentials_exception
+    user = user_cache.get(user_id)
+    if user is None:
+        try:
+            user = await db.get(models.User, uuid.UUID(user_id))
+        except ValueError:  # sub que no es un uuid (token de otro sistema)
+            raise credentials_exception
+        if not user or not user.is_active:
+            raise credentials_exception
+        db.expunge(user)  # se comparte entre requests: fuera de esta sesión
+        user_cache.put(user)
     return user
 
 def require_role(*roles: models.UserRole):
-    def _dep(user: models.User = Depends(get_current_user)):
+    async def _dep(user: models.User = Depends(get_current_user)):
         if user.role not in roles:
             raise HTTPException(status_code=403, detail="Insufficient permissions")
         return user
     return _dep
+
+async def require_ops_access(request: Request, db: AsyncSession = Depends(get_async_db)) -> None:
+    """
+    /metrics y /healthz/* (salvo /healthz): el Bearer fijo METRICS_TOKEN, para un scraper
+    que no puede renovar un JWT, o el token de un owner.
+    """
+    token = _bearer(request)
+    if settings.METRICS_TOKEN and token and hmac.compare_digest(token, settings.METRICS_TOKEN):
+        return
+    user = await get_current_user(request, db, await strict_oauth2(request))
+    if user.role != models.UserRole.owner:
+        raise HTTPException(status_code=403, detail="Insufficient permissions")
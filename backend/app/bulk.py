@@ -0,0 +1,126 @@
+# app/bulk.py
+"""
+Piezas comunes de las importaciones masivas (/payments/bulk, ...).
+
+El body se lee como stream (CSV con encabezado o NDJSON, una fila por línea) y se
+procesa por lotes: nunca se arma la lista completa en memoria. Las filas válidas
+van con COPY a una tabla temporal (staging) y de ahí a la tabla real con un único
+INSERT ... SELECT; el resultado se devuelve como NDJSON (un error por línea + resumen).
+"""
+import csv
+import json
+import tempfile
+from typing import IO, Any, AsyncIterator, Iterable, Iterator, Optional
+
+from fastapi import HTTPException, Request, status
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NDJSON = "application/x-ndjson"
+BATCH_SIZE = 5000
+SPOOL_MAX_MEMORY = 1 << 20  # resultados más grandes que esto van a un archivo temporal
+
+Record = tuple[int, Optional[dict], Optional[str]]  # (nro de línea, fila, error)
+
+
+def record_format(request: Request) -> str:
+    """csv | ndjson según el Content-Type; 415 si no es ninguno de los dos."""
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    if ctype in ("text/csv", "application/csv"):
+        return "csv"
+    if ctype in (NDJSON, "application/jsonl", "application/json-seq", "application/ndjson"):
+        return "ndjson"
+    raise HTTPException(
+        status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+        "Send text/csv (with header row) or application/x-ndjson",
+    )
+
+
+async def _lines(request: Request) -> AsyncIterator[bytes]:
+    buf = b""
+    async for chunk in request.stream():
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines:
+            yield line
+    if buf:
+        yield buf
+
+
+async def read_records(request: Request, fmt: str) -> AsyncIterator[Record]:
+    """
+    Filas del body como dicts. En CSV los campos vacíos se omiten (= valor por defecto
+    del schema) y no se admiten saltos de línea dentro de un campo.
+    """
+    header: Optional[list[str]] = None
+    n = 0
+    async for raw in _lines(request):
+        n += 1
+        try:
+            line = raw.decode("utf-8-sig" if n == 1 else "utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            yield n, None, "invalid UTF-8"
+            continue
+        if not line.strip():
+            continue
+
+        if fmt == "ndjson":
+            try:
+                rec = json.loads(line)
+            except ValueError as e:
+                yield n, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(rec, dict):
+                yield n, None, "expected a JSON object"
+                continue
+            yield n, rec, None
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [h.strip() for h in values]
+            continue
+        if len(values) != len(header):
+            yield n, None, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield n, {k: v for k, v in zip(header, values) if v != ""}, None
+
+
+def validation_message(e: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()
+    )
+
+
+async def copy_records(db: AsyncSession, table: str, columns: list[str], records: Iterable[tuple]) -> None:
+    """COPY binario de asyncpg sobre la conexión (y transacción) de la sesión."""
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(table, records=records, columns=columns)
+
+
+def ndjson(items: Iterable[dict[str, Any]]) -> Iterable[bytes]:
+    for item in items:
+        yield (json.dumps(item, default=str) + "\n").encode()
+
+
+def spool() -> IO[bytes]:
+    """
+    Buffer de resultados NDJSON para importaciones grandes: en memoria hasta 1 MB, después
+    en disco. Primero se procesa todo el body y después se responde: mientras sale un
+    StreamingResponse, Starlette consume `receive` esperando la desconexión del cliente.
+    """
+    return tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY, mode="w+b")
+
+
+def write(out: IO[bytes], item: dict[str, Any]) -> None:
+    out.write((json.dumps(item, default=str) + "\n").encode())
+
+
+def drain(out: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    out.seek(0)
+    try:
+        while chunk := out.read(chunk_size):
+            yield chunk
+    finally:
+        out.close()
@@ -0,0 +1,99 @@
+# app/client_activity.py
+"""
+Columnas desnormalizadas de actividad en clients: último período pagado
+(last_paid_year / last_paid_month) y último check-in (last_checkin_at).
+
+Igual que los rollups, se mantienen en la misma transacción que el alta/baja del pago o
+check-in (sentencias para ejecutar con rollups.apply). Las altas solo pueden mover el
+valor hacia adelante (UPDATE condicional, sin leer antes); una baja lo recalcula desde
+la tabla para ese cliente. reconcile_statements() corrige todo desde cero
+(scripts/reconcile_client_activity.py): correrlo después de cargas por fuera de la API.
+"""
+from datetime import datetime
+
+from sqlalchemy import select, update, func, or_, tuple_, literal
+
+from . import models
+
+C, P, A = models.Client, models.Payment, models.Attendance
+
+
+def _update():
+    # Sin sincronizar objetos Client ya cargados en la sesión: el valor lo calcula la base y
+    # expirarlos obligaría a releerlos (en async, un acceso perezoso falla)
+    return update(C).execution_options(synchronize_session=False)
+
+
+def _last_paid(client_id):
+    # (año, mes) del último período pagado del cliente, como subconsulta escalar por columna
+    q = (select(P.period_year, P.period_month)
+         .where(P.client_id == client_id)
+         .order_by(P.period_year.desc(), P.period_month.desc())
+         .limit(1))
+    return q.with_only_columns(P.period_year).scalar_subquery(), q.with_only_columns(P.period_month).scalar_subquery()
+
+
+def _last_checkin(client_id):
+    return select(func.max(A.checkin_at)).where(A.client_id == client_id).scalar_subquery()
+
+
+# ---------- mantenimiento incremental ----------
+def payment_added(client_id: str, year: int, month: int) -> list:
+    return [
+        _update()
+        .where(C.id == client_id, or_(
+            C.last_paid_year.is_(None),
+            tuple_(C.last_paid_year, C.last_paid_month) < tuple_(literal(year), literal(month)),
+        ))
+        .values(last_paid_year=year, last_paid_month=month)
+    ]
+
+
+def payment_removed(client_id: str) -> list:
+    """Ejecutar DESPUÉS del DELETE (con flush): recalcula desde los pagos que quedan."""
+    year, month = _last_paid(C.id)
+    return [_update().where(C.id == client_id).values(last_paid_year=year, last_paid_month=month)]
+
+
+def payments_changed(client_ids) -> list:
+    """Recalcula para los clientes de `client_ids` (lista o SELECT de ids), p.ej. tras un import."""
+    year, month = _last_paid(C.id)
+    return [_update().where(C.id.in_(client_ids)).values(last_paid_year=year, last_paid_month=month)]
+
+
+def checkin_added(client_id: str, checkin_at: datetime) -> list:
+    # greatest ignora NULL: el primer check-in también queda
+    return [_update().where(C.id == client_id).values(last_checkin_at=func.greatest(C.last_checkin_at, checkin_at))]
+
+
+def checkins_added(attendance_ids) -> list:
+    """Como checkin_added para un lote de asistencias ya insertadas (una sentencia)."""
+    latest = (select(A.client_id, func.max(A.checkin_at).label("at"))
+              .where(A.id.in_(attendance_ids)).group_by(A.client_id).subquery())
+    return [
+        _update().where(C.id == latest.c.client_id)
+        .values(last_checkin_at=func.greatest(C.last_checkin_at, latest.c.at))
+    ]
+
+
+# ---------- reconciliación ----------
+def _drift():
+    year, month = _last_paid(C.id)
+    return or_(
+        C.last_paid_year.is_distinct_from(year),
+        C.last_paid_month.is_distinct_from(month),
+        C.last_checkin_at.is_distinct_from(_last_checkin(C.id)),
+    )
+
+
+def drift_count():
+    return select(func.count()).select_from(C).where(_drift())
+
+
+def reconcile_statements() -> list:
+    """Recalcula las tres columnas para los clientes cuyo valor guardado no coincide."""
+    year, month = _last_paid(C.id)
+    return [
+        _update().where(_drift())
+        .values(last_paid_year=year, last_paid_month=month, last_checkin_at=_last_checkin(C.id))
+    ]
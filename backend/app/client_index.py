@@ -0,0 +1,222 @@
+# app/client_index.py
+"""
+Índice en memoria (por proceso) de clientes activos para el check-in de recepción.
+
+Claves normalizadas: teléfono (solo dígitos), email (minúsculas) y prefijos de cada
+palabra del nombre (sin tildes). Se carga completo la primera vez y luego se mantiene
+con upsert()/remove() desde los endpoints de clientes. Como cada worker tiene el suyo,
+se recarga completo cada REFRESH_SECONDS para levantar cambios hechos en otros procesos.
+
+La recarga es una sola a la vez (la comparten los requests que la piden), se arma en un
+thread del executor y se intercambia de una vez; mientras tanto se sigue usando el índice
+anterior. Solo la primera carga hace esperar al request.
+"""
+import asyncio
+import logging
+import re
+import threading
+import time
+import unicodedata
+import uuid
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import select
+
+from . import models
+from .database import AsyncSessionLocal
+
+logger = logging.getLogger("app.client_index")
+
+REFRESH_SECONDS = 300
+MAX_CANDIDATES = 10
+
+
+@dataclass(frozen=True)
+class Entry:
+    id: uuid.UUID
+    full_name: str
+    email: Optional[str]
+    phone: Optional[str]
+
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+def norm_text(s: str) -> str:
+    if s.isascii():  # sin tildes: nada que descomponer (el caso común, y la carga completa lo nota)
+        return s.lower().strip()
+    s = unicodedata.normalize("NFKD", s)
+    return "".join(ch for ch in s if not unicodedata.combining(ch)).lower().strip()
+
+
+def norm_phone(s: str) -> str:
+    if s.isascii():
+        return _NON_DIGITS.sub("", s)
+    return "".join(ch for ch in s if ch.isdigit())
+
+
+def _is_phone_query(q: str) -> bool:
+    digits = norm_phone(q)
+    return len(digits) >= 6 and all(ch.isdigit() or ch in " +-()." for ch in q)
+
+
+def _name_tokens(full_name: str) -> set[str]:
+    return set(norm_text(full_name).split())
+
+
+class ClientLookupIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loaded_at: Optional[float] = None
+        self._entries: dict[uuid.UUID, Entry] = {}
+        self._by_phone: dict[str, set[uuid.UUID]] = {}
+        self._by_email: dict[str, set[uuid.UUID]] = {}
+        self._by_token: dict[str, set[uuid.UUID]] = {}  # palabra normalizada del nombre -> ids
+        self._tokens: list[str] = []  # las claves de _by_token, ordenadas (búsqueda por prefijo)
+        self._reloading: Optional[asyncio.Future] = None
+        # upsert()/remove() que llegan durante una recarga: se reaplican sobre el índice nuevo
+        self._changes: list[tuple[uuid.UUID, Optional[Entry]]] = []
+
+    # ---------- mantenimiento ----------
+    def _index(self, e: Entry) -> None:
+        self._entries[e.id] = e
+        phone = norm_phone(e.phone or "")
+        if phone:
+            self._by_phone.setdefault(phone, set()).add(e.id)
+        if e.email:
+            self._by_email.setdefault(e.email.lower().strip(), set()).add(e.id)
+
+    def _add(self, e: Entry) -> None:
+        self._index(e)
+        for tok in _name_tokens(e.full_name):
+            ids = self._by_token.get(tok)
+            if ids is None:
+                ids = self._by_token[tok] = set()
+                insort(self._tokens, tok)
+            ids.add(e.id)
+
+    @classmethod
+    def _build(cls, entries: list[Entry]) -> "ClientLookupIndex":
+        # Carga completa en O(n): las palabras distintas (pocas, los nombres se repiten) se
+        # ordenan una sola vez al final. Corre en un thread del executor, fuera del event loop
+        fresh = cls()
+        by_token = fresh._by_token
+        for e in entries:
+            fresh._index(e)
+            for tok in _name_tokens(e.full_name):
+                ids = by_token.get(tok)
+                if ids is None:
+                    ids = by_token[tok] = set()
+                ids.add(e.id)
+        fresh._tokens = sorted(by_token)
+        return fresh
+
+    def _discard(self, client_id: uuid.UUID) -> None:
+        e = self._entries.pop(client_id, None)
+        if not e:
+            return
+        for key, bucket in ((norm_phone(e.phone or ""), self._by_phone), ((e.email or "").lower().strip(), self._by_email)):
+            ids = bucket.get(key)
+            if ids:
+                ids.discard(client_id)
+                if not ids:
+                    del bucket[key]
+        for tok in _name_tokens(e.full_name):
+            ids = self._by_token.get(tok)
+            if ids:
+                ids.discard(client_id)
+                if not ids:
+                    del self._by_token[tok]
+                    del self._tokens[bisect_left(self._tokens, tok)]
+
+    async def load(self) -> None:
+        with self._lock:
+            self._changes = []
+        # sesión propia: una recarga en segundo plano puede terminar después que el request
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(models.Client.id, models.Client.full_name, models.Client.email, models.Client.phone)
+                .where(models.Client.is_active.is_(True))
+            )).all()
+        entries = [Entry(r.id, r.full_name, r.email, r.phone) for r in rows]
+        fresh = await asyncio.get_running_loop().run_in_executor(None, ClientLookupIndex._build, entries)
+        # se arma afuera del lock y se intercambia de una vez, con los cambios que llegaron mientras
+        with self._lock:
+            for client_id, entry in self._changes:
+                fresh._discard(client_id)
+                if entry is not None:
+                    fresh._add(entry)
+            self._entries, self._by_phone = fresh._entries, fresh._by_phone
+            self._by_email, self._by_token, self._tokens = fresh._by_email, fresh._by_token, fresh._tokens
+            self._changes = []
+            self._loaded_at = time.monotonic()
+
+    def _reload_done(self, fut: asyncio.Future) -> None:
+        self._reloading = None
+        if not fut.cancelled() and fut.exception() is not None:
+            logger.warning("client index reload failed", exc_info=fut.exception())
+
+    async def ensure_loaded(self) -> None:
+        stale = self._loaded_at is None or time.monotonic() - self._loaded_at > REFRESH_SECONDS
+        if stale and self._reloading is None:
+            self._reloading = asyncio.ensure_future(self.load())
+            self._reloading.add_done_callback(self._reload_done)
+        if self._loaded_at is None:
+            # sin índice todavía: hay que esperar la carga (shield: si este request se
+            # cancela, la carga sigue para los demás)
+            await asyncio.shield(self._reloading)
+
+    def _change(self, client_id: uuid.UUID, entry: Optional[Entry]) -> None:
+        with self._lock:
+            self._discard(client_id)
+            if entry is not None:
+                self._add(entry)
+            if self._reloading is not None:
+                self._changes.append((client_id, entry))
+
+    def upsert(self, client: models.Client) -> None:
+        """Refleja un alta/edición. Los inactivos salen del índice."""
+        if self._loaded_at is None and self._reloading is None:
+            return  # todavía no se cargó: la carga inicial lo va a traer
+        active = client.is_active is not False
+        self._change(client.id, Entry(client.id, client.full_name, client.email, client.phone) if active else None)
+
+    def remove(self, client_id: uuid.UUID) -> None:
+        self._change(client_id, None)
+
+    # ---------- búsqueda ----------
+    def _prefix_ids(self, tok: str) -> set[uuid.UUID]:
+        ids = set()
+        i = bisect_left(self._tokens, tok)
+        while i < len(self._tokens) and self._tokens[i].startswith(tok):
+            ids |= self._by_token[self._tokens[i]]
+            i += 1
+        return ids
+
+    def resolve(self, q: str) -> list[Entry]:
+        """
+        Candidatos para q: email exacto, teléfono exacto (solo dígitos) o nombre cuyas
+        palabras empiecen con cada palabra de q. Si el nombre coincide completo con uno
+        solo, ese gana. Lista vacía = no está en el índice.
+        """
+        q = q.strip()
+        with self._lock:
+            if "@" in q:
+                ids = set(self._by_email.get(q.lower(), ()))
+            elif _is_phone_query(q):
+                ids = set(self._by_phone.get(norm_phone(q), ()))
+            else:
+                toks = norm_text(q).split()
+                ids = set.intersection(*(self._prefix_ids(t) for t in toks)) if toks else set()
+            found = [self._entries[i] for i in ids]
+
+        if len(found) > 1:
+            exact = [e for e in found if norm_text(e.full_name) == norm_text(q)]
+            if len(exact) == 1:
+                return exact
+        return sorted(found, key=lambda e: (norm_text(e.full_name), e.id))
+
+
+client_index = ClientLookupIndex()
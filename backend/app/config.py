@@ -8,10 +8,32 @@ ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    ASYNC_DATABASE_URL: str | None = None  # por defecto: DATABASE_URL con driver asyncpg
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 600
     DEBUG: bool = False
+    LOG_QUEUE: bool = False  # handlers de log en un thread aparte (QueueHandler/QueueListener)
+    LOG_JSON: bool = False  # una línea JSON por registro en vez de texto
+    USER_CACHE_TTL_SECONDS: float = 60.0  # cache de usuarios autenticados (0 = sin cache)
+    METRICS_ENABLED: bool = True  # requests por ruta y tiempos de consulta en GET /metrics
+    METRICS_TOKEN: str | None = None  # Bearer fijo para /metrics y /healthz/* (scraper); sin él, solo owners
+
+    # Pool de conexiones de la API (por worker: conexiones máx = POOL_SIZE + MAX_OVERFLOW)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0  # segundos esperando conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 1800  # segundos; -1 = nunca reciclar
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # statement_timeout de Postgres; 0 = sin límite
+
+    # Reenvíos de /attendance/checkin/batch: una idempotency_key vale como duplicado durante
+    # esta ventana; después se puede reusar y scripts/purge_checkin_keys.py la borra
+    CHECKIN_KEY_RETENTION_DAYS: int = 30
+
+    # Cache de reportes (por worker)
+    REPORT_CACHE_MAX_ENTRIES: int = 512  # 0 = sin cache
+    REPORT_CACHE_TTL_SECONDS: float = 60.0  # rangos que tocan el mes en curso
+    REPORT_CACHE_CLOSED_TTL_SECONDS: float = 0  # meses cerrados; 0 = no vencen
 
     # Config Pydantic v2
     model_config = SettingsConfigDict(
@@ -1,13 +1,64 @@
+import time
 from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from .config import settings
+from .metrics import pool_metrics
 
 
+# Sync: scripts, seeds y alembic
 engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def async_database_url() -> str:
+    # Si no se define ASYNC_DATABASE_URL, usamos la misma base con el driver asyncpg
+    if settings.ASYNC_DATABASE_URL:
+        return settings.ASYNC_DATABASE_URL
+    return make_url(settings.DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def _server_settings() -> dict:
+    # asyncpg no acepta "options": los parámetros de sesión van como server_settings
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        return {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+    return {}
+
+
+class MeteredPool(AsyncAdaptedQueuePool):
+    """Pool que mide cuánto espera cada checkout (cola llena o conexión nueva)."""
+
+    def _do_get(self):
+        # Se llama recién cuando la sesión ejecuta su primera query: la conexión sigue siendo lazy
+        pool_metrics.start_wait()
+        t0 = time.perf_counter()
+        wait_ms = None
+        try:
+            rec = super()._do_get()
+            wait_ms = (time.perf_counter() - t0) * 1000
+            return rec
+        finally:
+            pool_metrics.end_wait(wait_ms)
+
+
+# Async: la API (los handlers no ocupan un thread del pool mientras esperan a la base)
+async_engine = create_async_engine(
+    async_database_url(),
+    poolclass=MeteredPool,
+    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    connect_args={"server_settings": _server_settings()},
+)
+# expire_on_commit=False: después del commit no hay lazy-loads implícitos (no se permiten en async)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
 @contextmanager
 def get_session():
     db = SessionLocal()
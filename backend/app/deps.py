@@ -1,4 +1,4 @@
-from .database import SessionLocal  
+from .database import SessionLocal, AsyncSessionLocal
 
 def get_db():
     db = SessionLocal()
@@ -8,4 +8,12 @@ def get_db():
         db.rollback()
         raise
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        try:
+            yield db
+        except Exception:
+            await db.rollback()
+            raise
\ No newline at end of file
@@ -0,0 +1,60 @@
+# app/etag.py
+"""
+ETags débiles para los GET que el frontend consulta en loop.
+
+Cada tabla base tiene contadores en table_versions que un trigger por sentencia
+incrementa en cualquier INSERT/UPDATE/DELETE (API, scripts o SQL a mano; migraciones
+d5b2c7e9a410 y e2b7c4a9d158). Cada conexión suma en su propio slot para que los
+escritores no esperen el lock de una única fila; la versión de la tabla es la suma de
+sus slots, que solo crece. El ETag de una respuesta = hash(path + query + versiones de
+las tablas de las que depende): si ninguna cambió, respondemos 304 sin correr la
+consulta ni serializar.
+"""
+import hashlib
+from typing import Callable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+from .deps import get_async_db
+
+
+async def table_versions(db: AsyncSession, tables: tuple[str, ...]) -> dict[str, int]:
+    V = models.TableVersion
+    rows = (await db.execute(
+        select(V.table_name, func.sum(V.version))
+        .where(V.table_name.in_(tables))
+        .group_by(V.table_name)
+    )).all()
+    return {name: int(version) for name, version in rows}
+
+
+def _matches(if_none_match: str, tag: str) -> bool:
+    # Comparación débil (RFC 9110): W/"x" y "x" son equivalentes
+    if if_none_match.strip() == "*":
+        return True
+    wanted = tag.removeprefix("W/")
+    return any(t.strip().removeprefix("W/") == wanted for t in if_none_match.split(","))
+
+
+def etag(*tables: str, key: Optional[Callable[[], object]] = None):
+    """
+    Dependencia para GETs: pone ETag/Cache-Control y corta con 304 si el cliente ya
+    tiene la versión actual. Va en `dependencies=[...]` después del chequeo de rol.
+    `key`: lo que además de las tablas cambia la respuesta (p.ej. el mes en curso).
+    """
+    async def _dep(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        versions = await table_versions(db, tables)
+        raw = "|".join([request.url.path, str(sorted(request.query_params.multi_items()))]
+                       + [f"{t}={versions.get(t, 0)}" for t in tables]
+                       + ([str(key())] if key else []))
+        tag = 'W/"%s"' % hashlib.blake2b(raw.encode(), digest_size=12).hexdigest()
+
+        headers = {"ETag": tag, "Cache-Control": "no-cache"}  # no-cache = guardar, pero revalidar siempre
+        inm = request.headers.get("if-none-match")
+        if inm and _matches(inm, tag):
+            raise HTTPException(status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+    return _dep
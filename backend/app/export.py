@@ -0,0 +1,74 @@
+# app/export.py
+"""
+Exportaciones CSV / NDJSON en streaming (/payments/export, /attendance/export, /clients/export).
+
+Las filas salen de un cursor del lado del servidor (yield_per) y se escriben por tandas,
+así la memoria por request no depende de cuántas filas haya. Usa la sesión del request:
+FastAPI cierra las dependencias con yield recién después de enviar la respuesta.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Literal
+from uuid import UUID
+
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .bulk import NDJSON
+
+ExportFormat = Literal["csv", "ndjson"]
+YIELD_PER = 1000
+
+
+def _value(v):
+    if isinstance(v, (datetime, date)):
+        return v.isoformat()
+    if isinstance(v, UUID):
+        return str(v)
+    if isinstance(v, Decimal):  # montos: número en NDJSON
+        return float(v)
+    if hasattr(v, "value"):  # enums
+        return v.value
+    return v
+
+
+def _csv_cell(v):
+    if v is None:
+        return ""
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, Decimal):
+        return str(v)  # con sus 2 decimales, sin pasar por float
+    return _value(v)
+
+
+def export_response(db: AsyncSession, query: Select, fmt: ExportFormat, filename: str) -> StreamingResponse:
+    """`query` selecciona columnas (no entidades ORM): sus labels son los nombres de campo."""
+    async def chunks():
+        result = await db.stream(query.execution_options(yield_per=YIELD_PER))
+        cols = list(result.keys())
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(cols)
+        async for rows in result.partitions():
+            for row in rows:
+                if fmt == "csv":
+                    writer.writerow([_csv_cell(v) for v in row])
+                else:
+                    buf.write(json.dumps({c: _value(v) for c, v in zip(cols, row)}) + "\n")
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if buf.tell():
+            yield buf.getvalue().encode()
+
+    return StreamingResponse(
+        chunks(),
+        media_type="text/csv; charset=utf-8" if fmt == "csv" else NDJSON,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{"csv" if fmt == "csv" else "ndjson"}"'},
+    )
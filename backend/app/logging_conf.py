@@ -1,15 +1,86 @@
 # app/logging_conf.py
 import os
+import atexit
+import copy
+import json
 import logging
+import queue
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from logging.config import dictConfig
 
-def setup_logging(debug: bool = False) -> None:
+# Atributos propios de LogRecord: todo lo demás vino por extra= y va como campo en el JSON
+_RECORD_ATTRS = set(logging.LogRecord("", 0, "", 0, "", (), None).__dict__) | {"message", "asctime", "taskName"}
+
+_listeners: list[tuple[logging.Logger, QueueListener]] = []
+
+
+class JsonFormatter(logging.Formatter):
+    """Una línea JSON por registro: ts, level, logger, msg, campos de extra= y exc."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        out = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _RECORD_ATTRS and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            out["exc"] = record.exc_text
+        return json.dumps(out, ensure_ascii=False, default=str)
+
+
+class _RecordQueueHandler(QueueHandler):
+    # A diferencia de QueueHandler.prepare, no formatea acá: el formatter (texto o JSON)
+    # corre en el thread del listener. Solo se resuelven args y traceback, que no viajan bien.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg, record.args = record.getMessage(), None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _route_through_queue(logger: logging.Logger) -> None:
+    # Los handlers reales pasan a un QueueListener (thread propio); el logger
+    # solo encola, así el request nunca espera escritura a disco ni rotación.
+    handlers = list(logger.handlers)
+    if not handlers:
+        return
+    q: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(q, *handlers, respect_handler_level=True)
+    logger.handlers = [_RecordQueueHandler(q)]
+    listener.start()
+    _listeners.append((logger, listener))
+
+
+def shutdown_logging() -> None:
+    """
+    Vacía las colas y devuelve los handlers reales a sus loggers (lo que se loguee
+    después del shutdown se escribe directo). Idempotente: lifespan + atexit.
+    """
+    while _listeners:
+        logger, listener = _listeners.pop()
+        listener.stop()  # procesa lo pendiente antes de cortar el thread
+        logger.handlers = list(listener.handlers)
+        for h in listener.handlers:
+            h.flush()
+
+
+def setup_logging(debug: bool = False, use_queue: bool = False, json_format: bool = False) -> None:
     base_dir = Path(__file__).resolve().parents[1]  # carpeta backend/
     logs_dir = base_dir / "logs"
     logs_dir.mkdir(exist_ok=True)
 
     level = "DEBUG" if debug else "INFO"
+    shutdown_logging()  # por si se llama dos veces (reload)
 
     dictConfig({
         "version": 1,
@@ -17,7 +88,7 @@ def setup_logging(debug: bool = False) -> None:
         "formatters": {
             "standard": {
                 "format": "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
-            }
+            } if not json_format else {"()": JsonFormatter},
         },
         "handlers": {
             "console": {
@@ -71,3 +142,8 @@ def setup_logging(debug: bool = False) -> None:
             "level": level,
         },
     })
+
+    if use_queue:
+        _route_through_queue(logging.getLogger())
+        _route_through_queue(logging.getLogger("request"))
+        atexit.register(shutdown_logging)
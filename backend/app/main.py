@@ -1,13 +1,28 @@
-from fastapi import FastAPI, Request, status
-from fastapi.responses import JSONResponse
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import IntegrityError
+from .auth import require_ops_access
 from .config import settings
-from .logging_conf import setup_logging
+from .logging_conf import setup_logging, shutdown_logging
 from .middleware import RequestLogMiddleware
+from .database import async_engine
+from .metrics import PROMETHEUS_CONTENT_TYPE, pool_metrics, query_metrics, render as render_metrics, request_metrics
+from .report_cache import report_cache
 from .routers import clients, payments, auth, attendance, reports
 
-setup_logging(debug=getattr(settings, "DEBUG", False))  # ⬅️ antes de crear/usar loggers
+setup_logging(
+    debug=getattr(settings, "DEBUG", False),
+    use_queue=settings.LOG_QUEUE,
+    json_format=settings.LOG_JSON,
+)  # ⬅️ antes de crear/usar loggers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_logging()  # vacía la cola de logs antes de que termine el worker
 
 app = FastAPI(
     title="Gym – Clientes & Pagos",
@@ -16,6 +31,7 @@ app = FastAPI(
     redoc_url="/redoc",
     openapi_url="/openapi.json",
     debug=getattr(settings, "DEBUG", False),
+    lifespan=lifespan,
 )
 
 @app.exception_handler(IntegrityError)
@@ -31,10 +47,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"], 
     allow_headers=["*"],
-    expose_headers=["X-Total-Count", "Link"],  # ⬅️ para paginación
+    expose_headers=["X-Total-Count", "Link", "ETag"],  # ⬅️ paginación + revalidación (If-None-Match)
 )
 
-app.add_middleware(RequestLogMiddleware)  # ⬅️ aseguralo
+app.add_middleware(  # ⬅️ aseguralo
+    RequestLogMiddleware,
+    metrics=request_metrics if settings.METRICS_ENABLED else None,
+)
+if settings.METRICS_ENABLED:
+    query_metrics.install(async_engine.sync_engine)
 
 # Routers
 from .routers import clients, payments, auth, attendance, reports
@@ -47,4 +68,24 @@ app.include_router(reports.router)
 
 @app.get("/healthz", tags=["health"])
 def read_healthz():
-    return {"message": "Gym App Backend is running."}
\ No newline at end of file
+    return {"message": "Gym App Backend is running."}
+
+
+# Lo demás expone rutas, tiempos y estado interno: token de métricas u owner
+@app.get("/healthz/pool", tags=["health"], dependencies=[Depends(require_ops_access)])
+def read_pool_stats():
+    # Estado del pool de este worker: conexiones en uso y espera para conseguir una
+    return pool_metrics.snapshot(async_engine.pool)
+
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse, dependencies=[Depends(require_ops_access)])
+async def read_metrics():
+    # Formato de texto de Prometheus, de este worker. async: lee los contadores desde
+    # el event loop, el mismo hilo que los actualiza
+    return PlainTextResponse(render_metrics(async_engine.pool), media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@app.get("/healthz/report-cache", tags=["health"], dependencies=[Depends(require_ops_access)])
+def read_report_cache_stats():
+    # Aciertos / fallos del cache de reportes de este worker
+    return report_cache.stats()
\ No newline at end of file
@@ -0,0 +1,263 @@
+# app/metrics.py
+"""
+Métricas en memoria (por proceso) de la API: pool de conexiones, requests por ruta y
+tiempos de consulta. GET /metrics las expone en formato de texto de Prometheus.
+
+Pool:
+- espera de checkout: cuánto tarda un request en conseguir conexión del pool
+  (si sube mientras la base está ociosa, el pool es chico para el worker)
+- waiting: requests esperando conexión en este momento
+- failed: checkouts fallidos (superaron DB_POOL_TIMEOUT o la base no respondió)
+
+Requests (RequestLogMiddleware) y consultas (eventos before/after_cursor_execute del
+engine async): la etiqueta de ruta es la plantilla (/clients/{client_id}), no el path
+crudo, así la cantidad de series queda acotada. Ambas se actualizan solo desde el event
+loop, sin lock: en el camino de cada request son un par de accesos a dict.
+
+Con varios workers de uvicorn cada uno tiene sus números (igual que /healthz/pool).
+"""
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+from .config import settings
+
+WINDOW = 1000  # últimas N esperas para los percentiles
+
+# Límites (segundos) de los histogramas; el último bucket (+Inf) va implícito
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UNMATCHED = "<unmatched>"  # 404 y requests que no llegaron al router
+
+
+class Histogram:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # no acumulados; render() los suma
+        self.sum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.sum += seconds
+
+
+def _pct(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+class PoolMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recent: deque[float] = deque(maxlen=WINDOW)
+        self.wait_seconds = Histogram()
+        self.checkouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.waiting = 0
+        self.failed = 0
+
+    def start_wait(self) -> None:
+        with self._lock:
+            self.waiting += 1
+
+    def end_wait(self, wait_ms: float | None) -> None:
+        """wait_ms=None: el checkout falló."""
+        with self._lock:
+            self.waiting -= 1
+            if wait_ms is None:
+                self.failed += 1
+                return
+            self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self._recent.append(wait_ms)
+            self.wait_seconds.observe(wait_ms / 1000)
+
+    def snapshot(self, pool) -> dict:
+        with self._lock:
+            recent = list(self._recent)
+            waits = {
+                "checkouts": self.checkouts,
+                "failed": self.failed,
+                "waiting": self.waiting,
+                "wait_ms_avg": round(self.wait_ms_total / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_ms_p50": round(_pct(recent, 50), 3),
+                "wait_ms_p95": round(_pct(recent, 95), 3),
+                "wait_ms_max": round(self.wait_ms_max, 3),
+            }
+        return {
+            "pool": {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+            },
+            "checkout": waits,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+# ---------- requests por ruta ----------
+# scope ASGI del request en curso: las consultas lo leen para etiquetarse con su ruta
+current_scope: ContextVar[Optional[dict]] = ContextVar("current_scope", default=None)
+
+
+def route_label(scope: Optional[dict]) -> str:
+    # El router deja la ruta que matcheó en el mismo scope (scope["route"])
+    route = scope.get("route") if scope is not None else None
+    return getattr(route, "path_format", None) or UNMATCHED
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.requests: dict[tuple[str, str, int], int] = {}  # (método, ruta, status) -> terminados
+        self.latency: dict[tuple[str, str], Histogram] = {}  # (método, ruta) -> duración
+        # requests en curso: la ruta se conoce recién al pasar por el router, así que se
+        # guarda el scope y el gauge se calcula al exponer
+        self._active: dict[int, dict] = {}
+
+    def start(self, scope: dict) -> None:
+        self._active[id(scope)] = scope
+
+    def finish(self, scope: dict, status: int, seconds: float) -> None:
+        self._active.pop(id(scope), None)
+        method, route = scope["method"], route_label(scope)
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        hist = self.latency.get((method, route))
+        if hist is None:
+            hist = self.latency[(method, route)] = Histogram()
+        hist.observe(seconds)
+
+    def in_flight(self) -> dict[tuple[str, str], int]:
+        out: dict[tuple[str, str], int] = {}
+        for scope in list(self._active.values()):
+            key = (scope["method"], route_label(scope))
+            out[key] = out.get(key, 0) + 1
+        return out
+
+
+request_metrics = RequestMetrics()
+
+
+# ---------- consultas ----------
+# Operación y primera tabla del SQL: etiqueta acotada (el texto completo no lo es)
+_STATEMENT_TABLE = re.compile(r'\b(?:FROM|INTO|UPDATE|JOIN)\s+"?([A-Za-z_][\w.]*)', re.IGNORECASE)
+_LABEL_CACHE_SIZE = 4096
+
+
+class QueryMetrics:
+    def __init__(self):
+        self.latency: dict[tuple[str, str, str], Histogram] = {}  # (ruta, operación, tabla) -> duración
+        self._labels: dict[str, tuple[str, str]] = {}  # SQL -> (operación, tabla)
+
+    def install(self, engine) -> None:
+        """engine: el sync_engine del AsyncEngine (los eventos de cursor son del sync)."""
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+
+    def _statement_labels(self, statement: str) -> tuple[str, str]:
+        labels = self._labels.get(statement)
+        if labels is None:
+            words = statement.split(None, 1)
+            match = _STATEMENT_TABLE.search(statement)
+            labels = (words[0].upper() if words else "", match.group(1).lower() if match else "")
+            if len(self._labels) < _LABEL_CACHE_SIZE:  # IN (...) expandidos generan SQL distintos
+                self._labels[statement] = labels
+        return labels
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._metrics_t0 = time.perf_counter()
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        t0 = getattr(context, "_metrics_t0", None)
+        if t0 is None:
+            return
+        seconds = time.perf_counter() - t0
+        scope = current_scope.get()
+        key = (route_label(scope) if scope is not None else "", *self._statement_labels(statement))
+        hist = self.latency.get(key)
+        if hist is None:
+            hist = self.latency[key] = Histogram()
+        hist.observe(seconds)
+
+
+query_metrics = QueryMetrics()
+
+
+# ---------- exposición (formato de texto de Prometheus 0.0.4) ----------
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    def esc(v) -> str:
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return ",".join(f'{n}="{esc(v)}"' for n, v in zip(names, values))
+
+
+def _header(lines: list[str], name: str, kind: str, help_: str) -> None:
+    lines.append(f"# HELP {name} {help_}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def _histogram(lines: list[str], name: str, names: tuple[str, ...], values: tuple, hist: Histogram) -> None:
+    labels = _labels(names, values)
+    sep, braces = (",", f"{{{labels}}}") if labels else ("", "")
+    total = 0
+    for bound, n in zip((*LATENCY_BUCKETS, "+Inf"), hist.counts):
+        total += n
+        lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {total}')
+    lines.append(f"{name}_sum{braces} {hist.sum:.6f}")
+    lines.append(f"{name}_count{braces} {total}")
+
+
+def render(pool) -> str:
+    """Todas las métricas de este proceso; pool: el del engine async."""
+    lines: list[str] = []
+
+    _header(lines, "http_requests_total", "counter", "Requests terminados por ruta y status.")
+    for key, n in sorted(request_metrics.requests.items()):
+        lines.append(f"http_requests_total{{{_labels(('method', 'route', 'status'), key)}}} {n}")
+    _header(lines, "http_request_duration_seconds", "histogram", "Duración de los requests por ruta.")
+    for key, hist in sorted(request_metrics.latency.items()):
+        _histogram(lines, "http_request_duration_seconds", ("method", "route"), key, hist)
+    _header(lines, "http_requests_in_flight", "gauge", "Requests en curso por ruta.")
+    for key, n in sorted(request_metrics.in_flight().items()):
+        lines.append(f"http_requests_in_flight{{{_labels(('method', 'route'), key)}}} {n}")
+
+    _header(lines, "db_query_duration_seconds", "histogram",
+            "Duración de las consultas por ruta, operación y primera tabla.")
+    for key, hist in sorted(query_metrics.latency.items()):
+        _histogram(lines, "db_query_duration_seconds", ("route", "operation", "table"), key, hist)
+
+    snap = pool_metrics.snapshot(pool)
+    for name, help_, value in (
+        ("db_pool_size", "Conexiones fijas del pool.", snap["pool"]["size"]),
+        ("db_pool_in_use", "Conexiones prestadas a requests.", snap["pool"]["in_use"]),
+        ("db_pool_idle", "Conexiones libres en el pool.", snap["pool"]["idle"]),
+        ("db_pool_overflow", "Conexiones abiertas por encima de pool_size.", snap["pool"]["overflow"]),
+        ("db_pool_max_overflow", "Máximo de conexiones extra (DB_MAX_OVERFLOW).", snap["pool"]["max_overflow"]),
+        ("db_pool_waiting", "Requests esperando conexión.", snap["checkout"]["waiting"]),
+    ):
+        _header(lines, name, "gauge", help_)
+        lines.append(f"{name} {value}")
+    _header(lines, "db_pool_checkout_failures_total", "counter", "Checkouts fallidos (timeout o base caída).")
+    lines.append(f"db_pool_checkout_failures_total {snap['checkout']['failed']}")
+    _header(lines, "db_pool_checkout_wait_seconds", "histogram", "Espera para conseguir conexión del pool.")
+    with pool_metrics._lock:
+        _histogram(lines, "db_pool_checkout_wait_seconds", (), (), pool_metrics.wait_seconds)
+
+    return "\n".join(lines) + "\n"
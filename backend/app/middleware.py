@@ -1,34 +1,69 @@
 import time
 import logging
-from typing import Callable
-from fastapi import Request
-from jose import JWTError, jwt
-from starlette.middleware.base import BaseHTTPMiddleware
-from .config import settings
+from typing import Optional
+from starlette.requests import Request
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from .auth import token_claims
+from .metrics import RequestMetrics, current_scope
 
 logger = logging.getLogger("request")
 
-class RequestLogMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable):
+class RequestLogMiddleware:
+    """
+    Log de acceso como middleware ASGI puro: no envuelve el request en otra task ni
+    bufferiza el body (a diferencia de BaseHTTPMiddleware), así que las respuestas
+    en streaming pasan tal cual. Cuenta los bytes del body a medida que salen.
+    Con `metrics`, registra además la duración por ruta (la misma medición del log).
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Optional[RequestMetrics] = None):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         start_ns = time.perf_counter_ns()
-        method, path = request.method, request.url.path
-        client = request.client.host if request.client else "unknown"
+        method, path = scope["method"], scope["path"]
+        client = scope["client"][0] if scope.get("client") else "unknown"
 
         user_label = "Anonymous"
-        auth_header = request.headers.get("Authorization")
-        logger.debug("[dbg] Auth header for %s %s: %r", method, path, auth_header)
-
-        if auth_header:
-            parts = auth_header.strip().split(None, 1)
-            if len(parts) == 2 and parts[0].lower() == "bearer":
-                token = parts[1].strip()
-                try:
-                    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-                    user_label = payload.get("name") or payload.get("email") or payload.get("sub", "UnknownUser")
-                except JWTError as e:
-                    logger.debug("[dbg] JWT decode failed on %s: %r", path, e)
-
-        response = await call_next(request)
-        dur_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
-        logger.info("[%s] %s %s -> %d in %.2fms from %s", user_label, method, path, response.status_code, dur_ms, client)
-        return response
+        # Se decodifica una sola vez; get_current_user reusa lo que queda en request.state
+        request = Request(scope)
+        payload = token_claims(request)
+        if payload:
+            user_label = payload.get("name") or payload.get("email") or payload.get("sub", "UnknownUser")
+        elif request.headers.get("Authorization"):
+            logger.debug("[dbg] Invalid bearer token on %s %s", method, path)
+
+        status_code = 500  # si la app explota antes de responder
+        n_bytes = 0
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code, n_bytes
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                n_bytes += len(message.get("body", b""))
+            await send(message)
+
+        metrics = self.metrics
+        if metrics is not None:
+            metrics.start(scope)
+            scope_token = current_scope.set(scope)  # para etiquetar las consultas con la ruta
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            dur_ns = time.perf_counter_ns() - start_ns
+            if metrics is not None:
+                current_scope.reset(scope_token)
+                metrics.finish(scope, status_code, dur_ns / 1_000_000_000)
+            dur_ms = dur_ns / 1_000_000
+            logger.info(
+                "[%s] %s %s -> %d %dB in %.2fms from %s", user_label, method, path, status_code, n_bytes, dur_ms, client,
+                # campos sueltos para el formato JSON (LOG_JSON); el texto no los usa
+                extra={"user": user_label, "method": method, "path": path, "status": status_code,
+                       "bytes": n_bytes, "duration_ms": round(dur_ms, 2), "client": client},
+            )
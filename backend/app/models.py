@@ -1,8 +1,8 @@
 import uuid
 from datetime import datetime
 from sqlalchemy import (
-    Column, Index, String, DateTime, Boolean, Integer, Float,
-    ForeignKey, UniqueConstraint, Enum
+    Column, Index, String, DateTime, Date, Boolean, Integer, SmallInteger, BigInteger, Numeric, Uuid,
+    ForeignKey, UniqueConstraint, Enum, text
 )
 from sqlalchemy.orm import declarative_base, relationship
 import enum
@@ -15,7 +15,7 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     full_name = Column(String, nullable=False)
     email = Column(String, unique=True, nullable=False, index=True)
     password_hash = Column(String, nullable=False)
@@ -25,51 +25,143 @@ class User(Base):
 
 class Client(Base):
     __tablename__ = "clients"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     full_name = Column(String, nullable=False)
     phone = Column(String, nullable=True)
     email = Column(String, nullable=True, unique=False)
     join_date = Column(DateTime, default=datetime.utcnow)
     is_active = Column(Boolean, default=True)
-    created_by_user_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_by_user_id = Column(Uuid, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    # desnormalizadas, mantenidas en cada alta/baja de pago o check-in (app/client_activity.py)
+    last_paid_year = Column(Integer, nullable=True)
+    last_paid_month = Column(Integer, nullable=True)
+    last_checkin_at = Column(DateTime, nullable=True)
     
-    payments = relationship("Payment", back_populates="client")
-    attendance = relationship("Attendance", back_populates="client", cascade="all, delete-orphan")
+    # Las FK tienen ON DELETE CASCADE: al borrar un cliente no se cargan sus filas (sin
+    # passive_deletes el ORM intentaba poner client_id = NULL en los pagos)
+    payments = relationship("Payment", back_populates="client", passive_deletes=True)
+    attendance = relationship("Attendance", back_populates="client", cascade="all, delete-orphan",
+                              passive_deletes=True)
     
     __table_args__ = (
     Index("ix_clients_full_name", "full_name"),
     Index("ix_clients_email", "email"),
     Index("ix_clients_join_date", "join_date"),
     Index("ix_clients_is_active", "is_active"),
+    # búsqueda por "contiene" / similitud (pg_trgm)
+    Index("ix_clients_full_name_trgm", "full_name", postgresql_using="gin", postgresql_ops={"full_name": "gin_trgm_ops"}),
+    Index("ix_clients_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+    Index("ix_clients_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+    # claves de deduplicación de /clients/bulk
+    Index("ix_clients_email_lower", text("lower(email)")),
+    Index("ix_clients_phone_digits", text("regexp_replace(phone, '[^0-9]', '', 'g')")),
+    # orden del listado y filtro "al día" de /clients/status
+    Index("ix_clients_last_paid", "last_paid_year", "last_paid_month"),
+    Index("ix_clients_last_checkin_at", "last_checkin_at"),
+    # order_by=...&order_dir=desc en columnas que admiten NULL: DESC NULLS LAST (ver order_clauses)
+    Index("ix_clients_join_date_desc", text("join_date DESC NULLS LAST"), text("id DESC")),
+    Index("ix_clients_last_paid_desc", text("last_paid_year DESC NULLS LAST"), text("last_paid_month DESC NULLS LAST"), text("id DESC")),
+    Index("ix_clients_last_checkin_at_desc", text("last_checkin_at DESC NULLS LAST"), text("id DESC")),
 )
 
 class Payment(Base):
     __tablename__ = "payments"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    client_id = Column(String, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    client_id = Column(Uuid, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
     client = relationship("Client", back_populates="payments")
-    amount = Column(Float, nullable=False)
+    amount = Column(Numeric(12, 2), nullable=False)  # exacto: las sumas de los reportes no acumulan error
     method = Column(String, nullable=False)  # efectivo, transferencia, etc.
     method_channel = Column(String, nullable=True)  # detalles adicionales del método
     note = Column(String, nullable=True)
     period_month = Column(Integer, nullable=False)  # 1..12
     period_year = Column(Integer, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    created_by_user_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    created_by_user_id = Column(Uuid, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
 
     __table_args__ = (
         UniqueConstraint("client_id", "period_month", "period_year", name="uq_payment_period"),
         Index("ix_payments_method", "method"),
         Index("ix_payments_method_channel", "method_channel"),
+        # orden de list_payments (con y sin client_id); client_id también cubre la FK
+        Index("ix_payments_period_order", text("period_year DESC"), text("period_month DESC"),
+              text("created_at DESC NULLS LAST"), text("id DESC")),
+        Index("ix_payments_client_period_order", "client_id", text("period_year DESC"), text("period_month DESC"),
+              text("created_at DESC NULLS LAST"), text("id DESC")),
+        # rango de created_at de los reportes: index-only scan, sin ir a la tabla
+        Index("ix_payments_created_at_cover", "created_at",
+              postgresql_include=["client_id", "method", "method_channel", "amount"]),
     )
 
 class Attendance(Base):
+    # Particionada por mes de checkin_at (app/partitions.py): la PK tiene que incluir la
+    # clave de partición, así que id solo es único junto con checkin_at
     __tablename__ = "attendances"
-    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
-    client_id = Column(String, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
-    checkin_at = Column(DateTime, default=datetime.utcnow, nullable=False)
-    coach_id = Column(String, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    client_id = Column(Uuid, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False)
+    checkin_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False)
+    coach_id = Column(Uuid, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
     
     client = relationship("Client", back_populates="attendance")
-    
-    
\ No newline at end of file
+
+    __table_args__ = (
+        # list_attendance: ORDER BY checkin_at DESC, id DESC (índice recorrido hacia atrás),
+        # con o sin client_id; los rangos de checkin_at usan los mismos índices
+        Index("ix_attendances_checkin_at_id", "checkin_at", "id"),
+        Index("ix_attendances_client_checkin", "client_id", "checkin_at", "id"),
+        {"postgresql_partition_by": "RANGE (checkin_at)"},
+    )
+
+
+# ---------- rollups (agregados precalculados para reportes) ----------
+# Día = fecha (UTC) del timestamp guardado, igual que los filtros start/end de los reportes.
+# Se mantienen en la misma transacción que el alta/baja (app/rollups.py);
+# scripts/rebuild_rollups.py los recalcula desde cero.
+
+class PaymentDailyRollup(Base):
+    __tablename__ = "payment_rollup_daily"
+    day = Column(Date, primary_key=True)
+    local_day = Column(Date, primary_key=True)  # día en la zona del gimnasio (ver app/rollups.py)
+    method = Column(String, primary_key=True)
+    method_channel = Column(String, primary_key=True, default="")  # "" = sin canal (la PK no admite NULL)
+    n_payments = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(14, 2), nullable=False, default=0)
+
+class PaymentMonthlyRollup(Base):
+    __tablename__ = "payment_rollup_monthly"
+    month = Column(Date, primary_key=True)  # 1er día del mes
+    local_month = Column(Date, primary_key=True)
+    method = Column(String, primary_key=True)
+    method_channel = Column(String, primary_key=True, default="")
+    n_payments = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(14, 2), nullable=False, default=0)
+
+class AttendanceDailyRollup(Base):
+    __tablename__ = "attendance_rollup_daily"
+    day = Column(Date, primary_key=True)
+    local_day = Column(Date, primary_key=True)
+    n_checkins = Column(Integer, nullable=False, default=0)
+
+class ClientDailyRollup(Base):
+    __tablename__ = "client_rollup_daily"
+    day = Column(Date, primary_key=True)  # por join_date
+    local_day = Column(Date, primary_key=True)
+    n_new = Column(Integer, nullable=False, default=0)
+
+
+class TableVersion(Base):
+    # Contadores por tabla, los incrementan triggers (ver app/etag.py)
+    __tablename__ = "table_versions"
+    table_name = Column(String, primary_key=True)
+    slot = Column(SmallInteger, primary_key=True)  # pid % 64 de la conexión que escribió
+    version = Column(BigInteger, nullable=False, default=0)
+
+
+class CheckinIdempotencyKey(Base):
+    # Claves de /attendance/checkin/batch: un reenvío con la misma clave no vuelve a registrar el
+    # check-in. Valen CHECKIN_KEY_RETENTION_DAYS desde created_at (ver scripts/purge_checkin_keys.py)
+    __tablename__ = "checkin_idempotency_keys"
+    key = Column(String, primary_key=True)
+    attendance_id = Column(Uuid, nullable=False)
+    client_id = Column(Uuid, ForeignKey("clients.id", ondelete="CASCADE"), nullable=False, index=True)
+    checkin_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
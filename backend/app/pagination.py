@@ -0,0 +1,145 @@
+# app/pagination.py
+import base64
+import json
+from datetime import datetime
+from typing import Any, Literal, Optional, Sequence
+from urllib.parse import urlencode
+from uuid import UUID
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_, true, false, tuple_, literal, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+# Una "clave" de orden es (columna_o_expresion, "asc"|"desc").
+# Siempre terminar la lista con una columna única (p.ej. id) para que el orden sea total.
+SortKey = tuple[Any, str]
+
+# exact: COUNT(*) real | estimate: estimación del planner (no recorre la tabla) | none: sin conteo
+CountMode = Literal["exact", "estimate", "none"]
+
+
+def order_clauses(keys: Sequence[SortKey]) -> list:
+    """ORDER BY para las claves dadas. NULLs siempre al final, en ambos sentidos,
+    para que el keyset pueda tratarlos de forma uniforme. En columnas NOT NULL se omite:
+    no cambia el orden y así un índice común (recorrido hacia atrás para DESC) sirve."""
+    clauses = []
+    for col, d in keys:
+        clause = col.desc() if d == "desc" else col.asc()
+        clauses.append(clause.nulls_last() if _nullable(col) else clause)
+    return clauses
+
+
+def _after(col, direction: str, value):
+    # Filas estrictamente "después" de value en esta columna (NULLS LAST)
+    if value is None:
+        return false()  # nada viene después de NULL salvo otros NULL (desempata la siguiente clave)
+    value = literal(value, col.type)  # permite comparar booleanos con < / >
+    cmp = col < value if direction == "desc" else col > value
+    return or_(cmp, col.is_(None))
+
+
+def _equal(col, value):
+    return col.is_(None) if value is None else col == value
+
+
+def _nullable(col) -> bool:
+    return getattr(getattr(col, "expression", col), "nullable", True)
+
+
+def keyset_filter(keys: Sequence[SortKey], values: Sequence[Any]):
+    """
+    Condición de keyset: filas que van estrictamente después de `values` según `keys`.
+    Equivale a la comparación lexicográfica (k1, k2, ...) > (v1, v2, ...) respetando
+    el sentido de cada clave, sin OFFSET: el costo no depende de la página.
+    """
+    cols = [c for c, _ in keys]
+    dirs = {d for _, d in keys}
+    if len(dirs) == 1 and not any(_nullable(c) for c in cols):
+        # Caso simple: comparación de tuplas, que Postgres resuelve con un rango del índice
+        lhs, rhs = tuple_(*cols), tuple_(*values)
+        return lhs < rhs if dirs == {"desc"} else lhs > rhs
+
+    branches = []
+    for i, (col, d) in enumerate(keys):
+        prefix = [_equal(c, v) for (c, _), v in zip(keys[:i], values[:i])]
+        branches.append(and_(*prefix, _after(col, d, values[i])) if prefix else _after(col, d, values[i]))
+    cond = or_(*branches) if branches else true()
+
+    # Cota redundante sobre la 1ra clave para que el índice pueda arrancar en el cursor
+    first, d = keys[0]
+    if values and values[0] is not None and not _nullable(first):
+        cond = and_(first <= values[0] if d == "desc" else first >= values[0], cond)
+    return cond
+
+
+def _to_json(v):
+    if isinstance(v, datetime):
+        return {"dt": v.isoformat()}
+    if isinstance(v, UUID):
+        return {"uuid": str(v)}
+    return v
+
+
+def _from_json(v):
+    if isinstance(v, dict) and "dt" in v:
+        return datetime.fromisoformat(v["dt"])
+    if isinstance(v, dict) and "uuid" in v:
+        return UUID(v["uuid"])
+    return v
+
+
+def encode_cursor(values: Sequence[Any], tag: str) -> str:
+    """Cursor opaco: valores de la clave de orden de la última fila + tag del orden usado."""
+    raw = json.dumps({"t": tag, "v": [_to_json(v) for v in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, tag: str, n_keys: int) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        values = [_from_json(v) for v in data["v"]]
+        ok = data.get("t") == tag and len(values) == n_keys
+    except (ValueError, KeyError, TypeError):
+        ok = False
+    if not ok:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, "Invalid cursor")
+    return values
+
+
+def row_values(obj, attrs: Sequence[str]) -> list[Any]:
+    return [getattr(obj, a) for a in attrs]
+
+
+def link(base: str, params: dict, rel: str) -> str:
+    # se omiten vacíos y el modo de conteo por defecto
+    clean = {k: v for k, v in params.items() if v is not None and v != "" and not (k == "count" and v == "exact")}
+    return f'<{base}?{urlencode(clean)}>; rel="{rel}"'
+
+
+async def _planner_rows(db: AsyncSession, stmt) -> int:
+    # EXPLAIN solo planifica la consulta: devuelve la estimación de filas sin ejecutarla
+    conn = await db.connection()
+    compiled = stmt.compile(dialect=conn.dialect)
+    params = compiled.params
+    if compiled.positional:
+        params = tuple(params[k] for k in compiled.positiontup)
+    plan = (await conn.exec_driver_sql("EXPLAIN (FORMAT JSON) " + str(compiled), params)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def count_total(db: AsyncSession, stmt, id_col, mode: CountMode) -> Optional[int]:
+    """Total para X-Total-Count según el modo pedido (None = no informar)."""
+    if mode == "none":
+        return None
+    if mode == "estimate":
+        return await _planner_rows(db, stmt.with_only_columns(id_col, maintain_column_froms=True))
+    count_stmt = stmt.with_only_columns(func.count(id_col), maintain_column_froms=True).order_by(None)
+    return (await db.execute(count_stmt)).scalar()
+
+
+def set_total_header(response, total: Optional[int]) -> None:
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
@@ -0,0 +1,88 @@
+# app/partitions.py
+"""
+Particiones mensuales de attendances (RANGE sobre checkin_at, migración b8e4f2a6d913).
+
+Cada mes es una tabla attendances_yYYYYmMM; attendances_default recibe lo que no cae en
+ninguna (check-ins atrasados de una terminal offline, fechas futuras), así un INSERT nunca
+falla por falta de partición. scripts/create_partitions.py crea los meses que vienen
+(correrlo por cron): si el default ya tiene filas de ese mes, se mueven a la partición nueva.
+Las consultas con rango de checkin_at solo leen los meses que tocan (partition pruning).
+"""
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# tabla particionada -> columna de partición
+PARTITIONED = {"attendances": "checkin_at"}
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year}m{month.month:02d}"
+
+
+def existing_partitions(conn: Connection, table: str) -> set[str]:
+    return set(conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = CAST(:t AS regclass)"
+    ), {"t": table}).scalars())
+
+
+def create_month_partition(conn: Connection, table: str, month: date) -> int:
+    """
+    Crea la partición de `month` (si no existe) y devuelve cuántas filas trajo del default.
+    Bloquea la tabla mientras mueve filas: pensado para meses que todavía no empezaron.
+    """
+    col = PARTITIONED[table]
+    name = partition_name(table, month)
+    if name in existing_partitions(conn, table):
+        return 0
+    start, end = month_start(month), add_months(month, 1)
+    bounds = {"start": start, "end": end}
+
+    # ATTACH valida que el default no tenga filas del rango: primero las movemos
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    moved = conn.execute(text(
+        f"WITH moved AS (DELETE FROM {table}_default WHERE {col} >= :start AND {col} < :end RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ), bounds).rowcount
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    return moved
+
+
+def default_months(conn: Connection, table: str) -> list[date]:
+    """Meses que tienen filas en la partición default (p.ej. datos cargados antes de crear su mes)."""
+    col = PARTITIONED[table]
+    return [d.date() for d in conn.execute(text(
+        f"SELECT DISTINCT date_trunc('month', {col}) FROM {table}_default ORDER BY 1"
+    )).scalars()]
+
+
+def ensure_partitions(conn: Connection, table: str, ahead: int = 3, today: date | None = None,
+                      backfill: bool = False) -> list[tuple[str, int]]:
+    """
+    Particiones del mes actual y los `ahead` siguientes (con backfill, también las de los
+    meses que hoy están en el default): [(nombre, filas movidas)] de las creadas.
+    """
+    first = month_start(today or date.today())
+    months = [add_months(first, n) for n in range(ahead + 1)]
+    if backfill:
+        months = sorted(set(months) | set(default_months(conn, table)))
+    existing = existing_partitions(conn, table)
+    created = []
+    for month in months:
+        if partition_name(table, month) not in existing:
+            created.append((partition_name(table, month), create_month_partition(conn, table, month)))
+    return created
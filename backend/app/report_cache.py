@@ -0,0 +1,163 @@
+# app/report_cache.py
+"""
+Cache en memoria (por proceso) de las respuestas de los reportes.
+
+Clave: endpoint + query params normalizados + versiones (table_versions, las mismas del
+ETag) de las tablas del dominio. LRU con tope de entradas y TTL; los rangos que terminan
+antes del mes en curso ("períodos cerrados") no vencen por tiempo
+(REPORT_CACHE_CLOSED_TTL_SECONDS=0).
+
+Cada worker tiene su cache, pero cualquier escritura (otro worker, un script, SQL a mano)
+sube la versión de la tabla y cambia la clave: la entrada vieja ya no se lee y sale por
+LRU. touch() además la saca enseguida en el worker que atendió la escritura, solo si su
+rango incluye el día tocado.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Optional
+
+from .config import settings
+from .etag import table_versions
+
+# Tablas de las que depende cada dominio (sus rollups se recalculan a partir de ellas)
+DOMAINS = {"payments": ("payments",), "attendance": ("attendances",), "clients": ("clients",)}
+
+
+@dataclass
+class _Entry:
+    value: Any
+    domain: str
+    start: date
+    end: date
+    expires_at: Optional[float]  # None = no vence por tiempo
+
+
+def _is_closed(end: date) -> bool:
+    today = datetime.utcnow().date()
+    return end < today.replace(day=1)
+
+
+def _norm(v):
+    if isinstance(v, (date, datetime)):
+        return v.isoformat()
+    if hasattr(v, "value"):  # enums
+        return v.value
+    return v
+
+
+class ReportCache:
+    def __init__(self, max_entries: int, ttl: float, closed_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.closed_ttl = closed_ttl
+        self._lock = threading.Lock()
+        self._items: OrderedDict[tuple, _Entry] = OrderedDict()
+        self.hits: dict[str, int] = {}
+        self.misses: dict[str, int] = {}
+        self.invalidations = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(endpoint: str, params: dict) -> tuple:
+        return (endpoint, tuple(sorted((k, _norm(v)) for k, v in params.items() if v is not None)))
+
+    def get(self, key: tuple):
+        endpoint = key[0]
+        with self._lock:
+            e = self._items.get(key)
+            if e is not None and (e.expires_at is None or e.expires_at > time.monotonic()):
+                self._items.move_to_end(key)
+                self.hits[endpoint] = self.hits.get(endpoint, 0) + 1
+                return e.value
+            if e is not None:
+                del self._items[key]
+            self.misses[endpoint] = self.misses.get(endpoint, 0) + 1
+            return None
+
+    def put(self, key: tuple, value, domain: str, start: date, end: date) -> None:
+        if self.max_entries <= 0:
+            return
+        ttl = self.closed_ttl if _is_closed(end) else self.ttl
+        expires_at = time.monotonic() + ttl if ttl > 0 else None
+        if expires_at is None and not _is_closed(end):
+            return  # TTL 0 para rangos abiertos = no cachearlos
+        with self._lock:
+            self._items[key] = _Entry(value, domain, start, end, expires_at)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, domain: str, day: Optional[date] = None) -> None:
+        """Saca las entradas de `domain` cuyo rango incluye `day` (None = todas las del dominio)."""
+        with self._lock:
+            stale = [
+                k for k, e in self._items.items()
+                if e.domain == domain and (day is None or e.start <= day <= e.end)
+            ]
+            for k in stale:
+                del self._items[k]
+            self.invalidations += len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "entries": len(self._items),
+                "max_entries": self.max_entries,
+                "hits": hits,
+                "misses": misses,
+                "hit_ratio": round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+                "by_endpoint": {
+                    ep: {"hits": self.hits.get(ep, 0), "misses": self.misses.get(ep, 0)}
+                    for ep in sorted(set(self.hits) | set(self.misses))
+                },
+            }
+
+
+report_cache = ReportCache(
+    max_entries=settings.REPORT_CACHE_MAX_ENTRIES,
+    ttl=settings.REPORT_CACHE_TTL_SECONDS,
+    closed_ttl=settings.REPORT_CACHE_CLOSED_TTL_SECONDS,
+)
+
+
+def cached_report(endpoint: str, domain: str):
+    """
+    Decorador para endpoints de reporte con params `start`/`end` (date) y `db`. La clave usa
+    todos los kwargs salvo `db` y los que empiezan con "_" (dependencias), más las versiones
+    de las tablas del dominio.
+    Va debajo de @router.get: FastAPI lee la firma original vía functools.wraps.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        async def wrapper(**kwargs):
+            params = {k: v for k, v in kwargs.items() if k != "db" and not k.startswith("_")}
+            versions = await table_versions(kwargs["db"], DOMAINS[domain])
+            params["_versions"] = tuple(sorted(versions.items()))
+            key = report_cache.key(endpoint, params)
+            hit = report_cache.get(key)
+            if hit is not None:
+                return hit
+            value = await fn(**kwargs)
+            report_cache.put(key, value, domain, kwargs["start"], kwargs["end"])
+            return value
+        return wrapper
+    return deco
+
+
+def touch(domain: str, when: Optional[datetime | date]) -> None:
+    """Invalidación tras una escritura: `when` es el timestamp de la fila tocada."""
+    if when is None:
+        return
+    report_cache.invalidate(domain, when.date() if isinstance(when, datetime) else when)
@@ -0,0 +1,221 @@
+# app/rollups.py
+"""
+Rollups de reportes: conteos/sumas por día (y por mes para pagos) que se mantienen
+de forma incremental en la misma transacción que el alta/baja, así los reportes
+leen unas pocas filas en vez de agrupar la tabla cruda.
+
+Cada fila lleva dos claves de día: `day`, la fecha del timestamp guardado (UTC, la que
+usan los filtros start/end y los reportes de /payments/reports), y `local_day`, el día en
+la zona del gimnasio con el que /reports/* arma sus buckets. Un mismo día UTC se reparte
+en a lo sumo dos días locales, así que ambos reportes salen exactos de la misma tabla.
+
+Las funciones *_changes devuelven sentencias (upserts con deltas) para ejecutar con la
+sesión del request; rebuild_statements() las recalcula desde cero
+(scripts/rebuild_rollups.py). Cualquier carga que escriba directo en las tablas
+(seeds, SQL a mano) tiene que terminar con un rebuild; el rebuild sube además las
+versiones de las tablas base, de las que dependen los ETags y el cache de reportes.
+"""
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import select, delete, func, cast, literal_column, Date, DateTime, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+P_DAY, P_MONTH = models.PaymentDailyRollup, models.PaymentMonthlyRollup
+A_DAY, C_DAY = models.AttendanceDailyRollup, models.ClientDailyRollup
+
+GYM_TZ = "America/Argentina/Buenos_Aires"
+_GYM_ZONE = ZoneInfo(GYM_TZ)
+
+
+def _upsert(model, keys: dict, deltas: dict):
+    stmt = pg_insert(model).values(**keys, **deltas)
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={k: model.__table__.c[k] + stmt.excluded[k] for k in deltas},
+    )
+
+
+def _upsert_select(model, key_cols: list[str], delta_cols: list[str], sel):
+    # Igual que _upsert pero con los deltas calculados por un SELECT (p.ej. restar todo un cliente)
+    stmt = pg_insert(model).from_select(key_cols + delta_cols, sel)
+    return stmt.on_conflict_do_update(
+        index_elements=key_cols,
+        set_={k: model.__table__.c[k] + stmt.excluded[k] for k in delta_cols},
+    )
+
+
+BUCKETS = ("day", "week", "month")
+
+
+def _trunc(unit: str, col):
+    # La unidad va como literal SQL, no como parámetro: así el mismo date_trunc del
+    # SELECT y del GROUP BY es idéntico para Postgres (con parámetros serían $1 y $2)
+    if unit not in BUCKETS:
+        raise ValueError(f"invalid bucket: {unit}")
+    return func.date_trunc(literal_column(f"'{unit}'"), col)
+
+
+def _month(col):
+    return cast(_trunc("month", col), Date)
+
+
+# ---------- día local ----------
+# Mismo cálculo que hacían los reportes de /reports/* sobre la tabla cruda:
+# date_trunc(..., timezone(GYM_TZ, col)) con la sesión en UTC. Las zonas van como literal
+# por lo mismo que en _trunc (el GROUP BY tiene que repetir la expresión exacta).
+def _local(col):
+    return func.timezone(literal_column("'UTC'"), func.timezone(literal_column(f"'{GYM_TZ}'"), col))
+
+
+def _day_cols(col) -> list:
+    return [cast(col, Date), cast(_local(col), Date)]
+
+
+def _month_cols(col) -> list:
+    return [_month(col), _month(_local(col))]
+
+
+def day_keys(ts: datetime) -> tuple[date, date]:
+    """(day, local_day) de un timestamp guardado (naive, UTC)."""
+    local = ts.replace(tzinfo=_GYM_ZONE).astimezone(timezone.utc)
+    return ts.date(), local.date()
+
+
+# ---------- mantenimiento incremental ----------
+def payment_changes(p: models.Payment, sign: int = 1) -> list:
+    """sign=1 al crear el pago, -1 al borrarlo."""
+    if p.created_at is None:
+        return []
+    d, ld = day_keys(p.created_at)
+    keys = {"method": p.method, "method_channel": p.method_channel or ""}
+    deltas = {"n_payments": sign, "amount_sum": sign * Decimal(p.amount)}
+    return [
+        _upsert(P_DAY, {"day": d, "local_day": ld, **keys}, deltas),
+        _upsert(P_MONTH, {"month": d.replace(day=1), "local_month": ld.replace(day=1), **keys}, deltas),
+    ]
+
+
+def checkin_changes(checkin_at: datetime, n: int = 1) -> list:
+    return checkin_day_changes({day_keys(checkin_at): n})
+
+
+def checkin_day_changes(per_day: dict) -> list:
+    """per_day: {(day, local_day): n}, p.ej. un Counter de day_keys() de un lote."""
+    return [_upsert(A_DAY, {"day": d, "local_day": ld}, {"n_checkins": n}) for (d, ld), n in per_day.items()]
+
+
+def new_client_changes(join_date: Optional[datetime], n: int = 1) -> list:
+    if join_date is None:
+        return []  # sin fecha de alta: tampoco aparece en el reporte crudo
+    d, ld = day_keys(join_date)
+    return [_upsert(C_DAY, {"day": d, "local_day": ld}, {"n_new": n})]
+
+
+def payment_rows_changes(where, sign: int = 1) -> list:
+    """
+    Como payment_changes pero para todos los pagos que cumplen `where` (ya en la tabla):
+    sign=1 después de insertarlos/actualizarlos, -1 antes de borrarlos/modificarlos.
+    """
+    P = models.Payment
+    channel = func.coalesce(P.method_channel, "")
+    days, months = _day_cols(P.created_at) + [P.method, channel], _month_cols(P.created_at) + [P.method, channel]
+    sign = literal_column(str(int(sign)))  # literal: el tipo del producto lo decide Postgres
+    return [
+        _upsert_select(
+            P_DAY, ["day", "local_day", "method", "method_channel"], ["n_payments", "amount_sum"],
+            select(*days, sign * func.count(), sign * func.sum(P.amount))
+            .where(where, P.created_at.is_not(None)).group_by(*days),
+        ),
+        _upsert_select(
+            P_MONTH, ["month", "local_month", "method", "method_channel"], ["n_payments", "amount_sum"],
+            select(*months, sign * func.count(), sign * func.sum(P.amount))
+            .where(where, P.created_at.is_not(None)).group_by(*months),
+        ),
+    ]
+
+
+def client_removal_changes(client: models.Client) -> list:
+    """
+    Borrar un cliente borra en cascada sus pagos y asistencias: restamos todo lo suyo.
+    Ejecutar ANTES del DELETE (lee las filas que se van a ir).
+    """
+    A = models.Attendance
+    days = _day_cols(A.checkin_at)
+    stmts = payment_rows_changes(models.Payment.client_id == client.id, -1) + [
+        _upsert_select(
+            A_DAY, ["day", "local_day"], ["n_checkins"],
+            select(*days, -func.count()).where(A.client_id == client.id).group_by(*days),
+        ),
+    ]
+    return stmts + new_client_changes(client.join_date, -1)
+
+
+async def apply(db: AsyncSession, stmts: list) -> None:
+    for stmt in stmts:
+        await db.execute(stmt)
+
+
+# ---------- rebuild completo ----------
+VERSION_SLOTS = 64  # igual que la migración e2b7c4a9d158
+
+
+def rebuild_statements() -> list:
+    P, A, C = models.Payment, models.Attendance, models.Client
+    channel = func.coalesce(P.method_channel, "")
+    pay_cols = ["method", "method_channel", "n_payments", "amount_sum"]
+    pay_days = _day_cols(P.created_at) + [P.method, channel]
+    pay_months = _month_cols(P.created_at) + [P.method, channel]
+    return [
+        delete(P_DAY), delete(P_MONTH), delete(A_DAY), delete(C_DAY),
+        insert(P_DAY).from_select(
+            ["day", "local_day"] + pay_cols,
+            select(*pay_days, func.count(), func.sum(P.amount))
+            .where(P.created_at.is_not(None))
+            .group_by(*pay_days),
+        ),
+        insert(P_MONTH).from_select(
+            ["month", "local_month"] + pay_cols,
+            select(*pay_months, func.count(), func.sum(P.amount))
+            .where(P.created_at.is_not(None))
+            .group_by(*pay_months),
+        ),
+        insert(A_DAY).from_select(
+            ["day", "local_day", "n_checkins"],
+            select(*_day_cols(A.checkin_at), func.count()).group_by(*_day_cols(A.checkin_at)),
+        ),
+        insert(C_DAY).from_select(
+            ["day", "local_day", "n_new"],
+            select(*_day_cols(C.join_date), func.count())
+            .where(C.join_date.is_not(None))
+            .group_by(*_day_cols(C.join_date)),
+        ),
+        # Los rollups no tienen trigger de table_versions: sin esto la API seguiría
+        # respondiendo 304 / sirviendo del cache los números de antes del rebuild
+        *[_upsert(models.TableVersion, {"table_name": t, "slot": func.pg_backend_pid() % VERSION_SLOTS},
+                  {"version": 1})
+          for t in ("payments", "attendances", "clients")],
+    ]
+
+
+# ---------- lectura ----------
+def payment_source(start: date, end: date, bucket: Optional[str] = None):
+    """
+    (modelo, columna de fecha, columna de fecha local) a usar para un rango de días
+    [start, end]: el rollup mensual si el rango cubre meses completos (y no hace falta
+    más detalle), si no el diario.
+    """
+    whole_months = start.day == 1 and (end + timedelta(days=1)).day == 1
+    if whole_months and bucket in (None, "month"):
+        return P_MONTH, P_MONTH.month, P_MONTH.local_month
+    return P_DAY, P_DAY.day, P_DAY.local_day
+
+
+def bucket_expr(day_col, bucket: str):
+    # date_trunc sobre timestamp (sin zona): week/month se arman sumando días
+    return _trunc(bucket, cast(day_col, DateTime))
@@ -1,93 +1,329 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
-from sqlalchemy.orm import Session, joinedload
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy.orm.attributes import set_committed_value
 from typing import List, Optional
 from .. import models, schemas
-from ..deps import get_db
+from ..config import settings
+from ..deps import get_async_db
 from ..auth import get_current_user, require_role
 from ..models import UserRole
+from ..search import client_search_filter, client_search_rank, client_pattern_filter, like_pattern
+from .. import rollups, client_activity
+from ..report_cache import touch
+from ..etag import etag
+from ..client_index import client_index, MAX_CANDIDATES
 from ..security import optional_bearer
-from sqlalchemy import func, or_
-from datetime import datetime
+from ..export import ExportFormat, export_response
+from ..pagination import (
+    order_clauses, keyset_filter, encode_cursor, decode_cursor, row_values, link,
+    CountMode, count_total, set_total_header,
+)
+from sqlalchemy import select, func, or_, insert, values, column, literal, union_all, true, Integer, String
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from datetime import datetime, timedelta
+from collections import Counter
+import uuid
 
 router = APIRouter(prefix="/attendance", tags=["attendance"], dependencies=[Depends(optional_bearer)])
 
-@router.get("/", response_model=List[schemas.AttendanceOut])
-def list_attendance(
+# id desempata check-ins con el mismo timestamp (necesario para el cursor)
+_SORT_KEYS = [(models.Attendance.checkin_at, "desc"), (models.Attendance.id, "desc")]
+
+
+def _filtered(query, q: Optional[str], client_id: Optional[uuid.UUID], start: Optional[datetime], end: Optional[datetime]):
+    # Filtros compartidos por el listado y el export; con q, query ya tiene que tener el JOIN a clients
+    if client_id:
+        query = query.where(models.Attendance.client_id == client_id)
+    if q:
+        query = query.where(client_search_filter(q))
+    if start:
+        query = query.where(models.Attendance.checkin_at >= start)
+    if end:
+        query = query.where(models.Attendance.checkin_at <= end)
+    return query
+
+
+@router.get("/", response_model=List[schemas.AttendanceOut], dependencies=[Depends(etag("attendances", "clients"))])
+async def list_attendance(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     q: Optional[str] = Query(None, description="nombre, email o teléfono"),
-    client_id: Optional[str] = None,
+    client_id: Optional[uuid.UUID] = None,
     start: Optional[datetime] = None,
     end: Optional[datetime] = None,
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Paginación keyset: vacío para la 1ra página, luego el Link rel=next"),
+    count: CountMode = Query("exact", description="X-Total-Count: exact, estimate (planner) o none (sin conteo)"),
 ):
     query = (
-    db.query(models.Attendance)
+    select(models.Attendance)
       .options(joinedload(models.Attendance.client))  # ✅ relación, no columna
     )
+    if q:
+        query = query.join(models.Attendance.client)
+    query = _filtered(query, q, client_id, start, end)
 
-    if client_id:
-        query = query.filter(models.Attendance.client_id == client_id)
+    total = await count_total(db, query, models.Attendance.id, count)
+    set_total_header(response, total)
 
-    if q:
-        like = f"%{q}%"
-        query = query.join(models.Attendance.client).filter(
-            or_(
-                models.Client.full_name.ilike(like),
-                models.Client.email.ilike(like),
-                models.Client.phone.ilike(like),
-            )
-        )
+    keys = _SORT_KEYS
+    query = query.order_by(*order_clauses(keys))
 
-    if start:
-        query = query.filter(models.Attendance.checkin_at >= start)
-    if end:
-        query = query.filter(models.Attendance.checkin_at <= end)
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Use either offset or cursor, not both")
+        if cursor:
+            query = query.where(keyset_filter(keys, decode_cursor(cursor, "attendance", len(keys))))
+        rows = (await db.execute(query.limit(limit + 1))).scalars().all()
+        items = rows[:limit]
+        if len(rows) > limit:
+            nxt = encode_cursor(row_values(items[-1], ["checkin_at", "id"]), "attendance")
+            params = {
+                "cursor": nxt, "limit": limit, "q": q, "client_id": client_id, "count": count,
+                "start": start.isoformat() if start else None,
+                "end": end.isoformat() if end else None,
+            }
+            response.headers["Link"] = link("/attendance", params, "next")
+        return items
 
-    total = query.with_entities(func.count(models.Attendance.id)).scalar()
-    response.headers["X-Total-Count"] = str(total)
+    return (await db.execute(query.offset(offset).limit(limit))).scalars().all()
 
-    items = (
-        query.order_by(models.Attendance.checkin_at.desc())
-        .offset(offset)
-        .limit(limit)
-        .all()
+@router.get("/export", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def export_attendance(
+    db: AsyncSession = Depends(get_async_db),
+    q: Optional[str] = Query(None, description="nombre, email o teléfono"),
+    client_id: Optional[uuid.UUID] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    format: ExportFormat = Query("csv"),
+):
+    """Todos los check-ins que cumplen los filtros del listado, en el mismo orden, como CSV o NDJSON."""
+    A, C = models.Attendance, models.Client
+    query = _filtered(
+        select(A.id, A.client_id, C.full_name.label("client_name"), A.checkin_at)
+        .join(C, A.client_id == C.id),
+        q, client_id, start, end,
     )
-    return items
+    return export_response(db, query.order_by(*order_clauses(_SORT_KEYS)), format, "attendance")
+
+async def _resolve_q(db: AsyncSession, q: str) -> list:
+    """Candidatos para q (Entry del índice o Client de la base); más de uno = ambiguo."""
+    # 1) índice en memoria (teléfono / email / prefijo de nombre): sin ir a la base
+    await client_index.ensure_loaded()
+    found = client_index.resolve(q)
+    if not found:
+        # 2) no está en el índice (p.ej. alta en otro worker): búsqueda trigram en la base,
+        #    también solo entre activos, como el índice
+        found = (await db.execute(
+            select(models.Client)
+            .where(models.Client.is_active.is_(True), client_search_filter(q))
+            .order_by(client_search_rank(q).desc(), models.Client.full_name.asc())
+            .limit(MAX_CANDIDATES + 1)
+        )).scalars().all()
+    return found
+
+
+async def _resolve_batch(db: AsyncSession, misses: dict[int, str], ids: set) -> tuple[dict[int, list], set]:
+    """
+    Para el lote, en una sola consulta: los candidatos de cada q que no estaba en el índice
+    (misma búsqueda que _resolve_q, con LATERAL por cada q) y cuáles de `ids` existen.
+    Devuelve ({índice del ítem: candidatos en orden}, ids existentes).
+    """
+    C = models.Client
+    parts = []
+    if ids:
+        parts.append(select(literal(-1).label("idx"), literal(0).label("pos"), C.id, C.full_name, C.email, C.phone)
+                     .where(C.id.in_(ids)))
+    if misses:
+        v = values(column("idx", Integer), column("q", String), column("pattern", String), name="v").data(
+            [(i, q.strip(), like_pattern(q.strip())) for i, q in misses.items()])
+        order = (client_search_rank(v.c.q).desc(), C.full_name.asc())
+        top = (select(func.row_number().over(order_by=order).label("pos"), C.id, C.full_name, C.email, C.phone)
+               .where(C.is_active.is_(True), client_pattern_filter(v.c.pattern))
+               .order_by(*order)
+               .limit(MAX_CANDIDATES + 1)
+               .lateral("top"))
+        parts.append(select(v.c.idx, top.c.pos, top.c.id, top.c.full_name, top.c.email, top.c.phone)
+                     .select_from(v.join(top, true())))
+    if not parts:
+        return {}, set()
+    query = union_all(*parts) if len(parts) > 1 else parts[0]
+    found: dict[int, list] = {}
+    existing = set()
+    for r in (await db.execute(query.order_by("idx", "pos"))).all():
+        if r.idx == -1:
+            existing.add(r.id)
+        else:
+            found.setdefault(r.idx, []).append(r)
+    return found, existing
+
 
 # (Opcional) check-in por teléfono/email/nombre
 @router.post("/checkin", response_model=schemas.AttendanceOut, status_code=201,
+             responses={300: {"model": schemas.CheckinAmbiguous, "description": "q coincide con varios clientes"}},
              dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
-def checkin(
+async def checkin(
     payload: schemas.AttendanceCheckinIn,  # definí un schema con: client_id **o** q
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(get_current_user),
 ):
     client = None
     if payload.client_id:
-        client = db.get(models.Client, payload.client_id)
+        client = await db.get(models.Client, payload.client_id)
     elif payload.q:
-        like = f"%{payload.q}%"
-        client = (
-            db.query(models.Client)
-            .filter(
-                or_(
-                    models.Client.full_name.ilike(like),
-                    models.Client.email.ilike(like),
-                    models.Client.phone.ilike(like),
-                )
+        found = await _resolve_q(db, payload.q)
+        if len(found) > 1:
+            # ambiguo: devolvemos candidatos en vez de elegir uno al azar
+            body = schemas.CheckinAmbiguous(
+                detail="Multiple clients match",
+                candidates=[schemas.ClientCandidate.model_validate(c) for c in found[:MAX_CANDIDATES]],
             )
-            .order_by(models.Client.full_name.asc())
-            .first()
-        )
+            return JSONResponse(status_code=status.HTTP_300_MULTIPLE_CHOICES, content=body.model_dump(mode="json"))
+        if found:
+            client = await db.get(models.Client, found[0].id)
     if not client:
         raise HTTPException(404, "Client not found")
 
     a = models.Attendance(
-        client_id=client.id,
+        client=client,
         coach_id=user.id if user.role == models.UserRole.coach else None,
         checkin_at=datetime.utcnow(),
     )
-    db.add(a); db.commit(); db.refresh(a)
-    return a
\ No newline at end of file
+    db.add(a)
+    await rollups.apply(db, rollups.checkin_changes(a.checkin_at)
+                        + client_activity.checkin_added(client.id, a.checkin_at))
+    await db.commit()  # sin refresh: id y checkin_at se generan acá, el cliente ya está cargado
+    # mismo valor que calculó el UPDATE (greatest), sin marcar el objeto como modificado
+    set_committed_value(client, "last_checkin_at", max(client.last_checkin_at or a.checkin_at, a.checkin_at))
+    touch("attendance", a.checkin_at)
+    return a
+
+
+@router.post("/checkin/batch", response_model=schemas.CheckinBatchOut,
+             dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def checkin_batch(
+    payload: schemas.CheckinBatchIn,
+    db: AsyncSession = Depends(get_async_db),
+    user: models.User = Depends(get_current_user),
+):
+    """
+    Check-ins acumulados por una terminal offline. Cada ítem trae client_id o q, la hora real
+    y una idempotency_key: reenviar el mismo ítem devuelve "duplicate" con el check-in original.
+    La clave vale CHECKIN_KEY_RETENTION_DAYS: pasada la ventana se toma como nueva.
+    Resultado por ítem, en el mismo orden; un ítem que falla no frena al resto.
+    """
+    K = models.CheckinIdempotencyKey
+    items = payload.items
+    now = datetime.utcnow()
+    cutoff = now - timedelta(days=settings.CHECKIN_KEY_RETENTION_DAYS)
+    results: list[Optional[dict]] = [None] * len(items)
+
+    def result(i: int, status: str, **extra) -> dict:
+        return {"index": i, "idempotency_key": items[i].idempotency_key, "status": status, **extra}
+
+    def duplicate(i: int, k) -> dict:
+        return result(i, "duplicate", attendance_id=k.attendance_id, client_id=k.client_id, checkin_at=k.checkin_at)
+
+    # 1) Reenvíos: clave ya registrada, o repetida dentro del lote (vale la primera)
+    first: dict[str, int] = {}
+    for i, it in enumerate(items):
+        first.setdefault(it.idempotency_key, i)
+    known = {k.key: k for k in (await db.execute(
+        select(K).where(K.key.in_(list(first)), K.created_at >= cutoff))).scalars()}
+    pending = []
+    for i, it in enumerate(items):
+        if it.idempotency_key in known:
+            results[i] = duplicate(i, known[it.idempotency_key])
+        elif first[it.idempotency_key] == i:
+            pending.append(i)
+
+    # 2) Clientes: q se resuelve con el índice en memoria; lo que no está en el índice y la
+    #    validación de todos los ids van juntos en una consulta
+    await client_index.ensure_loaded()
+    found: dict[int, list] = {}
+    misses: dict[int, str] = {}
+    wanted: dict[int, uuid.UUID] = {}
+    for i in pending:
+        it = items[i]
+        if it.client_id:
+            wanted[i] = it.client_id
+        elif it.q:
+            found[i] = client_index.resolve(it.q)
+            if not found[i]:
+                misses[i] = it.q
+        else:
+            results[i] = result(i, "invalid")
+    ids = set(wanted.values()) | {f[0].id for f in found.values() if len(f) == 1}
+    from_db, existing = await _resolve_batch(db, misses, ids)
+    found.update(from_db)
+    for i, cands in found.items():
+        if len(cands) > 1:
+            results[i] = result(i, "ambiguous", candidates=[
+                schemas.ClientCandidate.model_validate(c) for c in cands[:MAX_CANDIDATES]])
+        elif cands:
+            wanted[i] = cands[0].id
+            if i in from_db:
+                existing.add(cands[0].id)  # recién leído de la base; los del índice se validaron arriba
+    for i in pending:
+        if results[i] is None and wanted.get(i) not in existing:
+            results[i] = result(i, "not_found")
+
+    # 3) Primero las claves: si un reenvío concurrente ya la tomó, este ítem queda como
+    #    duplicate y no se inserta dos veces. Una clave vencida (todavía sin purgar) se pisa
+    rows = [
+        {"key": items[i].idempotency_key, "attendance_id": uuid.uuid4(), "client_id": wanted[i],
+         "checkin_at": items[i].checkin_at or now, "created_at": now, "index": i}
+        for i in pending if results[i] is None
+    ]
+    if rows:
+        claim = pg_insert(K).values([{k: v for k, v in r.items() if k != "index"} for r in rows])
+        won = set((await db.execute(
+            claim.on_conflict_do_update(
+                index_elements=[K.key],
+                set_={c: claim.excluded[c] for c in ("attendance_id", "client_id", "checkin_at", "created_at")},
+                where=K.created_at < cutoff,
+            )
+            .returning(K.key)
+        )).scalars())
+        lost = [r for r in rows if r["key"] not in won]
+        if lost:
+            raced = {k.key: k for k in (await db.execute(
+                select(K).where(K.key.in_([r["key"] for r in lost])))).scalars()}
+            for r in lost:
+                results[r["index"]] = duplicate(r["index"], raced[r["key"]])
+        rows = [r for r in rows if r["key"] in won]
+
+    if rows:
+        coach_id = user.id if user.role == models.UserRole.coach else None
+        await db.execute(insert(models.Attendance).values([
+            {"id": r["attendance_id"], "client_id": r["client_id"], "checkin_at": r["checkin_at"], "coach_id": coach_id}
+            for r in rows
+        ]))
+        per_day = Counter(rollups.day_keys(r["checkin_at"]) for r in rows)
+        await rollups.apply(db, rollups.checkin_day_changes(per_day)
+                            + client_activity.checkins_added([r["attendance_id"] for r in rows]))
+        for r in rows:
+            results[r["index"]] = result(r["index"], "created", attendance_id=r["attendance_id"],
+                                         client_id=r["client_id"], checkin_at=r["checkin_at"])
+    await db.commit()
+    for day in {r["checkin_at"].date() for r in rows}:
+        touch("attendance", day)
+
+    # Repetidos dentro del lote: mismo resultado que el primero con esa clave
+    for i, it in enumerate(items):
+        if results[i] is None:
+            r = dict(results[first[it.idempotency_key]], index=i)
+            if r["status"] == "created":
+                r["status"] = "duplicate"
+            results[i] = r
+
+    statuses = [r["status"] for r in results]
+    return {
+        "created": statuses.count("created"),
+        "duplicates": statuses.count("duplicate"),
+        "failed": sum(s not in ("created", "duplicate") for s in statuses),
+        "results": results,
+    }
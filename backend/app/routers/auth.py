@@ -1,7 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.security import OAuth2PasswordRequestForm
-from ..deps import get_db
+from starlette.concurrency import run_in_threadpool
+from ..deps import get_async_db
 from ..security import optional_bearer
 from .. import models
 from ..auth import verify_password, create_access_token
@@ -9,12 +11,13 @@ from ..auth import verify_password, create_access_token
 router = APIRouter(prefix="/auth", tags=["auth"], dependencies=[Depends(optional_bearer)])
 
 @router.post("/token")
-def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    user = db.query(models.User).filter(models.User.email == form.username).first()
-    if not user or not verify_password(form.password, user.password_hash):
+async def login(form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    user = (await db.execute(select(models.User).where(models.User.email == form.username))).scalars().first()
+    # bcrypt es CPU puro (~cientos de ms): fuera del event loop
+    if not user or not await run_in_threadpool(verify_password, form.password, user.password_hash):
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     token = create_access_token({
-        "sub": user.id, 
+        "sub": str(user.id),
         "name": user.full_name, 
         "email": user.email, 
         "role": user.role
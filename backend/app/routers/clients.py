@@ -1,15 +1,29 @@
+import uuid
 from fastapi import APIRouter, HTTPException, Depends, Query, status, Request, Response
-from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional, Literal, Annotated
-from sqlalchemy import or_, func
-from pydantic import Field
+from datetime import datetime
+from sqlalchemy import select, or_, and_, func, text, false
+from pydantic import Field, ValidationError
 
 from ..security import optional_bearer
 from .. import models, schemas
-from ..deps import get_db
+from ..deps import get_async_db
 from ..auth import get_current_user, require_role
 from ..models import UserRole
+from ..search import client_search_filter, client_search_rank
+from ..client_index import client_index, norm_phone
+from .. import rollups
+from ..report_cache import report_cache, touch
+from ..etag import etag
+from ..utils import current_period
+from ..export import ExportFormat, export_response
+from .. import bulk
+from ..pagination import (
+    order_clauses, keyset_filter, encode_cursor, decode_cursor, row_values, link,
+    CountMode, count_total, set_total_header,
+)
 
 router = APIRouter(
     prefix="/clients",
@@ -17,67 +31,195 @@ router = APIRouter(
     dependencies=[Depends(optional_bearer)] # Permite acceso público para listar clientes (con paginación y búsqueda básica)
 )
 
-@router.get("/", response_model=List[schemas.ClientOut])
-def list_clients(
+# Columnas permitidas para ORDER BY (last_payment ordena por año y mes)
+ORDER_MAP = {
+    "full_name":    [models.Client.full_name],
+    "join_date":    [models.Client.join_date],
+    "email":        [models.Client.email],
+    "is_active":    [models.Client.is_active],
+    "last_payment": [models.Client.last_paid_year, models.Client.last_paid_month],
+    "last_checkin": [models.Client.last_checkin_at],
+}
+OrderBy = Literal["full_name", "join_date", "email", "is_active", "last_payment", "last_checkin", "relevance"]
+
+
+def _sort_keys(q: Optional[str], order_by: Optional[str], order_dir: str):
+    """(order_by efectivo, claves de orden, expresión de ranking o None). Listado y export."""
+    if not order_by or (order_by == "relevance" and not q):
+        order_by = "relevance" if q else "full_name"
+    if order_by == "relevance":
+        # Más similares primero (pg_trgm); order_dir no aplica
+        rank = client_search_rank(q)
+        return order_by, [(rank, "desc"), (models.Client.full_name, "asc"), (models.Client.id, "asc")], rank
+    sort_cols = ORDER_MAP.get(order_by, ORDER_MAP["full_name"])
+    # id como desempate: orden total, necesario para el cursor
+    return order_by, [(c, order_dir) for c in sort_cols] + [(models.Client.id, order_dir)], None
+
+
+@router.get("/", response_model=List[schemas.ClientOut], dependencies=[Depends(etag("clients"))])
+async def list_clients(
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     q: Optional[str] = Query(None, description="Busca por nombre, email o teléfono"),
     limit: Annotated[int, Field(ge=1, le=200)] = 50,
     offset: Annotated[int, Field(ge=0)] = 0,
-    order_by: Literal["full_name", "join_date", "email", "is_active"] = "full_name",
+    order_by: Optional[OrderBy] = Query(None, description="Por defecto: relevance si hay q, si no full_name"),
     order_dir: Literal["asc", "desc"] = "asc",
+    cursor: Optional[str] = Query(None, description="Paginación keyset: vacío para la 1ra página, luego el Link rel=next"),
+    count: CountMode = Query("exact", description="X-Total-Count: exact, estimate (planner) o none (sin conteo)"),
 ):
     # 1) Base query + búsqueda
-    query = db.query(models.Client)
+    query = select(models.Client)
     if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.Client.full_name.ilike(like),
-                models.Client.email.ilike(like),
-                models.Client.phone.ilike(like),
-            )
-        )
-
-    # 2) Conteo total (para X-Total-Count)
-    total = query.with_entities(func.count(models.Client.id)).scalar()
-    response.headers["X-Total-Count"] = str(total)
-
-    # 3) Mapeo de columnas permitidas para ORDER BY
-    ORDER_MAP = {
-        "full_name": models.Client.full_name,
-        "join_date": models.Client.join_date,
-        "email":     models.Client.email,
-        "is_active": models.Client.is_active,
-    }
-    sort_col = ORDER_MAP.get(order_by, models.Client.full_name)
-    sort_expr = sort_col.desc() if order_dir == "desc" else sort_col.asc()
-
-    # 4) Paginación
-    items = (
-        query.order_by(sort_expr)
-             .offset(offset)
-             .limit(limit)
-             .all()
-    )
+        query = query.where(client_search_filter(q))
+
+    # 2) Conteo total (para X-Total-Count), según el modo pedido
+    total = await count_total(db, query, models.Client.id, count)
+    set_total_header(response, total)
+
+    # 3) Orden
+    order_by, keys, rank = _sort_keys(q, order_by, order_dir)
+    if rank is not None:
+        query = query.add_columns(rank)
+    query = query.order_by(*order_clauses(keys))
+
+    # 4) Paginación: keyset (cursor) u offset
+    tag = f"clients:{order_by}:{order_dir}"
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Use either offset or cursor, not both")
+        if cursor:
+            query = query.where(keyset_filter(keys, decode_cursor(cursor, tag, len(keys))))
+        query = query.limit(limit + 1)
+    else:
+        query = query.offset(offset).limit(limit + 1)
+    result = await db.execute(query)
+    rows = result.all() if rank is not None else result.scalars().all()
+    # una fila de más indica si hay página siguiente (sin depender del total)
+    page, has_more = rows[:limit], len(rows) > limit
+    items = [r[0] for r in page] if rank is not None else page
 
     # 5) Links de paginación (Link header)
     base = "/clients"
     links = []
-    if offset + limit < (total or 0):
-        links.append(f'<{base}?offset={offset+limit}&limit={limit}&order_by={order_by}&order_dir={order_dir}{"&q="+q if q else ""}>; rel="next"')
-    if offset > 0:
-        prev_offset = max(0, offset - limit)
-        links.append(f'<{base}?offset={prev_offset}&limit={limit}&order_by={order_by}&order_dir={order_dir}{"&q="+q if q else ""}>; rel="prev"')
+    if cursor is not None:
+        if has_more:
+            if rank is not None:
+                last = [page[-1][1], items[-1].full_name, items[-1].id]
+            else:
+                last = row_values(items[-1], [c.key for c, _ in keys])
+            nxt = encode_cursor(last, tag)
+            links.append(link(base, {"cursor": nxt, "limit": limit, "order_by": order_by, "order_dir": order_dir, "q": q, "count": count}, "next"))
+    else:
+        if has_more:
+            links.append(f'<{base}?offset={offset+limit}&limit={limit}&order_by={order_by}&order_dir={order_dir}{"&q="+q if q else ""}{"&count="+count if count != "exact" else ""}>; rel="next"')
+        if offset > 0:
+            prev_offset = max(0, offset - limit)
+            links.append(f'<{base}?offset={prev_offset}&limit={limit}&order_by={order_by}&order_dir={order_dir}{"&q="+q if q else ""}{"&count="+count if count != "exact" else ""}>; rel="prev"')
     if links:
         response.headers["Link"] = ", ".join(links)
 
     return items
 
 
-@router.get("/{client_id}", response_model=schemas.ClientOut, name="clients:get_one")
-def get_client(client_id: str, db: Session = Depends(get_db)):
-    obj = db.get(models.Client, client_id)
+@router.get("/export", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def export_clients(
+    db: AsyncSession = Depends(get_async_db),
+    q: Optional[str] = Query(None, description="Busca por nombre, email o teléfono"),
+    order_by: Optional[OrderBy] = Query(None, description="Por defecto: relevance si hay q, si no full_name"),
+    order_dir: Literal["asc", "desc"] = "asc",
+    format: ExportFormat = Query("csv"),
+):
+    """Todos los clientes que cumplen los filtros del listado, en el mismo orden, como CSV o NDJSON."""
+    C = models.Client
+    query = select(C.id, C.full_name, C.email, C.phone, C.is_active, C.join_date,
+                   C.last_paid_year, C.last_paid_month, C.last_checkin_at)
+    if q:
+        query = query.where(client_search_filter(q))
+    _, keys, _ = _sort_keys(q, order_by, order_dir)
+    return export_response(db, query.order_by(*order_clauses(keys)), format, "clients")
+
+
+def _paid_current(up_to_date: bool):
+    # last_paid_year/month (mantenidas en cada pago) contra el período actual. Año y mes por
+    # separado en vez de (año, mes) >= (a, m): el planner estima mal la comparación de filas
+    # y recorría toda la tabla en vez de ix_clients_last_paid
+    C = models.Client
+    cur_m, cur_y = current_period()
+    if up_to_date:
+        return or_(C.last_paid_year > cur_y, and_(C.last_paid_year == cur_y, C.last_paid_month >= cur_m))
+    return or_(C.last_paid_year.is_(None), C.last_paid_year < cur_y,
+               and_(C.last_paid_year == cur_y, C.last_paid_month < cur_m))
+
+
+def _status_columns() -> list:
+    # columnas con los nombres de schemas.ClientStatus
+    C = models.Client
+    return [
+        C.id.label("client_id"),
+        C.full_name,
+        func.coalesce(_paid_current(True), false()).label("is_up_to_date"),
+        C.last_paid_month.label("last_payment_month"),
+        C.last_paid_year.label("last_payment_year"),
+    ]
+
+
+_STATUS_KEYS = [(models.Client.full_name, "asc"), (models.Client.id, "asc")]
+
+
+# is_up_to_date depende del mes en curso: sin el período en el ETag, al cambiar de mes
+# un cliente con la versión vieja recibiría 304 con el estado del mes anterior
+_status_etag = etag("clients", key=current_period)
+
+
+@router.get("/status", response_model=List[schemas.ClientStatus],
+            dependencies=[Depends(_status_etag)])
+async def list_client_status(
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    q: Optional[str] = Query(None, description="Busca por nombre, email o teléfono"),
+    is_active: Optional[bool] = None,
+    up_to_date: Optional[bool] = Query(None, description="false = solo los que deben la cuota del mes"),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Paginación keyset: vacío para la 1ra página, luego el Link rel=next"),
+    count: CountMode = Query("exact", description="X-Total-Count: exact, estimate (planner) o none (sin conteo)"),
+):
+    """Estado de cuota de todos los clientes (orden por nombre) en una consulta, sin N+1."""
+    C = models.Client
+    query = select(*_status_columns())
+    if q:
+        query = query.where(client_search_filter(q))
+    if is_active is not None:
+        query = query.where(C.is_active == is_active)
+    if up_to_date is not None:
+        query = query.where(_paid_current(up_to_date))
+
+    total = await count_total(db, query, C.id, count)
+    set_total_header(response, total)
+    query = query.order_by(*order_clauses(_STATUS_KEYS))
+
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Use either offset or cursor, not both")
+        if cursor:
+            query = query.where(keyset_filter(_STATUS_KEYS, decode_cursor(cursor, "clients:status", len(_STATUS_KEYS))))
+        rows = (await db.execute(query.limit(limit + 1))).all()
+        items = rows[:limit]
+        if len(rows) > limit:
+            nxt = encode_cursor([items[-1].full_name, items[-1].client_id], "clients:status")
+            params = {"cursor": nxt, "limit": limit, "q": q, "is_active": is_active,
+                      "up_to_date": up_to_date, "count": count}
+            response.headers["Link"] = link("/clients/status", params, "next")
+        return items
+
+    return (await db.execute(query.offset(offset).limit(limit))).all()
+
+
+@router.get("/{client_id}", response_model=schemas.ClientOut, name="clients:get_one",
+            dependencies=[Depends(etag("clients"))])
+async def get_client(client_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Client, client_id)
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Client not found")
     return obj
@@ -88,39 +230,219 @@ def get_client(client_id: str, db: Session = Depends(get_db)):
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))]
 )
-def create_client(
+async def create_client(
     payload: schemas.ClientCreate,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: models.User = Depends(get_current_user),
 ):
-    obj = models.Client(**payload.model_dump(), created_by_user_id=current_user.id)
+    # join_date explícito (en vez del default del modelo): el rollup de altas necesita el día
+    obj = models.Client(**payload.model_dump(), join_date=datetime.utcnow(), created_by_user_id=current_user.id)
     db.add(obj)
-    db.commit()          # si salta IntegrityError, la captura el handler global y get_db hace rollback
-    db.refresh(obj)
+    await rollups.apply(db, rollups.new_client_changes(obj.join_date))
+    await db.commit()    # si salta IntegrityError, la captura el handler global y get_async_db hace rollback
+    client_index.upsert(obj)
+    touch("clients", obj.join_date)
 
     location = request.url_for("clients:get_one", client_id=obj.id)
     response.headers["Location"] = str(location)
     return schemas.ClientOut.model_validate(obj)
 
 
+# ---------- importación masiva ----------
+_UPSERT_BATCH = 1000
+
+# Un lote = una sentencia. Cada fila busca su cliente por email (sin mayúsculas) y, si no,
+# por teléfono (solo dígitos), usando los índices ix_clients_email_lower / ix_clients_phone_digits.
+# Encontrado: se actualiza (campos vacíos o ausentes no pisan los guardados); si no, se crea.
+# Dos filas del lote que encuentran al mismo cliente por claves distintas (una por email, otra
+# por teléfono) se unifican como en _Batch: la última línea gana campo a campo, las otras
+# quedan "merged".
+_UPSERT_SQL = text("""
+WITH input AS (
+    SELECT * FROM unnest(
+        CAST(:line AS integer[]), CAST(:id AS uuid[]), CAST(:full_name AS varchar[]),
+        CAST(:email AS varchar[]), CAST(:phone AS varchar[]), CAST(:is_active AS boolean[])
+    ) AS t(line, id, full_name, email, phone, is_active)
+),
+matched AS (
+    -- min() y no ORDER BY ... LIMIT 1: con LIMIT el planner prefiere recorrer otro índice en orden.
+    -- uuid no tiene min(): se compara como texto (mismo orden que el uuid)
+    SELECT i.*, CAST(coalesce(
+        (SELECT min(CAST(c.id AS text)) FROM clients c WHERE i.email IS NOT NULL AND lower(c.email) = lower(i.email)),
+        (SELECT min(CAST(c.id AS text)) FROM clients c
+          WHERE i.phone IS NOT NULL
+            AND regexp_replace(c.phone, '[^0-9]', '', 'g') = regexp_replace(i.phone, '[^0-9]', '', 'g'))
+    ) AS uuid) AS existing_id
+    FROM input i
+),
+grouped AS (
+    -- el marco va de la última línea a la primera: [1] es el último valor no nulo del grupo
+    SELECT m.line, m.id, m.existing_id, m.full_name, max(m.line) OVER g AS into_line,
+           (array_agg(m.email) FILTER (WHERE m.email IS NOT NULL) OVER g)[1] AS email,
+           (array_agg(m.phone) FILTER (WHERE m.phone IS NOT NULL) OVER g)[1] AS phone,
+           (array_agg(m.is_active) FILTER (WHERE m.is_active IS NOT NULL) OVER g)[1] AS is_active
+      FROM matched m
+    WINDOW g AS (PARTITION BY coalesce(m.existing_id, m.id) ORDER BY m.line DESC
+                 ROWS BETWEEN UNBOUNDED PRECEDING AND UNBOUNDED FOLLOWING)
+),
+winners AS (
+    SELECT * FROM grouped WHERE line = into_line
+),
+upd AS (
+    UPDATE clients c
+       SET full_name = w.full_name, email = coalesce(w.email, c.email),
+           phone = coalesce(w.phone, c.phone), is_active = coalesce(w.is_active, c.is_active)
+      FROM winners w
+     WHERE c.id = w.existing_id
+    RETURNING c.id, c.full_name, c.email, c.phone, c.is_active
+),
+ins AS (
+    INSERT INTO clients (id, full_name, email, phone, is_active, join_date, created_by_user_id)
+    SELECT id, full_name, email, phone, coalesce(is_active, true), CAST(:now AS timestamp), CAST(:user_id AS uuid)
+      FROM winners WHERE existing_id IS NULL
+    RETURNING id, full_name, email, phone, is_active
+)
+SELECT g.line, g.into_line, coalesce(g.existing_id, g.id) AS id,
+       CASE WHEN g.line <> g.into_line THEN 'merged'
+            WHEN g.existing_id IS NULL THEN 'created' ELSE 'updated' END AS status,
+       coalesce(u.full_name, n.full_name) AS full_name, coalesce(u.email, n.email) AS email,
+       coalesce(u.phone, n.phone) AS phone, coalesce(u.is_active, n.is_active) AS is_active
+  FROM grouped g
+  LEFT JOIN upd u ON u.id = g.existing_id AND g.line = g.into_line
+  LEFT JOIN ins n ON n.id = g.id
+ ORDER BY g.line
+""")
+
+
+def _dedupe_keys(row: dict) -> set[tuple[str, str]]:
+    keys = set()
+    if row.get("email"):
+        keys.add(("email", row["email"].strip().lower()))
+    if row.get("phone") and norm_phone(row["phone"]):
+        keys.add(("phone", norm_phone(row["phone"])))
+    return keys
+
+
+class _Batch:
+    """Filas pendientes de un lote, ya unificadas por email/teléfono (la última gana campo a campo)."""
+
+    def __init__(self):
+        self.rows: dict[int, dict] = {}
+        self._by_key: dict[tuple[str, str], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add(self, line: int, row: dict) -> list[int]:
+        """Agrega la fila; devuelve las líneas anteriores que quedaron fusionadas en ella."""
+        keys = _dedupe_keys(row)
+        merged = sorted({self._by_key[k] for k in keys if k in self._by_key})
+        for prev in merged:
+            old = self.rows.pop(prev)
+            row = {**old, **{k: v for k, v in row.items() if v is not None}}  # solo campos enviados
+            keys |= _dedupe_keys(old)
+        self.rows[line] = row
+        for k in keys:
+            self._by_key[k] = line
+        return merged
+
+    def clear(self) -> None:
+        self.rows.clear()
+        self._by_key.clear()
+
+
+async def _flush(db: AsyncSession, batch: _Batch, out, counts: dict, user_id: uuid.UUID) -> None:
+    now = datetime.utcnow()
+    lines = list(batch.rows)
+    rows = [batch.rows[n] for n in lines]
+    result = (await db.execute(_UPSERT_SQL, {
+        "line": lines,
+        "id": [uuid.uuid4() for _ in rows],
+        "full_name": [r["full_name"] for r in rows],
+        "email": [r.get("email") for r in rows],
+        "phone": [r.get("phone") for r in rows],
+        "is_active": [r.get("is_active") for r in rows],  # None: queda el guardado (alta: activo)
+        "now": now,
+        "user_id": user_id,
+    })).all()
+    n_created = sum(1 for r in result if r.status == "created")
+    await rollups.apply(db, rollups.new_client_changes(now, n_created) if n_created else [])
+    await db.commit()  # un commit por lote: lo ya confirmado queda aunque falle un lote posterior
+
+    for r in result:
+        counts[r.status] += 1
+        if r.status == "merged":
+            bulk.write(out, {"line": r.line, "status": "merged", "into_line": r.into_line})
+            continue
+        bulk.write(out, {"line": r.line, "id": r.id, "status": r.status})
+        client_index.upsert(models.Client(
+            id=r.id, full_name=r.full_name, email=r.email, phone=r.phone, is_active=r.is_active))
+    if n_created:
+        touch("clients", now)
+    batch.clear()
+
+
+@router.post("/bulk", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def bulk_clients(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: models.User = Depends(get_current_user),
+):
+    """
+    Alta/actualización masiva: body CSV (con encabezado) o NDJSON con los campos de
+    ClientCreate. Deduplica por email o teléfono normalizados, contra la base y dentro del
+    archivo; en un cliente existente los campos ausentes quedan como estaban. Responde NDJSON: {"line", "id", "status": created|updated}, {"line", "status":
+    "merged", "into_line"} para filas unificadas con una posterior, {"line", "error"} y al
+    final {"summary": {...}}. Los resultados se acumulan en un archivo temporal, no en memoria.
+    """
+    fmt = bulk.record_format(request)
+    out = bulk.spool()
+    counts = {"created": 0, "updated": 0, "merged": 0, "errors": 0}
+    batch = _Batch()
+    try:
+        async for line, rec, err in bulk.read_records(request, fmt):
+            if err is None:
+                try:
+                    rec = schemas.ClientCreate.model_validate(rec).model_dump(exclude_unset=True)
+                except ValidationError as e:
+                    err = bulk.validation_message(e)
+            if err:
+                counts["errors"] += 1
+                bulk.write(out, {"line": line, "error": err})
+                continue
+            for prev in batch.add(line, rec):
+                counts["merged"] += 1
+                bulk.write(out, {"line": prev, "status": "merged", "into_line": line})
+            if len(batch) >= _UPSERT_BATCH:
+                await _flush(db, batch, out, counts, current_user.id)
+        if len(batch):
+            await _flush(db, batch, out, counts, current_user.id)
+    except BaseException:
+        out.close()
+        raise
+
+    bulk.write(out, {"summary": counts})
+    return StreamingResponse(bulk.drain(out), media_type=bulk.NDJSON)
+
+
 @router.patch(
     "/{client_id}",
     response_model=schemas.ClientOut,
     status_code=status.HTTP_200_OK,
     dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))]
 )
-def update_client(client_id: str, payload: schemas.ClientUpdate, db: Session = Depends(get_db)):
-    obj = db.get(models.Client, client_id)
+async def update_client(client_id: uuid.UUID, payload: schemas.ClientUpdate, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Client, client_id)
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Client not found")
 
     for k, v in payload.model_dump(exclude_unset=True).items():
         setattr(obj, k, v)
 
-    db.commit()   # IntegrityError -> handler global (409), rollback automático por get_db
-    db.refresh(obj)
+    await db.commit()   # IntegrityError -> handler global (409), rollback automático por get_async_db
+    client_index.upsert(obj)
     return obj
 
 @router.delete(
@@ -128,40 +450,26 @@ def update_client(client_id: str, payload: schemas.ClientUpdate, db: Session = D
     status_code=status.HTTP_204_NO_CONTENT,
     dependencies=[Depends(require_role(UserRole.owner))]
 )
-def delete_client(client_id: str, db: Session = Depends(get_db)):
-    obj = db.get(models.Client, client_id)
+async def delete_client(client_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Client, client_id)
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Client not found")
-    db.delete(obj)
-    db.commit()
+    # el DELETE arrastra pagos y asistencias (cascade): se descuentan de los rollups antes
+    await rollups.apply(db, rollups.client_removal_changes(obj))
+    await db.delete(obj)
+    await db.commit()
+    client_index.remove(client_id)
+    # se fueron también sus pagos/asistencias (de cualquier fecha): invalidamos todo el dominio
+    touch("clients", obj.join_date)
+    report_cache.invalidate("payments")
+    report_cache.invalidate("attendance")
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
-@router.get("/{client_id}/status", response_model=schemas.ClientStatus)
-def client_status(client_id: str, db: Session = Depends(get_db)):
-    client = db.get(models.Client, client_id)
-    if not client:
+@router.get("/{client_id}/status", response_model=schemas.ClientStatus,
+            dependencies=[Depends(_status_etag)])
+async def client_status(client_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    # misma consulta que /clients/status, para un solo cliente
+    row = (await db.execute(select(*_status_columns()).where(models.Client.id == client_id))).first()
+    if not row:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Client not found")
-
-    last_pay = (
-        db.query(models.Payment)
-          .filter(models.Payment.client_id == client_id)
-          .order_by(models.Payment.period_year.desc(), models.Payment.period_month.desc())
-          .first()
-    )
-
-    # tu lógica actual:
-    from ..utils import current_period
-    cur_m, cur_y = current_period()
-    is_up_to_date = False
-    last_m = last_y = None
-    if last_pay:
-        last_m, last_y = last_pay.period_month, last_pay.period_year
-        is_up_to_date = (last_y > cur_y) or (last_y == cur_y and last_m >= cur_m)
-
-    return schemas.ClientStatus(
-        client_id=client.id,
-        full_name=client.full_name,
-        is_up_to_date=is_up_to_date,
-        last_payment_month=last_m,
-        last_payment_year=last_y,
-    )
+    return row
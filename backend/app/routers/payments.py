@@ -1,13 +1,32 @@
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, status, Request, Response, Query
-from sqlalchemy.orm import Session, joinedload, contains_eager
-from sqlalchemy import func, and_, or_
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, contains_eager
+from sqlalchemy import (
+    select, func, and_, or_, delete, update, exists, literal, text,
+    Table, Column, MetaData, Integer, String, Numeric, Uuid,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.schema import CreateTable
 from typing import List, Optional, Literal, Dict, Any
 from datetime import datetime, timedelta, date
 
 from .. import models, schemas
-from ..deps import get_db
+from ..deps import get_async_db
 from ..auth import get_current_user, require_role
 from ..models import UserRole
+from ..search import client_search_filter
+from .. import rollups, client_activity
+from ..report_cache import cached_report, touch, report_cache
+from .. import bulk
+from ..export import ExportFormat, export_response
+from ..etag import etag
+from ..pagination import (
+    order_clauses, keyset_filter, encode_cursor, decode_cursor, row_values, link,
+    CountMode, count_total, set_total_header,
+)
 
 def _inclusive_end(dt_end: date | datetime) -> datetime:
     """
@@ -19,13 +38,9 @@ def _inclusive_end(dt_end: date | datetime) -> datetime:
     # si te llega date, pasamos al día siguiente 00:00
     return datetime.combine(dt_end + timedelta(days=1), datetime.min.time())
 
-def _bucket_expr(col, bucket: Literal["day", "week", "month"]):
-    # Para Postgres: date_trunc
-    if bucket == "day":
-        return func.date_trunc("day", col)
-    if bucket == "week":
-        return func.date_trunc("week", col)
-    return func.date_trunc("month", col)
+def _start_of(d: date | datetime) -> datetime:
+    # asyncpg no convierte date -> timestamp: el límite inferior va como datetime
+    return d if isinstance(d, datetime) else datetime.combine(d, datetime.min.time())
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
@@ -35,196 +50,397 @@ router = APIRouter(prefix="/payments", tags=["payments"])
     status_code=status.HTTP_201_CREATED,
     dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))]
 )
-def create_payment(
+async def create_payment(
     payload: schemas.PaymentCreate,
     request: Request,
     response: Response,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user: models.User = Depends(get_current_user),
 ):
-    # 👉 Normalizá el client_id a str (viene como UUID del schema)
-    client_id_str = str(payload.client_id)
-
     # Regla: 1 pago por cliente/mes
-    exists = (
-        db.query(models.Payment)
-        .filter(
-            models.Payment.client_id == client_id_str,          
+    exists = (await db.execute(
+        select(models.Payment.id)
+        .where(
+            models.Payment.client_id == payload.client_id,
             models.Payment.period_year == payload.period_year,
             models.Payment.period_month == payload.period_month,
         )
-        .first()
-    )
+        .limit(1)
+    )).first()
     if exists:
         raise HTTPException(status.HTTP_409_CONFLICT, "Payment for this period already exists")
 
-    # Crear el pago usando el client_id como str
     obj = models.Payment(
-        client_id=client_id_str,                                
+        client_id=payload.client_id,
         amount=payload.amount,
         method=payload.method,
         method_channel=payload.method_channel,
         note=payload.note,
         period_month=payload.period_month,
         period_year=payload.period_year,
+        created_at=datetime.utcnow(),  # explícito: el rollup necesita el día antes del flush
         created_by_user_id=user.id,
     )
-    db.add(obj); db.commit(); db.refresh(obj)
+    db.add(obj)
+    await rollups.apply(db, rollups.payment_changes(obj)
+                        + client_activity.payment_added(obj.client_id, obj.period_year, obj.period_month))
+    await db.commit()
+    touch("payments", obj.created_at)
+    await db.refresh(obj, attribute_names=["client"])  # PaymentOut incluye el cliente
 
     loc = request.url_for("payments:get_one", payment_id=obj.id)
     response.headers["Location"] = str(loc)
     return schemas.PaymentOut.model_validate(obj)
 
 
-@router.get("/", response_model=List[schemas.PaymentOut])
-def list_payments(
+# Staging de /payments/bulk: tabla temporal por transacción (se borra sola en el commit/rollback)
+_stage = Table(
+    "payments_bulk_stage", MetaData(),
+    Column("line", Integer, nullable=False),
+    Column("id", Uuid, nullable=False),
+    Column("client_id", Uuid, nullable=False),
+    Column("amount", Numeric(12, 2), nullable=False),
+    Column("method", String, nullable=False),
+    Column("method_channel", String),
+    Column("note", String),
+    Column("period_month", Integer, nullable=False),
+    Column("period_year", Integer, nullable=False),
+    Column("existing_id", Uuid),  # pago que ya existe para ese cliente/período
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DROP",
+)
+_STAGE_COLS = ["line", "id", "client_id", "amount", "method", "method_channel", "note", "period_month", "period_year"]
+_PERIOD_COLS = ["client_id", "period_year", "period_month"]
+
+
+@router.post("/bulk", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def bulk_payments(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    user: models.User = Depends(get_current_user),
+    on_conflict: Literal["skip", "update", "fail"] = Query(
+        "skip", description="Si ya hay pago para el cliente/período: skip, update (monto/método/nota) o fail (no importa nada)"),
+):
+    """
+    Importación masiva: body CSV (con encabezado) o NDJSON con los campos de PaymentCreate.
+    Responde NDJSON: {"line", "error"} por cada fila rechazada y al final {"summary": {...}}.
+    Las filas con error se descartan; con on_conflict=fail cualquier error cancela todo.
+    Los resultados se acumulan en un archivo temporal, no en memoria.
+    """
+    fmt = bulk.record_format(request)
+    out = bulk.spool()
+    try:
+        return await _bulk_payments(request, fmt, out, db, user, on_conflict)
+    except BaseException:
+        out.close()
+        raise
+
+
+async def _bulk_payments(request: Request, fmt: str, out, db: AsyncSession, user: models.User, on_conflict: str):
+    received = errors = 0
+
+    def reject(line: int, msg: str):
+        nonlocal errors
+        errors += 1
+        bulk.write(out, {"line": line, "error": msg})
+
+    await db.execute(CreateTable(_stage))
+
+    batch: list[tuple] = []
+    async for line, rec, err in bulk.read_records(request, fmt):
+        received += 1
+        if err:
+            reject(line, err)
+            continue
+        try:
+            p = schemas.PaymentCreate.model_validate(rec)
+        except ValidationError as e:
+            reject(line, bulk.validation_message(e))
+            continue
+        batch.append((line, uuid.uuid4(), p.client_id, p.amount, p.method, p.method_channel,
+                      p.note, p.period_month, p.period_year))
+        if len(batch) >= bulk.BATCH_SIZE:
+            await bulk.copy_records(db, _stage.name, _STAGE_COLS, batch)
+            batch = []
+    if batch:
+        await bulk.copy_records(db, _stage.name, _STAGE_COLS, batch)
+
+    await db.execute(text(f"ANALYZE {_stage.name}"))  # sin estadísticas el planner supone ~1000 filas
+
+    P, S = models.Payment, _stage.c
+    same_period = and_(*(P.__table__.c[k] == S[k] for k in _PERIOD_COLS))
+
+    unknown = await db.execute(
+        delete(_stage)
+        .where(~exists().where(models.Client.id == S.client_id))
+        .returning(S.line)
+    )
+    for (line,) in unknown:
+        reject(line, "client_id: client not found")
+
+    # Mismo cliente/período repetido en el archivo: queda la última fila
+    dup = _stage.alias("later")
+    repeated = await db.execute(
+        delete(_stage)
+        .where(exists().where(*(dup.c[k] == S[k] for k in _PERIOD_COLS), dup.c.line > S.line))
+        .returning(S.line)
+    )
+    for (line,) in repeated:
+        reject(line, "duplicated client/period in this file (a later row wins)")
+
+    if on_conflict == "update":
+        # Bloqueamos solo los pagos que se van a pisar (no la tabla): nadie los modifica ni
+        # borra hasta el commit, así lo que se resta del rollup es lo que se reemplaza
+        await db.execute(select(func.count()).select_from(
+            select(P.id).join(_stage, same_period).with_for_update(of=P).subquery()))
+    await db.execute(update(_stage).values(existing_id=P.id).where(same_period))
+    n_valid, n_existing = (await db.execute(
+        select(func.count(), func.count(S.existing_id)).select_from(_stage)
+    )).one()
+    if on_conflict == "fail":
+        for (line,) in await db.execute(select(S.line).where(S.existing_id.is_not(None)).order_by(S.line)):
+            reject(line, "Payment for this period already exists")
+
+    def aborted(status_code: int):
+        summary = {"status": "aborted", "received": received, "inserted": 0, "updated": 0,
+                   "skipped": 0, "errors": errors}
+        bulk.write(out, {"summary": summary})
+        return StreamingResponse(bulk.drain(out), status_code=status_code, media_type=bulk.NDJSON)
+
+    if on_conflict == "fail" and errors:
+        await db.rollback()
+        return aborted(status.HTTP_409_CONFLICT)
+
+    if on_conflict == "update" and n_existing:
+        # El rollup resta los valores viejos de los que se van a pisar
+        existing = P.id.in_(select(S.existing_id).where(S.existing_id.is_not(None)))
+        await rollups.apply(db, rollups.payment_rows_changes(existing, -1))
+        await db.execute(
+            update(P).execution_options(synchronize_session=False)
+            .values(amount=S.amount, method=S.method, method_channel=S.method_channel, note=S.note)
+            .where(P.id == S.existing_id)
+        )
+
+    # Pagos nuevos. ON CONFLICT DO NOTHING: si otro request creó el período después de
+    # marcar existing_id, esa fila no se inserta y se informa abajo
+    now = datetime.utcnow()
+    cols = ["id", "client_id", "amount", "method", "method_channel", "note", "period_month", "period_year"]
+    rows = (select(*(S[c] for c in cols), literal(now), literal(user.id, Uuid))
+            .where(S.existing_id.is_(None))
+            .order_by(S.client_id))  # en orden de índice: menos páginas tocadas por fila
+    ins = (pg_insert(P).from_select(cols + ["created_at", "created_by_user_id"], rows)
+           .on_conflict_do_nothing(constraint="uq_payment_period")
+           .returning(P.id).cte("ins"))
+    inserted = (await db.execute(select(func.count()).select_from(ins))).scalar()
+
+    if inserted < n_valid - n_existing:
+        raced = select(S.line).where(S.existing_id.is_(None), ~exists().where(P.id == S.id)).order_by(S.line)
+        for (line,) in await db.execute(raced):
+            reject(line, "Payment for this period was created by another request during the import")
+        if on_conflict == "fail":
+            await db.rollback()
+            return aborted(status.HTTP_409_CONFLICT)
+
+    # Suma al rollup lo insertado (y lo actualizado, con sus valores nuevos); las filas que
+    # no se insertaron tienen un id que no está en payments
+    touched = select(S.id)
+    if on_conflict == "update":
+        touched = select(func.coalesce(S.existing_id, S.id))
+    await rollups.apply(db, rollups.payment_rows_changes(P.id.in_(touched), 1)
+                        + client_activity.payments_changed(select(S.client_id)))
+    await db.commit()
+    report_cache.invalidate("payments")  # un update puede tocar cualquier día
+
+    summary = {
+        "status": "ok",
+        "received": received,
+        "inserted": inserted,
+        "updated": n_existing if on_conflict == "update" else 0,
+        "skipped": n_existing if on_conflict == "skip" else 0,
+        "errors": errors,
+    }
+    bulk.write(out, {"summary": summary})
+    return StreamingResponse(bulk.drain(out), media_type=bulk.NDJSON)
+
+
+# Orden del listado y del export: período más reciente primero; id desempata para el cursor
+_SORT_KEYS = [
+    (models.Payment.period_year, "desc"),
+    (models.Payment.period_month, "desc"),
+    (models.Payment.created_at, "desc"),
+    (models.Payment.id, "desc"),
+]
+
+
+def _filtered(query, client_id: Optional[uuid.UUID], q: Optional[str]):
+    # Filtros compartidos por el listado y el export (query ya con JOIN a clients)
+    if client_id:
+        query = query.where(models.Payment.client_id == client_id)
+    if q:
+        query = query.where(client_search_filter(q))
+    return query
+
+
+@router.get("/", response_model=List[schemas.PaymentOut], dependencies=[Depends(etag("payments", "clients"))])
+async def list_payments(
     response: Response,
-    db: Session = Depends(get_db),
-    client_id: Optional[str] = None,   # sigue disponible
+    db: AsyncSession = Depends(get_async_db),
+    client_id: Optional[uuid.UUID] = None,   # sigue disponible
     q: Optional[str] = Query(None, description="nombre, email o teléfono"),
     limit: int = Query(50, ge=1, le=200),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Paginación keyset: vacío para la 1ra página, luego el Link rel=next"),
+    count: CountMode = Query("exact", description="X-Total-Count: exact, estimate (planner) o none (sin conteo)"),
 ):
-    query = (
-        db.query(models.Payment)
+    query = _filtered(
+        select(models.Payment)
           .join(models.Client)
-          .options(contains_eager(models.Payment.client))
+          .options(contains_eager(models.Payment.client)),
+        client_id, q,
     )
 
-    if client_id:
-        query = query.filter(models.Payment.client_id == client_id)
+    total = await count_total(db, query, models.Payment.id, count)
+    set_total_header(response, total)
 
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                models.Client.full_name.ilike(like),
-                models.Client.email.ilike(like),
-                models.Client.phone.ilike(like),
-            )
-        )
+    keys = _SORT_KEYS
+    query = query.order_by(*order_clauses(keys))
 
-    total = query.with_entities(func.count(models.Payment.id)).scalar()
-    response.headers["X-Total-Count"] = str(total)
+    if cursor is not None:
+        if offset:
+            raise HTTPException(status.HTTP_400_BAD_REQUEST, "Use either offset or cursor, not both")
+        if cursor:
+            query = query.where(keyset_filter(keys, decode_cursor(cursor, "payments", len(keys))))
+        rows = (await db.execute(query.limit(limit + 1))).scalars().all()
+        items = rows[:limit]
+        if len(rows) > limit:
+            nxt = encode_cursor(row_values(items[-1], ["period_year", "period_month", "created_at", "id"]), "payments")
+            params = {"cursor": nxt, "limit": limit, "client_id": client_id, "q": q, "count": count}
+            response.headers["Link"] = link("/payments", params, "next")
+        return items
 
-    items = (
-        query.order_by(
-            models.Payment.period_year.desc(),
-            models.Payment.period_month.desc(),
-            models.Payment.created_at.desc(),
-        )
-        .offset(offset)
-        .limit(limit)
-        .all()
+    return (await db.execute(query.offset(offset).limit(limit))).scalars().all()
+
+
+@router.get("/export", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
+async def export_payments(
+    db: AsyncSession = Depends(get_async_db),
+    client_id: Optional[uuid.UUID] = None,
+    q: Optional[str] = Query(None, description="nombre, email o teléfono"),
+    format: ExportFormat = Query("csv"),
+):
+    """Todos los pagos que cumplen los filtros del listado, en el mismo orden, como CSV o NDJSON."""
+    P, C = models.Payment, models.Client
+    query = _filtered(
+        select(P.id, P.client_id, C.full_name.label("client_name"), P.amount, P.method, P.method_channel,
+               P.note, P.period_month, P.period_year, P.created_at)
+        .join(C, P.client_id == C.id),
+        client_id, q,
     )
-    return items
+    return export_response(db, query.order_by(*order_clauses(_SORT_KEYS)), format, "payments")
 
 
-@router.get("/{payment_id}", response_model=schemas.PaymentOut, name="payments:get_one")
-def get_payment(payment_id: str, db: Session = Depends(get_db)):
-    obj = db.get(models.Payment, payment_id)
+@router.get("/{payment_id}", response_model=schemas.PaymentOut, name="payments:get_one",
+            dependencies=[Depends(etag("payments", "clients"))])
+async def get_payment(payment_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Payment, payment_id, options=[joinedload(models.Payment.client)])
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Payment not found")
     return obj
 
 @router.delete("/{payment_id}", status_code=status.HTTP_204_NO_CONTENT,
                dependencies=[Depends(require_role(UserRole.owner))])
-def delete_payment(payment_id: str, db: Session = Depends(get_db)):
-    obj = db.get(models.Payment, payment_id)
+async def delete_payment(payment_id: uuid.UUID, db: AsyncSession = Depends(get_async_db)):
+    obj = await db.get(models.Payment, payment_id)
     if not obj:
         raise HTTPException(status.HTTP_404_NOT_FOUND, "Payment not found")
-    db.delete(obj); db.commit()
+    await rollups.apply(db, rollups.payment_changes(obj, -1))
+    await db.delete(obj); await db.flush()
+    await rollups.apply(db, client_activity.payment_removed(obj.client_id))
+    await db.commit()
+    touch("payments", obj.created_at)
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
-@router.get("/reports/kpis", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
-def payments_kpis(
-    db: Session = Depends(get_db),
+@router.get("/reports/kpis", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach)), Depends(etag("payments"))])
+@cached_report("payments.kpis", "payments")
+async def payments_kpis(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(..., description="Fecha desde (YYYY-MM-DD)"),
     end: date = Query(..., description="Fecha hasta (YYYY-MM-DD, inclusive)"),
     method: Optional[Literal["cash", "transfer"]] = Query(None, description="Filtra por método"),
 ) -> Dict[str, Any]:
-    end_inclusive = _inclusive_end(end)
-
-    q = db.query(
-        func.count(models.Payment.id),              # n_payments
-        func.coalesce(func.sum(models.Payment.amount), 0.0),  # amount_sum
-        func.coalesce(func.avg(models.Payment.amount), 0.0),  # amount_avg
-        func.count(func.distinct(models.Payment.client_id)),  # unique_clients
-    ).filter(
-        models.Payment.created_at >= start,
+    # Cantidad y monto salen del rollup; clientes únicos no se pueden sumar por día, van contra pagos
+    R, day, _ = rollups.payment_source(start, end)
+    q = select(
+        func.coalesce(func.sum(R.n_payments), 0),    # n_payments
+        func.coalesce(func.sum(R.amount_sum), 0),    # amount_sum
+    ).where(day >= start, day <= end)
+    if method:
+        q = q.where(R.method == method)
+    n_payments, amount_sum = (await db.execute(q)).one()
+
+    start_dt, end_inclusive = _start_of(start), _inclusive_end(end)
+    uq = select(func.count(func.distinct(models.Payment.client_id))).where(
+        models.Payment.created_at >= start_dt,
         models.Payment.created_at < end_inclusive,
     )
     if method:
-        q = q.filter(models.Payment.method == method)
-
-    n_payments, amount_sum, amount_avg, unique_clients = q.one()
+        uq = uq.where(models.Payment.method == method)
+    unique_clients = (await db.execute(uq)).scalar()
 
     return {
         "n_payments": int(n_payments),
         "unique_clients": int(unique_clients),
         "amount_sum": float(amount_sum),
-        "amount_avg": float(amount_avg),
+        "amount_avg": float(amount_sum) / n_payments if n_payments else 0.0,
         "start": str(start),
         "end": str(end),
         "method": method,
     }
 
-@router.get("/reports/by_method", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
-def payments_by_method(
-    db: Session = Depends(get_db),
+@router.get("/reports/by_method", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach)), Depends(etag("payments"))])
+@cached_report("payments.by_method", "payments")
+async def payments_by_method(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(..., description="Fecha desde (YYYY-MM-DD)"),
     end: date = Query(..., description="Fecha hasta (YYYY-MM-DD, inclusive)"),
 ) -> List[Dict[str, Any]]:
-    end_inclusive = _inclusive_end(end)
-
-    rows = (
-        db.query(
-            models.Payment.method,
-            func.count(models.Payment.id),
-            func.coalesce(func.sum(models.Payment.amount), 0.0),
-        )
-        .filter(
-            models.Payment.created_at >= start,
-            models.Payment.created_at < end_inclusive,
-        )
-        .group_by(models.Payment.method)
-        .order_by(models.Payment.method.asc())
-        .all()
-    )
+    R, day, _ = rollups.payment_source(start, end)
+    rows = (await db.execute(
+        select(R.method, func.sum(R.n_payments), func.sum(R.amount_sum))
+        .where(day >= start, day <= end)
+        .group_by(R.method)
+        .having(func.sum(R.n_payments) > 0)
+        .order_by(R.method.asc())
+    )).all()
 
     return [
         {"method": m or "unknown", "count": int(c), "amount_sum": float(s)}
         for (m, c, s) in rows
     ]
 
-@router.get("/reports/by_channel", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
-def payments_by_channel(
-    db: Session = Depends(get_db),
+@router.get("/reports/by_channel", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach)), Depends(etag("payments"))])
+@cached_report("payments.by_channel", "payments")
+async def payments_by_channel(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(..., description="YYYY-MM-DD"),
     end: date = Query(..., description="YYYY-MM-DD (inclusive)"),
     method: Optional[Literal["cash", "transfer"]] = Query(None),
 ) -> List[Dict[str, Any]]:
-    end_inclusive = _inclusive_end(end)
+    R, day, _ = rollups.payment_source(start, end)
+    channel = func.nullif(R.method_channel, "")  # en el rollup "sin canal" se guarda como ""
     q = (
-        db.query(
-            models.Payment.method_channel,
-            func.count(models.Payment.id),
-            func.coalesce(func.sum(models.Payment.amount), 0.0),
-        )
-        .filter(
-            models.Payment.created_at >= start,
-            models.Payment.created_at < end_inclusive,
-        )
+        select(channel, func.sum(R.n_payments), func.sum(R.amount_sum))
+        .where(day >= start, day <= end)
     )
     if method:
-        q = q.filter(models.Payment.method == method)
+        q = q.where(R.method == method)
 
-    rows = (
-        q.group_by(models.Payment.method_channel)
-         .order_by(models.Payment.method_channel.asc())
-         .all()
-    )
+    rows = (await db.execute(
+        q.group_by(channel)
+         .having(func.sum(R.n_payments) > 0)
+         .order_by(channel.asc())
+    )).all()
     return [
         {
             "channel": ch or "unknown",
@@ -235,18 +451,16 @@ def payments_by_channel(
     ]
 
 
-@router.get("/reports/timeseries", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach))])
-def payments_timeseries(
-    db: Session = Depends(get_db),
+@router.get("/reports/timeseries", dependencies=[Depends(require_role(UserRole.owner, UserRole.coach)), Depends(etag("payments"))])
+@cached_report("payments.timeseries", "payments")
+async def payments_timeseries(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(..., description="Fecha desde (YYYY-MM-DD)"),
     end: date = Query(..., description="Fecha hasta (YYYY-MM-DD, inclusive)"),
     bucket: Literal["day", "week", "month"] = Query("day"),
     method: Optional[Literal["cash", "transfer"]] = Query(None),
     method_channel: Optional[str] = Query(None),
 ) -> List[Dict[str, Any]]:
-    end_inclusive = _inclusive_end(end)
-    ts = _bucket_expr(models.Payment.created_at, bucket).label("ts")
-
     # Validacion coherente de canal
     if method_channel and method != "transfer":
         raise HTTPException(
@@ -254,27 +468,26 @@ def payments_timeseries(
             detail="method_channel filter only makes sense when method is 'transfer'",
         )
 
+    R, day, _ = rollups.payment_source(start, end, bucket)
+    ts = rollups.bucket_expr(day, bucket).label("ts")
     q = (
-        db.query(
+        select(
             ts,
-            func.count(models.Payment.id).label("count"),
-            func.coalesce(func.sum(models.Payment.amount), 0.0).label("amount_sum"),
-        )
-        .filter(
-            models.Payment.created_at >= start,
-            models.Payment.created_at < end_inclusive,
+            func.sum(R.n_payments).label("count"),
+            func.sum(R.amount_sum).label("amount_sum"),
         )
+        .where(day >= start, day <= end)
     )
     if method:
-        q = q.filter(models.Payment.method == method)
+        q = q.where(R.method == method)
     if method_channel:
-        q = q.filter(models.Payment.method_channel == method_channel)
+        q = q.where(R.method_channel == method_channel)
 
-    rows = (
+    rows = (await db.execute(
         q.group_by(ts)
+         .having(func.sum(R.n_payments) > 0)
          .order_by(ts.asc())
-         .all()
-    )
+    )).all()
 
     return [
         {
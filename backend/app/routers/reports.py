@@ -1,102 +1,113 @@
 
-from datetime import date, datetime, timedelta, time
-from sqlalchemy import func
+from datetime import date, datetime, timezone
+from sqlalchemy import select, func
 from typing import Literal, Optional
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy.orm import Session
-from .. import models
-from ..deps import get_db
-from ..schemas import _bucket_expr
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models, rollups
+from ..report_cache import cached_report
+from ..etag import etag
+from ..deps import get_async_db
 from ..auth import require_role
 from ..models import UserRole
+from .payments import payments_kpis, payments_by_method, payments_by_channel, payments_timeseries
 
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
-TZ = "America/Argentina/Buenos_Aires"
+# Leen de los rollups diarios (app/rollups.py): start/end filtran por la fecha UTC del
+# timestamp guardado y los buckets se arman por día en la zona del gimnasio (local_day).
 
-def _bucket_expr(dt_col, bucket: str):
-    with_tz = func.timezone(TZ, dt_col)
-    if bucket == "day":
-        return func.date_trunc("day", with_tz)
-    if bucket == "week":
-        return func.date_trunc("week", with_tz)
-    return func.date_trunc("month", with_tz)
+def _iso(ts: datetime) -> str:
+    return ts.replace(tzinfo=timezone.utc).isoformat()
 
-def _end_exclusive(d: date) -> datetime:
-    # día siguiente a las 00:00 (límite exclusivo)
-    return datetime.combine(d, time.min) + timedelta(days=1)
-
-@router.get("/attendance")
-def attendance_report(
-    db: Session = Depends(get_db),
-    _user = Depends(require_role(UserRole.owner, UserRole.coach)),
+@router.get("/attendance", dependencies=[
+    Depends(require_role(UserRole.owner, UserRole.coach)),  # antes que el ETag: un 304 no saltea el rol
+    Depends(etag("attendances")),
+])
+@cached_report("reports.attendance", "attendance")
+async def attendance_report(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(...),
     end: date = Query(...),
     bucket: Literal["day", "week", "month"] = Query("day"),
 ):
-    start_dt = datetime.combine(start, time.min)
-    end_dt_exclusive = datetime.combine(end, time.min) + timedelta(days=1)
-
-    ts = _bucket_expr(models.Attendance.checkin_at, bucket).label("ts")
-    rows = (
-        db.query(ts, func.count(models.Attendance.id))
-        .filter(
-            models.Attendance.checkin_at >= start_dt,
-            models.Attendance.checkin_at < end_dt_exclusive,
-        )
+    R = models.AttendanceDailyRollup
+    ts = rollups.bucket_expr(R.local_day, bucket).label("ts")
+    rows = (await db.execute(
+        select(ts, func.sum(R.n_checkins))
+        .where(R.day >= start, R.day <= end)
         .group_by(ts)
+        .having(func.sum(R.n_checkins) > 0)
         .order_by(ts)
-        .all()
-    )
-    return [{"bucket": r[0].isoformat(), "count": int(r[1])} for r in rows]
+    )).all()
+    return [{"bucket": _iso(r[0]), "count": int(r[1])} for r in rows]
 
-@router.get("/new_clients")
-def new_clients_report(
-    db: Session = Depends(get_db),
+@router.get("/new_clients", dependencies=[Depends(etag("clients"))])
+@cached_report("reports.new_clients", "clients")
+async def new_clients_report(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(...),
     end: date = Query(...),
     bucket: Literal["day", "week", "month"] = Query("week")
 ):
-    ts = _bucket_expr(models.Client.join_date, bucket).label("ts")
-    start_dt = datetime.combine(start, time.min)
-    end_ex = _end_exclusive(end)
-
-    rows = (
-        db.query(ts, func.count(models.Client.id))
-        .filter(
-            models.Client.join_date >= start_dt,
-            models.Client.join_date < end_ex,
-        )
+    R = models.ClientDailyRollup
+    ts = rollups.bucket_expr(R.local_day, bucket).label("ts")
+    rows = (await db.execute(
+        select(ts, func.sum(R.n_new))
+        .where(R.day >= start, R.day <= end)
         .group_by(ts)
+        .having(func.sum(R.n_new) > 0)
         .order_by(ts)
-        .all()
-    )
-    return [{"bucket": r[0].isoformat(), "count": int(r[1])} for r in rows]
+    )).all()
+    return [{"bucket": _iso(r[0]), "count": int(r[1])} for r in rows]
 
-@router.get("/revenue")
-def revenue_report(
-    db: Session = Depends(get_db),
+@router.get("/revenue", dependencies=[Depends(etag("payments"))])
+@cached_report("reports.revenue", "payments")
+async def revenue_report(
+    db: AsyncSession = Depends(get_async_db),
     start: date = Query(...),
     end: date = Query(...),
     bucket: Literal["month", "week", "day"] = Query("month"),
     method: Optional[str] = Query(None, description="Filtrar por método: cash/transfer"),
 ):
-    ts = _bucket_expr(models.Payment.created_at, bucket).label("ts")
-    start_dt = datetime.combine(start, time.min)
-    end_ex = _end_exclusive(end)
+    R, day, local_day = rollups.payment_source(start, end, bucket)
+    ts = rollups.bucket_expr(local_day, bucket).label("ts")
 
-    q = db.query(ts, func.sum(models.Payment.amount))
+    q = select(ts, func.sum(R.amount_sum)).where(day >= start, day <= end)
     if method:
-        q = q.filter(models.Payment.method == method)
+        q = q.where(R.method == method)
 
-    rows = (
-        q.filter(
-            models.Payment.created_at >= start_dt,
-            models.Payment.created_at < end_ex,
-        )
-        .group_by(ts)
+    rows = (await db.execute(
+        q.group_by(ts)
+        .having(func.sum(R.n_payments) > 0)
         .order_by(ts)
-        .all()
-    )
-    return [{"bucket": r[0].isoformat(), "total": float(r[1] or 0.0)} for r in rows]
+    )).all()
+    return [{"bucket": _iso(r[0]), "total": float(r[1] or 0.0)} for r in rows]
+
+@router.get("/dashboard", dependencies=[
+    Depends(require_role(UserRole.owner, UserRole.coach)),
+    Depends(etag("payments", "attendances", "clients")),
+])
+async def dashboard(
+    db: AsyncSession = Depends(get_async_db),
+    start: date = Query(...),
+    end: date = Query(...),
+    bucket: Literal["day", "week", "month"] = Query("day"),
+    method: Optional[Literal["cash", "transfer"]] = Query(None),
+):
+    """
+    Todo lo del dashboard en un request: un chequeo de rol, una conexión y un ETag.
+    Cada parte es el endpoint individual (misma forma de respuesta y mismas entradas
+    de cache); van en serie sobre la misma sesión porque leen pocas filas de los rollups
+    y abrir una sesión por parte sería tomar 6 conexiones del pool por request.
+    """
+    return {
+        "kpis": await payments_kpis(db=db, start=start, end=end, method=method),
+        "by_method": await payments_by_method(db=db, start=start, end=end),
+        "by_channel": await payments_by_channel(db=db, start=start, end=end, method=method),
+        "timeseries": await payments_timeseries(db=db, start=start, end=end, bucket=bucket,
+                                                method=method, method_channel=None),
+        "attendance": await attendance_report(db=db, start=start, end=end, bucket=bucket),
+        "new_clients": await new_clients_report(db=db, start=start, end=end, bucket=bucket),
+    }
@@ -1,10 +1,10 @@
-from datetime import datetime
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Optional, Literal, Annotated
 from uuid import UUID
 from sqlalchemy import func
 
-from pydantic import BaseModel, Field, EmailStr, ConfigDict, field_validator
+from pydantic import BaseModel, Field, EmailStr, ConfigDict, PlainSerializer, field_validator
 
 # ==================================
 # CONFIG BASE (reutilizable)
@@ -53,18 +53,24 @@ class ClientUpdate(BaseSchema):
 
 
 class ClientOut(ClientBase):
-    id: str
+    id: UUID
     join_date: datetime
+    last_paid_year: Optional[int] = None
+    last_paid_month: Optional[int] = None
+    last_checkin_at: Optional[datetime] = None
 
 
 # ==================================
 # PAYMENTS
 # ==================================
 PaymentMethod = Literal["cash", "transfer"]
+# Numeric(12,2) en la base; en el JSON sigue saliendo como número (no como string)
+Money = Annotated[Decimal, Field(ge=0, max_digits=12, decimal_places=2),
+                  PlainSerializer(float, return_type=float, when_used="json")]
 
 class PaymentBase(BaseSchema):
-    client_id: Annotated[str, Field(min_length=36, max_length=36)]  # uuid en formato string
-    amount: Annotated[float,Field(ge=0)]
+    client_id: UUID
+    amount: Money
     method: PaymentMethod 
     method_channel: Optional[str] = Field(default=None, max_length=30, description=
                                           "Sub-canal para transfer: mercadopago, cuentadni, personalpay, etc.")
@@ -81,16 +87,13 @@ class PaymentOut(PaymentBase):
     id: UUID
     created_at: datetime
     client: Optional[ClientOut] = None  # para evitar ciclo infinito en serialización
-    
-    class Config:
-        from_attributes = True
 
 
 # ==================================
 # STATUS
 # ==================================
 class ClientStatus(BaseSchema):
-    client_id: str
+    client_id: UUID
     full_name: str
     is_up_to_date: bool
     last_payment_month: Optional[int] = None
@@ -101,16 +104,54 @@ class ClientStatus(BaseSchema):
 # ATTENDANCE
 # ==================================
 class AttendanceBase(BaseSchema):
-    client_id: Annotated[str, Field(min_length=36, max_length=36)]  # uuid en formato string
+    client_id: UUID
 class AttendanceCheckinIn(BaseSchema):
-    client_id: Optional[Annotated[str, Field(min_length=36, max_length=36)]] = None
+    client_id: Optional[UUID] = None
     q: Optional[str] = Field(None, max_length=120, description="nombre, email o teléfono")
 class AttendanceOut(AttendanceBase):
     id: UUID
     checkin_at: datetime
     client: ClientOut
-    class Config:
-        from_attributes = True
+class ClientCandidate(BaseSchema):
+    id: UUID
+    full_name: str
+    email: Optional[str] = None
+    phone: Optional[str] = None
+class CheckinAmbiguous(BaseSchema):
+    # respuesta 300: q coincide con varios clientes, el front elige y reintenta con client_id
+    detail: str
+    candidates: list[ClientCandidate]
+class CheckinBatchItem(BaseSchema):
+    client_id: Optional[UUID] = None
+    q: Optional[str] = Field(None, max_length=120, description="nombre, email o teléfono")
+    checkin_at: Optional[datetime] = Field(None, description="Hora real del check-in (UTC si no trae zona); vacío = ahora")
+    idempotency_key: Annotated[str, Field(min_length=1, max_length=100, description=
+                                          "Única por check-in (p.ej. terminal + secuencia local): un reenvío dentro de "
+                                          "la ventana CHECKIN_KEY_RETENTION_DAYS no duplica")]
+
+    @field_validator("checkin_at")
+    @classmethod
+    def to_naive_utc(cls, v: Optional[datetime]) -> Optional[datetime]:
+        # en la base los timestamps son UTC sin zona
+        if v is not None and v.tzinfo is not None:
+            v = v.astimezone(timezone.utc).replace(tzinfo=None)
+        return v
+class CheckinBatchIn(BaseSchema):
+    items: Annotated[list[CheckinBatchItem], Field(min_length=1, max_length=500)]
+class CheckinBatchResult(BaseSchema):
+    index: int  # posición en items
+    idempotency_key: str
+    # created | duplicate (ya registrado: devuelve el original) | not_found | ambiguous | invalid
+    status: Literal["created", "duplicate", "not_found", "ambiguous", "invalid"]
+    attendance_id: Optional[UUID] = None
+    client_id: Optional[UUID] = None
+    checkin_at: Optional[datetime] = None
+    candidates: Optional[list[ClientCandidate]] = None
+class CheckinBatchOut(BaseSchema):
+    created: int
+    duplicates: int
+    failed: int
+    results: list[CheckinBatchResult]
         
 # ==================================
 # REPORTS
@@ -0,0 +1,38 @@
+# app/search.py
+from sqlalchemy import or_, func, cast, Float
+
+from . import models
+
+# Columnas de búsqueda de clientes; cada una tiene un índice GIN pg_trgm
+# (migración b7d41c9e2f3a), que acelera tanto ILIKE '%q%' como similarity().
+SEARCH_COLUMNS = (models.Client.full_name, models.Client.email, models.Client.phone)
+
+
+def like_pattern(q: str) -> str:
+    # Escapamos comodines para que "%" o "_" del usuario se busquen literalmente
+    esc = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{esc}%"
+
+
+def client_search_filter(q: str):
+    """Filtro por nombre, email o teléfono (contiene, sin distinguir mayúsculas)."""
+    return client_pattern_filter(like_pattern(q.strip()))
+
+
+def client_pattern_filter(pattern):
+    """
+    Como client_search_filter, con el patrón de like_pattern() ya armado: también puede ser
+    una columna (p.ej. de un VALUES para buscar varios q en una sola consulta).
+    """
+    return or_(*(col.ilike(pattern, escape="\\") for col in SEARCH_COLUMNS))
+
+
+def client_search_rank(q):
+    """
+    Relevancia 0..1: la mejor similitud trigram entre q y cualquiera de las columnas.
+    greatest() ignora NULLs (email/phone opcionales). Se castea a double precision para
+    que el valor viaje exacto en los cursores de paginación. q: texto o columna.
+    """
+    if isinstance(q, str):
+        q = q.strip()
+    return cast(func.greatest(*(func.similarity(col, q) for col in SEARCH_COLUMNS)), Float)
@@ -0,0 +1,53 @@
+"""client last activity columns
+
+Revision ID: a7d3e5f1c824
+Revises: f4c9d2b7a851
+Create Date: 2026-10-18 21:14:37.502118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7d3e5f1c824'
+down_revision: Union[str, Sequence[str], None] = 'f4c9d2b7a851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('clients', sa.Column('last_paid_year', sa.Integer(), nullable=True))
+    op.add_column('clients', sa.Column('last_paid_month', sa.Integer(), nullable=True))
+    op.add_column('clients', sa.Column('last_checkin_at', sa.DateTime(), nullable=True))
+
+    # Backfill en dos pasadas por conjunto (no una subconsulta por cliente)
+    op.execute("""
+        UPDATE clients c SET last_paid_year = l.period_year, last_paid_month = l.period_month
+        FROM (
+            SELECT DISTINCT ON (client_id) client_id, period_year, period_month
+            FROM payments ORDER BY client_id, period_year DESC, period_month DESC
+        ) l
+        WHERE l.client_id = c.id
+    """)
+    op.execute("""
+        UPDATE clients c SET last_checkin_at = l.at
+        FROM (SELECT client_id, max(checkin_at) AS at FROM attendances GROUP BY client_id) l
+        WHERE l.client_id = c.id
+    """)
+
+    op.create_index('ix_clients_last_paid', 'clients', ['last_paid_year', 'last_paid_month'], unique=False)
+    op.create_index('ix_clients_last_checkin_at', 'clients', ['last_checkin_at'], unique=False)
+    op.execute("ANALYZE clients")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clients_last_checkin_at', table_name='clients')
+    op.drop_index('ix_clients_last_paid', table_name='clients')
+    op.drop_column('clients', 'last_checkin_at')
+    op.drop_column('clients', 'last_paid_month')
+    op.drop_column('clients', 'last_paid_year')
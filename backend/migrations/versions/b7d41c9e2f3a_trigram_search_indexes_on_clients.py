@@ -0,0 +1,35 @@
+"""trigram search indexes on clients
+
+Revision ID: b7d41c9e2f3a
+Revises: 11c6f9294a5a
+Create Date: 2026-10-18 10:05:12.418230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d41c9e2f3a'
+down_revision: Union[str, Sequence[str], None] = '11c6f9294a5a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN + gin_trgm_ops: sirve para ILIKE '%q%' y para similarity() (búsqueda de clientes)
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clients_full_name_trgm ON clients USING gin (full_name gin_trgm_ops)')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clients_email_trgm ON clients USING gin (email gin_trgm_ops)')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_clients_phone_trgm ON clients USING gin (phone gin_trgm_ops)')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS ix_clients_phone_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_clients_email_trgm')
+    op.execute('DROP INDEX IF EXISTS ix_clients_full_name_trgm')
+    # la extensión queda instalada: puede usarla otra base/objeto
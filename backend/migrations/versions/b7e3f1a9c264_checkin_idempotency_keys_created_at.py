@@ -0,0 +1,29 @@
+"""checkin idempotency keys created_at index
+
+Revision ID: b7e3f1a9c264
+Revises: e2b7c4a9d158
+Create Date: 2026-10-21 10:42:17.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e3f1a9c264'
+down_revision: Union[str, Sequence[str], None] = 'e2b7c4a9d158'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # scripts/purge_checkin_keys.py borra por created_at las claves fuera de la ventana de reenvío
+    op.create_index(op.f('ix_checkin_idempotency_keys_created_at'), 'checkin_idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_checkin_idempotency_keys_created_at'), table_name='checkin_idempotency_keys')
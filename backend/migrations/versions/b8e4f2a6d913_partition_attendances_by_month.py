@@ -0,0 +1,96 @@
+"""partition attendances by month
+
+Revision ID: b8e4f2a6d913
+Revises: a7d3e5f1c824
+Create Date: 2026-10-18 23:41:05.318274
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e4f2a6d913'
+down_revision: Union[str, Sequence[str], None] = 'a7d3e5f1c824'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+MONTHS_AHEAD = 3  # después los crea scripts/create_partitions.py
+
+
+def _add_months(d: date, n: int) -> date:
+    y, m = divmod(d.year * 12 + d.month - 1 + n, 12)
+    return date(y, m + 1, 1)
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('client_id', sa.String(), nullable=False),
+        sa.Column('checkin_at', sa.DateTime(), nullable=False),
+        sa.Column('coach_id', sa.String(), nullable=True),
+        sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['coach_id'], ['users.id'], ondelete='SET NULL'),
+    ]
+
+
+def _version_trigger() -> None:
+    # el trigger por sentencia de los ETags (d5b2c7e9a410) se va con la tabla vieja
+    op.execute(
+        "CREATE TRIGGER trg_attendances_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON attendances "
+        "FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.rename_table('attendances', 'attendances_old')
+    op.execute("ALTER INDEX attendances_pkey RENAME TO attendances_old_pkey")
+    op.execute("ALTER INDEX ix_attendances_client_id RENAME TO ix_attendances_old_client_id")
+
+    # La PK de una tabla particionada tiene que incluir la clave de partición
+    op.create_table('attendances', *_columns(),
+    sa.PrimaryKeyConstraint('id', 'checkin_at'),
+    postgresql_partition_by='RANGE (checkin_at)',
+    )
+    op.create_index('ix_attendances_client_id', 'attendances', ['client_id'], unique=False)
+    op.create_index('ix_attendances_checkin_at', 'attendances', ['checkin_at'], unique=False)
+
+    # Un mes por partición desde el check-in más viejo hasta MONTHS_AHEAD adelante + default
+    first = op.get_bind().execute(sa.text("SELECT min(checkin_at) FROM attendances_old")).scalar()
+    this_month = date.today().replace(day=1)
+    month = (first.date() if first else this_month).replace(day=1)
+    while month <= _add_months(this_month, MONTHS_AHEAD):
+        nxt = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE attendances_y{month.year}m{month.month:02d} PARTITION OF attendances "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+        )
+        month = nxt
+    op.execute("CREATE TABLE attendances_default PARTITION OF attendances DEFAULT")
+
+    op.execute("INSERT INTO attendances (id, client_id, checkin_at, coach_id) "
+               "SELECT id, client_id, checkin_at, coach_id FROM attendances_old")
+    op.drop_table('attendances_old')
+    _version_trigger()
+    op.execute("ANALYZE attendances")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.rename_table('attendances', 'attendances_part')
+    op.execute("ALTER INDEX attendances_pkey RENAME TO attendances_part_pkey")
+    op.execute("ALTER INDEX ix_attendances_client_id RENAME TO ix_attendances_part_client_id")
+    op.execute("ALTER INDEX ix_attendances_checkin_at RENAME TO ix_attendances_part_checkin_at")
+
+    op.create_table('attendances', *_columns(),
+    sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_attendances_client_id', 'attendances', ['client_id'], unique=False)
+    op.execute("INSERT INTO attendances (id, client_id, checkin_at, coach_id) "
+               "SELECT id, client_id, checkin_at, coach_id FROM attendances_part")
+    op.execute("DROP TABLE attendances_part")  # arrastra todas las particiones
+    _version_trigger()
@@ -0,0 +1,93 @@
+"""report rollup tables
+
+Revision ID: c3e8a1f05d27
+Revises: b7d41c9e2f3a
+Create Date: 2026-10-18 13:42:37.905114
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3e8a1f05d27'
+down_revision: Union[str, Sequence[str], None] = 'b7d41c9e2f3a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+GYM_TZ = "America/Argentina/Buenos_Aires"
+
+
+def _local(col: str) -> str:
+    # Igual que app/rollups.py: timezone(GYM_TZ, col) leído en UTC
+    return f"timezone('UTC', timezone('{GYM_TZ}', {col}))"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('payment_rollup_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('local_day', sa.Date(), nullable=False),
+    sa.Column('method', sa.String(), nullable=False),
+    sa.Column('method_channel', sa.String(), nullable=False),
+    sa.Column('n_payments', sa.Integer(), nullable=False),
+    sa.Column('amount_sum', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'local_day', 'method', 'method_channel')
+    )
+    op.create_table('payment_rollup_monthly',
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('local_month', sa.Date(), nullable=False),
+    sa.Column('method', sa.String(), nullable=False),
+    sa.Column('method_channel', sa.String(), nullable=False),
+    sa.Column('n_payments', sa.Integer(), nullable=False),
+    sa.Column('amount_sum', sa.Float(), nullable=False),
+    sa.PrimaryKeyConstraint('month', 'local_month', 'method', 'method_channel')
+    )
+    op.create_table('attendance_rollup_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('local_day', sa.Date(), nullable=False),
+    sa.Column('n_checkins', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'local_day')
+    )
+    op.create_table('client_rollup_daily',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('local_day', sa.Date(), nullable=False),
+    sa.Column('n_new', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day', 'local_day')
+    )
+
+    # Backfill con los datos existentes (mismo cálculo que scripts/rebuild_rollups.py):
+    # local_day es el día en la zona del gimnasio, como lo calculaban los reportes
+    op.execute(f"""
+        INSERT INTO payment_rollup_daily (day, local_day, method, method_channel, n_payments, amount_sum)
+        SELECT created_at::date, {_local('created_at')}::date, method, coalesce(method_channel, ''),
+               count(*), sum(amount)
+        FROM payments WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+    op.execute(f"""
+        INSERT INTO payment_rollup_monthly (month, local_month, method, method_channel, n_payments, amount_sum)
+        SELECT date_trunc('month', created_at)::date, date_trunc('month', {_local('created_at')})::date,
+               method, coalesce(method_channel, ''), count(*), sum(amount)
+        FROM payments WHERE created_at IS NOT NULL
+        GROUP BY 1, 2, 3, 4
+    """)
+    op.execute(f"""
+        INSERT INTO attendance_rollup_daily (day, local_day, n_checkins)
+        SELECT checkin_at::date, {_local('checkin_at')}::date, count(*) FROM attendances GROUP BY 1, 2
+    """)
+    op.execute(f"""
+        INSERT INTO client_rollup_daily (day, local_day, n_new)
+        SELECT join_date::date, {_local('join_date')}::date, count(*)
+        FROM clients WHERE join_date IS NOT NULL GROUP BY 1, 2
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('client_rollup_daily')
+    op.drop_table('attendance_rollup_daily')
+    op.drop_table('payment_rollup_monthly')
+    op.drop_table('payment_rollup_daily')
@@ -0,0 +1,67 @@
+"""composite indexes for list and report queries
+
+Revision ID: c9f1a3d7e502
+Revises: b8e4f2a6d913
+Create Date: 2026-10-19 01:22:48.770931
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c9f1a3d7e502'
+down_revision: Union[str, Sequence[str], None] = 'b8e4f2a6d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # payments: orden de list_payments (con y sin client_id) y rango de created_at de los reportes.
+    # ix_payments_client_id sobra: client_id ya encabeza uq_payment_period y el índice nuevo
+    op.create_index('ix_payments_period_order', 'payments', [
+        sa.text('period_year DESC'), sa.text('period_month DESC'),
+        sa.text('created_at DESC NULLS LAST'), sa.text('id DESC'),
+    ], unique=False)
+    op.create_index('ix_payments_client_period_order', 'payments', [
+        'client_id', sa.text('period_year DESC'), sa.text('period_month DESC'),
+        sa.text('created_at DESC NULLS LAST'), sa.text('id DESC'),
+    ], unique=False)
+    op.create_index('ix_payments_created_at_cover', 'payments', ['created_at'], unique=False,
+                    postgresql_include=['client_id', 'method', 'method_channel', 'amount'])
+    op.drop_index('ix_payments_client_id', table_name='payments')
+
+    # attendances (particionada: cada índice se crea en todas las particiones)
+    op.create_index('ix_attendances_checkin_at_id', 'attendances', ['checkin_at', 'id'], unique=False)
+    op.create_index('ix_attendances_client_checkin', 'attendances', ['client_id', 'checkin_at', 'id'], unique=False)
+    op.drop_index('ix_attendances_checkin_at', table_name='attendances')
+    op.drop_index('ix_attendances_client_id', table_name='attendances')
+
+    # clients: order_dir=desc sobre columnas que admiten NULL (ORDER BY ... DESC NULLS LAST)
+    op.create_index('ix_clients_join_date_desc', 'clients',
+                    [sa.text('join_date DESC NULLS LAST'), sa.text('id DESC')], unique=False)
+    op.create_index('ix_clients_last_paid_desc', 'clients', [
+        sa.text('last_paid_year DESC NULLS LAST'), sa.text('last_paid_month DESC NULLS LAST'), sa.text('id DESC'),
+    ], unique=False)
+    op.create_index('ix_clients_last_checkin_at_desc', 'clients',
+                    [sa.text('last_checkin_at DESC NULLS LAST'), sa.text('id DESC')], unique=False)
+    op.execute("ANALYZE payments")
+    op.execute("ANALYZE attendances")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clients_last_checkin_at_desc', table_name='clients')
+    op.drop_index('ix_clients_last_paid_desc', table_name='clients')
+    op.drop_index('ix_clients_join_date_desc', table_name='clients')
+    op.create_index('ix_attendances_client_id', 'attendances', ['client_id'], unique=False)
+    op.create_index('ix_attendances_checkin_at', 'attendances', ['checkin_at'], unique=False)
+    op.drop_index('ix_attendances_client_checkin', table_name='attendances')
+    op.drop_index('ix_attendances_checkin_at_id', table_name='attendances')
+    op.create_index('ix_payments_client_id', 'payments', ['client_id'], unique=False)
+    op.drop_index('ix_payments_created_at_cover', table_name='payments')
+    op.drop_index('ix_payments_client_period_order', table_name='payments')
+    op.drop_index('ix_payments_period_order', table_name='payments')
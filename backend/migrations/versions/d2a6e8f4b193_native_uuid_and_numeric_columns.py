@@ -0,0 +1,91 @@
+"""native uuid and numeric columns
+
+Revision ID: d2a6e8f4b193
+Revises: c9f1a3d7e502
+Create Date: 2026-10-19 11:02:47.530912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2a6e8f4b193'
+down_revision: Union[str, Sequence[str], None] = 'c9f1a3d7e502'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columnas con ids (str(uuid4()) guardado como texto) que pasan a uuid nativo
+ID_COLUMNS = {
+    'users': ['id'],
+    'clients': ['id', 'created_by_user_id'],
+    'payments': ['id', 'client_id', 'created_by_user_id'],
+    'attendances': ['id', 'client_id', 'coach_id'],
+    'checkin_idempotency_keys': ['attendance_id', 'client_id'],
+}
+# Montos: Float -> Numeric (pesos con centavos)
+MONEY_COLUMNS = {
+    'payments': [('amount', 'numeric(12,2)')],
+    'payment_rollup_daily': [('amount_sum', 'numeric(14,2)')],
+    'payment_rollup_monthly': [('amount_sum', 'numeric(14,2)')],
+}
+# (tabla, columna, tabla referenciada, ondelete)
+FOREIGN_KEYS = [
+    ('clients', 'created_by_user_id', 'users', 'SET NULL'),
+    ('payments', 'client_id', 'clients', 'CASCADE'),
+    ('payments', 'created_by_user_id', 'users', 'SET NULL'),
+    ('attendances', 'client_id', 'clients', 'CASCADE'),
+    ('attendances', 'coach_id', 'users', 'SET NULL'),
+    ('checkin_idempotency_keys', 'client_id', 'clients', 'CASCADE'),
+]
+
+
+def _fk_name(table: str, column: str) -> str:
+    return f'{table}_{column}_fkey'
+
+
+def _drop_foreign_keys() -> None:
+    # Postgres no deja cambiar el tipo de una columna referenciada: se bajan todas las FKs y
+    # se recrean al final. Los nombres se leen del catálogo (al particionar attendances
+    # quedaron con sufijo); conparentid = 0 deja afuera las copias de cada partición.
+    rows = op.get_bind().execute(sa.text(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint "
+        "WHERE contype = 'f' AND conparentid = 0 AND conrelid::regclass::text = ANY(:tables)"
+    ), {'tables': sorted({t for t, *_ in FOREIGN_KEYS})}).all()
+    for table, name in rows:
+        op.drop_constraint(name, table, type_='foreignkey')
+
+
+def _create_foreign_keys() -> None:
+    for table, column, referent, ondelete in FOREIGN_KEYS:
+        op.create_foreign_key(_fk_name(table, column), table, referent, [column], ['id'], ondelete=ondelete)
+
+
+def _alter(table: str, changes: list[tuple[str, str, str]]) -> None:
+    # Un solo ALTER TABLE por tabla: cada cambio de tipo reescribe la tabla y sus índices
+    op.execute(f"ALTER TABLE {table} " + ", ".join(
+        f"ALTER COLUMN {col} TYPE {type_} USING {using}" for col, type_, using in changes
+    ))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    _drop_foreign_keys()
+    for table in dict.fromkeys([*ID_COLUMNS, *MONEY_COLUMNS]):
+        _alter(table, [(col, 'uuid', f'{col}::uuid') for col in ID_COLUMNS.get(table, [])]
+                      + [(col, type_, f'round({col}::numeric, 2)') for col, type_ in MONEY_COLUMNS.get(table, [])])
+    _create_foreign_keys()
+    for table in dict.fromkeys([*ID_COLUMNS, *MONEY_COLUMNS]):
+        op.execute(f"ANALYZE {table}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, column, *_ in FOREIGN_KEYS:
+        op.drop_constraint(_fk_name(table, column), table, type_='foreignkey')
+    for table in dict.fromkeys([*ID_COLUMNS, *MONEY_COLUMNS]):
+        _alter(table, [(col, 'varchar', f'{col}::text') for col in ID_COLUMNS.get(table, [])]
+                      + [(col, 'double precision', f'{col}::double precision') for col, _ in MONEY_COLUMNS.get(table, [])])
+    _create_foreign_keys()
@@ -0,0 +1,54 @@
+"""table versions for etags
+
+Revision ID: d5b2c7e9a410
+Revises: c3e8a1f05d27
+Create Date: 2026-10-18 16:20:51.337402
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b2c7e9a410'
+down_revision: Union[str, Sequence[str], None] = 'c3e8a1f05d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TABLES = ("clients", "payments", "attendances")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    for t in TABLES:
+        op.execute(f"INSERT INTO table_versions (table_name, version) VALUES ('{t}', 0)")
+
+    # Un incremento por sentencia (no por fila): un INSERT masivo cuesta un solo UPDATE
+    op.execute("""
+        CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    for t in TABLES:
+        op.execute(
+            f"CREATE TRIGGER trg_{t}_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {t} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for t in TABLES:
+        op.execute(f"DROP TRIGGER IF EXISTS trg_{t}_version ON {t}")
+    op.execute("DROP FUNCTION IF EXISTS bump_table_version()")
+    op.drop_table('table_versions')
@@ -0,0 +1,67 @@
+"""shard table versions
+
+Revision ID: e2b7c4a9d158
+Revises: d2a6e8f4b193
+Create Date: 2026-10-20 09:14:03.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7c4a9d158'
+down_revision: Union[str, Sequence[str], None] = 'd2a6e8f4b193'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Con una sola fila por tabla, cada escritura tomaba el lock de esa fila hasta el commit y
+# las transacciones que escriben la misma tabla quedaban en fila (p.ej. todos los check-ins,
+# que además tocan clients.last_checkin_at). Ahora cada conexión incrementa su propio
+# contador (slot = pid % SLOTS) y la versión de la tabla es la suma: solo esperan dos
+# conexiones que caen en el mismo slot.
+SLOTS = 64
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('table_versions', sa.Column('slot', sa.SmallInteger(), nullable=False, server_default='0'))
+    op.alter_column('table_versions', 'slot', server_default=None)
+    op.drop_constraint('table_versions_pkey', 'table_versions', type_='primary')
+    op.create_primary_key('table_versions_pkey', 'table_versions', ['table_name', 'slot'])
+    op.execute(f"""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name, slot, version)
+            VALUES (TG_TABLE_NAME, pg_backend_pid() % {SLOTS}, 1)
+            ON CONFLICT (table_name, slot) DO UPDATE SET version = table_versions.version + 1;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE table_versions SET version = version + 1 WHERE table_name = TG_TABLE_NAME;
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    # Una fila por tabla otra vez (slot 0, que crea la migración anterior) con la suma:
+    # la versión no retrocede
+    op.execute("""
+        UPDATE table_versions t SET version = s.total FROM (
+            SELECT table_name, sum(version) AS total FROM table_versions GROUP BY table_name
+        ) s
+        WHERE t.table_name = s.table_name AND t.slot = 0
+    """)
+    op.execute("DELETE FROM table_versions WHERE slot <> 0")
+    op.drop_constraint('table_versions_pkey', 'table_versions', type_='primary')
+    op.drop_column('table_versions', 'slot')
+    op.create_primary_key('table_versions_pkey', 'table_versions', ['table_name'])
@@ -0,0 +1,34 @@
+"""client dedupe key indexes
+
+Revision ID: e81f4a6c2b93
+Revises: d5b2c7e9a410
+Create Date: 2026-10-18 18:02:14.918265
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e81f4a6c2b93'
+down_revision: Union[str, Sequence[str], None] = 'd5b2c7e9a410'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Claves de deduplicación de /clients/bulk: email en minúsculas y teléfono solo dígitos
+    op.create_index('ix_clients_email_lower', 'clients', [sa.text('lower(email)')], unique=False)
+    op.create_index('ix_clients_phone_digits', 'clients', [sa.text("regexp_replace(phone, '[^0-9]', '', 'g')")], unique=False)
+    # Las estadísticas de un índice por expresión solo existen después de un ANALYZE:
+    # sin ellas el planner estima 0.5% de la tabla por clave y no usa estos índices
+    op.execute("ANALYZE clients")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_clients_phone_digits', table_name='clients')
+    op.drop_index('ix_clients_email_lower', table_name='clients')
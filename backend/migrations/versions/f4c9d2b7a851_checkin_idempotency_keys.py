@@ -0,0 +1,38 @@
+"""checkin idempotency keys
+
+Revision ID: f4c9d2b7a851
+Revises: e81f4a6c2b93
+Create Date: 2026-10-18 19:11:37.402518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f4c9d2b7a851'
+down_revision: Union[str, Sequence[str], None] = 'e81f4a6c2b93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('checkin_idempotency_keys',
+    sa.Column('key', sa.String(), nullable=False),
+    sa.Column('attendance_id', sa.String(), nullable=False),
+    sa.Column('client_id', sa.String(), nullable=False),
+    sa.Column('checkin_at', sa.DateTime(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['clients.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_checkin_idempotency_keys_client_id'), 'checkin_idempotency_keys', ['client_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_checkin_idempotency_keys_client_id'), table_name='checkin_idempotency_keys')
+    op.drop_table('checkin_idempotency_keys')
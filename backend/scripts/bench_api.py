@@ -0,0 +1,365 @@
+# scripts/bench_api.py
+"""
+Benchmark de la API contra un Postgres local: siembra una base por escala, levanta uvicorn
+y recorre los endpoints principales (listados, búsqueda, status, check-in, alta de pago y
+todos los reportes) con la concurrencia pedida. Escribe p50/p95/p99 y RPS por escenario en
+un JSON para comparar entre commits.
+
+  python scripts/bench_api.py --scale 1k --out bench-1k.json
+  python scripts/bench_api.py --scale 100k --concurrency 50 --requests 2000 --workers 2 --out nuevo.json
+  python scripts/bench_api.py --scale 100k --compare viejo.json --out nuevo.json
+  python scripts/bench_api.py --url http://127.0.0.1:8000 --scenarios reports   # API ya levantada
+
+La base de cada escala es la de DATABASE_URL con sufijo (gym -> gym_bench_100k). Se crea,
+migra y siembra la primera vez y después se reutiliza (--reseed la vuelve a armar). Los
+pagos y check-ins que crea el benchmark se borran al final, así corridas sucesivas miden
+lo mismo.
+"""
+import os, sys
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND)
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+import httpx
+from sqlalchemy import create_engine, delete, select, text, func
+from sqlalchemy.engine import make_url
+
+from app.config import settings
+from app import models
+
+SCALES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+OWNER_EMAIL, OWNER_PASSWORD = "owner@librefuncional.com", "Cambiar123"  # scripts/create_owner.py
+BENCH_YEAR = 2090  # los pagos del benchmark van a períodos que ningún seed usa
+
+
+# ---------- base por escala ----------
+def scale_url(base_url: str, scale: str) -> str:
+    url = make_url(base_url)
+    return url.set(database=f"{url.database}_bench_{scale}").render_as_string(hide_password=False)
+
+
+def prepare_database(url: str, n_clients: int, reseed: bool, workers: int) -> None:
+    """Crea (o recrea) la base, la migra a head y la siembra si está vacía."""
+    target = make_url(url)
+    admin = create_engine(target.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        exists = conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :d"), {"d": target.database}).scalar()
+        if exists and reseed:
+            conn.execute(text(f'DROP DATABASE "{target.database}" WITH (FORCE)'))
+            exists = False
+        if not exists:
+            conn.execute(text(f'CREATE DATABASE "{target.database}"'))
+            print(f"✅ Base {target.database} creada")
+    admin.dispose()
+
+    from alembic import command
+    from alembic.config import Config
+    cfg = Config(os.path.join(BACKEND, "alembic.ini"))
+    cfg.set_main_option("sqlalchemy.url", url.replace("%", "%%"))
+    command.upgrade(cfg, "head")
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        have = conn.execute(select(func.count()).select_from(models.Client)).scalar()
+    engine.dispose()
+    if have:
+        if have != n_clients:
+            print(f"⚠️  {target.database} ya tiene {have} clientes (se pidieron {n_clients}); --reseed para rearmarla")
+        return
+
+    env = {**os.environ, "DATABASE_URL": url, "PYTHONPATH": BACKEND}
+    t0 = time.perf_counter()
+    # base recién creada: seed.py puede bajar los índices durante la carga
+    for cmd in (["create_owner.py"],
+                ["seed.py", "--n", str(n_clients), "--workers", str(workers), "--drop-indexes",
+                 # ~6 check-ins por cliente activo en los 60 días (el default de seed.py son 10–30 por día)
+                 "--checkins-per-day", str(max(1, n_clients // 24)), str(max(1, n_clients // 8))]):
+        print(f"  → {' '.join(cmd)}")
+        subprocess.run([sys.executable, os.path.join(BACKEND, "scripts", cmd[0]), *cmd[1:]],
+                       env=env, cwd=BACKEND, check=True, stdout=subprocess.DEVNULL)
+    print(f"✅ Base sembrada en {time.perf_counter() - t0:.0f}s")
+
+
+# ---------- servidor ----------
+SERVER_LOG = os.path.join(BACKEND, "logs", "bench_server.log")
+
+
+def start_server(url: str, port: int, workers: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": url}
+    env.pop("ASYNC_DATABASE_URL", None)  # que la API use la base del benchmark
+    os.makedirs(os.path.dirname(SERVER_LOG), exist_ok=True)
+    with open(SERVER_LOG, "w") as log:  # la consola del server (log de acceso por request) va al archivo
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=BACKEND, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            sys.exit(f"❌ uvicorn terminó al arrancar (ver {SERVER_LOG})")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/healthz", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    sys.exit("❌ uvicorn no respondió en 60s")
+
+
+# ---------- escenarios ----------
+@dataclass
+class Fixtures:
+    """Datos reales de la base para armar requests variados (y reproducibles con la semilla)."""
+    client_ids: list[str]
+    terms: list[str]
+    last_day: date
+    issued: int = 0  # requests armados hasta ahora (numera los períodos de los pagos)
+    created: dict[str, list[str]] = field(default_factory=lambda: {"payments": [], "attendances": []})
+
+
+def load_fixtures(url: str) -> Fixtures:
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        rows = conn.execute(
+            select(models.Client.id, models.Client.full_name)
+            .where(models.Client.is_active.is_(True)).order_by(models.Client.id).limit(5000)
+        ).all()
+        last = conn.execute(select(func.max(models.Payment.created_at))).scalar()
+    engine.dispose()
+    if not rows:
+        sys.exit("❌ La base no tiene clientes activos")
+    terms = sorted({w[:4] for _, name in rows for w in name.split() if len(w) >= 4})
+    return Fixtures([str(r.id) for r in rows], terms, (last or datetime.utcnow()).date())
+
+
+Request = tuple[str, str, Optional[dict]]  # (método, path, body JSON)
+
+
+def _range(fx: Fixtures, rnd: random.Random) -> str:
+    # rangos distintos en cada request: se mide la consulta, no solo el cache de reportes
+    end = fx.last_day - timedelta(days=rnd.randint(0, 120))
+    start = end - timedelta(days=rnd.choice([6, 13, 29, 89]))
+    return f"start={start}&end={end}"
+
+
+def _payment(fx: Fixtures, rnd: random.Random, i: int) -> Request:
+    # (cliente, período) distinto en cada request: sin 409 por la regla de un pago por mes
+    n = len(fx.client_ids)
+    period = i // n
+    return ("POST", "/payments/", {
+        "client_id": fx.client_ids[i % n], "amount": rnd.choice([8000, 9000, 10000, 12000]),
+        "method": rnd.choice(["cash", "transfer"]),
+        "period_year": BENCH_YEAR + period // 12, "period_month": period % 12 + 1,
+    })
+
+
+SCENARIOS: dict[str, Callable[[Fixtures, random.Random, int], Request]] = {
+    "clients.list": lambda fx, rnd, i: ("GET", "/clients/?limit=50&count=none&order_by=" + rnd.choice(
+        ["full_name", "join_date&order_dir=desc", "last_payment&order_dir=desc"]), None),
+    "clients.search": lambda fx, rnd, i: ("GET", f"/clients/?q={rnd.choice(fx.terms)}&limit=20&count=none", None),
+    "clients.status": lambda fx, rnd, i: ("GET", "/clients/status?up_to_date=false&limit=50&count=none", None),
+    "payments.list": lambda fx, rnd, i: ("GET", rnd.choice([
+        "/payments/?limit=50&cursor=&count=none",
+        f"/payments/?client_id={rnd.choice(fx.client_ids)}&limit=50&cursor=&count=none"]), None),
+    "attendance.list": lambda fx, rnd, i: ("GET", "/attendance/?limit=50&cursor=&count=none", None),
+    "attendance.checkin": lambda fx, rnd, i: ("POST", "/attendance/checkin", {"client_id": rnd.choice(fx.client_ids)}),
+    "payments.create": _payment,
+    "reports.kpis": lambda fx, rnd, i: ("GET", f"/payments/reports/kpis?{_range(fx, rnd)}", None),
+    "reports.by_method": lambda fx, rnd, i: ("GET", f"/payments/reports/by_method?{_range(fx, rnd)}", None),
+    "reports.by_channel": lambda fx, rnd, i: ("GET", f"/payments/reports/by_channel?{_range(fx, rnd)}", None),
+    "reports.timeseries": lambda fx, rnd, i: ("GET", f"/payments/reports/timeseries?{_range(fx, rnd)}&bucket=day", None),
+    "reports.attendance": lambda fx, rnd, i: ("GET", f"/reports/attendance?{_range(fx, rnd)}&bucket=day", None),
+    "reports.new_clients": lambda fx, rnd, i: ("GET", f"/reports/new_clients?{_range(fx, rnd)}", None),
+    "reports.revenue": lambda fx, rnd, i: ("GET", f"/reports/revenue?{_range(fx, rnd)}&bucket=week", None),
+    "reports.dashboard": lambda fx, rnd, i: ("GET", f"/reports/dashboard?{_range(fx, rnd)}", None),
+}
+
+
+def pct(values: list[float], p: int) -> float:
+    return statistics.quantiles(values, n=100)[p - 1] if len(values) > 1 else values[0]
+
+
+async def run_scenario(client: httpx.AsyncClient, fx: Fixtures, name: str, n: int,
+                       concurrency: int, seed: int) -> dict:
+    rnd = random.Random(f"{seed}:{name}")
+    make = SCENARIOS[name]
+    requests = [make(fx, rnd, fx.issued + i) for i in range(n)]
+    fx.issued += n
+    timings: list[float] = []
+    errors: dict[str, int] = {}
+    pending = iter(requests)
+
+    async def worker():
+        for method, path, body in pending:  # el iterador se comparte: cada request sale una vez
+            t0 = time.perf_counter()
+            try:
+                r = await client.request(method, path, json=body)
+                if r.status_code >= 400:
+                    errors[str(r.status_code)] = errors.get(str(r.status_code), 0) + 1
+                elif method == "POST":
+                    fx.created["payments" if path.startswith("/payments") else "attendances"].append(r.json()["id"])
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+            timings.append((time.perf_counter() - t0) * 1000)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+    return {
+        "requests": len(timings),
+        "errors": errors,
+        "rps": round(len(timings) / elapsed, 1),
+        "p50_ms": round(pct(timings, 50), 2),
+        "p95_ms": round(pct(timings, 95), 2),
+        "p99_ms": round(pct(timings, 99), 2),
+        "max_ms": round(max(timings), 2),
+    }
+
+
+async def run(base_url: str, fx: Fixtures, names: list[str], args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        r = await client.post("/auth/token", data={"username": args.email, "password": args.password})
+        r.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+        results = {}
+        for name in names:
+            if args.warmup:
+                await run_scenario(client, fx, name, args.warmup, args.concurrency, args.seed + 1)
+            results[name] = res = await run_scenario(client, fx, name, args.requests, args.concurrency, args.seed)
+            err = f"  errores={res['errors']}" if res["errors"] else ""
+            print(f"  {name:20s} rps={res['rps']:8.1f}  p50={res['p50_ms']:7.1f}ms  "
+                  f"p95={res['p95_ms']:7.1f}ms  p99={res['p99_ms']:7.1f}ms{err}")
+        return results
+
+
+def cleanup(url: str, fx: Fixtures) -> None:
+    """Borra lo que escribió el benchmark y deja rollups y columnas de actividad como estaban."""
+    if not any(fx.created.values()):
+        return
+    from sqlalchemy.orm import Session
+    from scripts.rebuild_rollups import rebuild
+    from scripts.reconcile_client_activity import reconcile
+    engine = create_engine(url)
+    with Session(engine) as db:
+        for model, key in ((models.Payment, "payments"), (models.Attendance, "attendances")):
+            ids = [uuid.UUID(i) for i in fx.created[key]]
+            if ids:
+                db.execute(delete(model).where(model.id.in_(ids)))
+        rebuild(db)
+        reconcile(db)
+        db.commit()
+    engine.dispose()
+
+
+def table_counts(url: str) -> dict:
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        counts = {m.__tablename__: conn.execute(select(func.count()).select_from(m)).scalar()
+                  for m in (models.Client, models.Payment, models.Attendance)}
+        counts["postgres"] = conn.execute(text("SHOW server_version")).scalar()
+    engine.dispose()
+    return counts
+
+
+def git_commit() -> Optional[str]:
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, text=True).strip()
+        dirty = subprocess.run(["git", "diff", "--quiet", "HEAD"], cwd=BACKEND).returncode != 0
+        return sha + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path: str, new: dict) -> None:
+    with open(old_path) as f:
+        old = json.load(f)
+    print(f"\nvs {old_path} ({old['meta'].get('commit')}):")
+    for name, res in new["scenarios"].items():
+        prev = old["scenarios"].get(name)
+        if not prev:
+            continue
+        deltas = "  ".join(
+            f"{k}={res[k]:.1f} ({(res[k] - prev[k]) / prev[k] * 100:+.0f}%)" if prev[k] else f"{k}={res[k]:.1f}"
+            for k in ("rps", "p50_ms", "p95_ms", "p99_ms")
+        )
+        print(f"  {name:20s} {deltas}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la API (latencia y throughput por endpoint)")
+    parser.add_argument("--scale", choices=list(SCALES), default="1k", help="Cantidad de clientes de la base sembrada")
+    parser.add_argument("--reseed", action="store_true", help="Borra y vuelve a sembrar la base de la escala")
+    parser.add_argument("--url", help="API ya levantada (no siembra ni arranca uvicorn; usa DATABASE_URL)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=1, help="Workers de uvicorn")
+    parser.add_argument("--seed-workers", type=int, default=os.cpu_count() or 1,
+                        help="Procesos de scripts/seed.py al sembrar la base")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests simultáneos")
+    parser.add_argument("--requests", type=int, default=500, help="Requests por escenario")
+    parser.add_argument("--warmup", type=int, default=50, help="Requests previos (no medidos) por escenario")
+    parser.add_argument("--scenarios", default="", help="Prefijos separados por coma (p.ej. reports,clients.list)")
+    parser.add_argument("--seed", type=int, default=4242)
+    parser.add_argument("--email", default=OWNER_EMAIL)
+    parser.add_argument("--password", default=OWNER_PASSWORD)
+    parser.add_argument("--out", help="Archivo JSON con el resultado (por defecto bench-<escala>.json)")
+    parser.add_argument("--compare", help="JSON de una corrida anterior: imprime la diferencia")
+    args = parser.parse_args()
+
+    prefixes = [p.strip() for p in args.scenarios.split(",") if p.strip()]
+    names = [n for n in SCENARIOS if not prefixes or any(n.startswith(p) for p in prefixes)]
+    if not names:
+        sys.exit(f"❌ Ningún escenario coincide con {args.scenarios!r}: {', '.join(SCENARIOS)}")
+
+    server = None
+    if args.url:
+        db_url, base_url = settings.DATABASE_URL, args.url
+    else:
+        db_url, base_url = scale_url(settings.DATABASE_URL, args.scale), f"http://127.0.0.1:{args.port}"
+        prepare_database(db_url, SCALES[args.scale], args.reseed, args.seed_workers)
+        server = start_server(db_url, args.port, args.workers)
+
+    fx = load_fixtures(db_url)
+    meta = {
+        "commit": git_commit(),
+        "at": datetime.utcnow().isoformat(timespec="seconds"),
+        "scale": None if args.url else args.scale,
+        "rows": table_counts(db_url),
+        "concurrency": args.concurrency,
+        "requests_per_scenario": args.requests,
+        "workers": None if args.url else args.workers,
+        "python": platform.python_version(),
+    }
+    print(f"commit={meta['commit']} filas={meta['rows']} concurrency={args.concurrency} requests={args.requests}")
+    try:
+        scenarios = asyncio.run(run(base_url, fx, names, args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+        cleanup(db_url, fx)
+
+    result = {"meta": meta, "scenarios": scenarios}
+    out = args.out or f"bench-{args.scale if not args.url else 'url'}.json"
+    with open(out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"✅ Resultado en {out}")
+    if args.compare:
+        compare(args.compare, result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# scripts/bench_column_types.py
+"""
+Tamaño de índices y latencia de consultas con JOIN por client_id, para comparar los ids
+como texto (String con el uuid) contra uuid nativo y Float contra Numeric (migración
+d2a6e8f4b193). Correrlo sobre la misma base antes y después de migrar:
+
+  python scripts/seed.py --n 100000
+  python scripts/bench_column_types.py --runs 30 --json antes.json
+  alembic upgrade head
+  python scripts/bench_column_types.py --runs 30 --json despues.json
+
+Las consultas van en SQL plano (no dependen de los tipos del modelo en uso).
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+
+TABLES = ("users", "clients", "payments", "attendances", "checkin_idempotency_keys")
+
+# Suma las particiones: en attendances cada índice del padre es un índice por mes
+_INDEX_SIZES = text("""
+SELECT i.indrelid::regclass::text AS tbl, c.relname AS idx,
+       pg_relation_size(i.indexrelid) + coalesce((SELECT sum(pg_relation_size(t.relid))
+                                                  FROM pg_partition_tree(i.indexrelid) t), 0) AS bytes
+  FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+ WHERE i.indrelid::regclass::text = ANY(:tables)
+ ORDER BY 1, 2
+""")
+
+QUERIES = {
+    # facturación por cliente: recorre todos los pagos y los une con clients
+    "revenue_by_client": """
+        SELECT c.id, c.full_name, sum(p.amount) AS total
+          FROM payments p JOIN clients c ON c.id = p.client_id
+         GROUP BY c.id, c.full_name ORDER BY total DESC LIMIT 20
+    """,
+    # check-ins del último mes de clientes que no pagaron ese mes (anti-join)
+    "checkins_without_payment": """
+        SELECT count(*)
+          FROM attendances a JOIN clients c ON c.id = a.client_id
+         WHERE a.checkin_at >= CAST(:since AS timestamp)
+           AND NOT EXISTS (SELECT 1 FROM payments p
+                            WHERE p.client_id = a.client_id
+                              AND p.period_year = extract(year FROM a.checkin_at)
+                              AND p.period_month = extract(month FROM a.checkin_at))
+    """,
+    # ranking de asistencia del último mes con el nombre del cliente
+    "top_attendance": """
+        SELECT c.full_name, count(*) AS n
+          FROM attendances a JOIN clients c ON c.id = a.client_id
+         WHERE a.checkin_at >= CAST(:since AS timestamp)
+         GROUP BY c.id, c.full_name ORDER BY n DESC LIMIT 20
+    """,
+    # clientes únicos de /payments/reports/kpis sobre 90 días
+    "unique_clients_90d": """
+        SELECT count(DISTINCT client_id) FROM payments
+         WHERE created_at >= CAST(:since AS timestamp) - interval '60 days'
+    """,
+    # página de /payments con el cliente (JOIN + orden del listado)
+    "payments_page": """
+        SELECT p.*, c.full_name FROM payments p JOIN clients c ON c.id = p.client_id
+         ORDER BY p.period_year DESC, p.period_month DESC, p.created_at DESC NULLS LAST, p.id DESC LIMIT 50
+    """,
+    "revenue_total": "SELECT sum(amount) FROM payments",
+}
+
+
+def index_sizes(db) -> dict[str, dict[str, int]]:
+    out: dict[str, dict[str, int]] = {}
+    for tbl, idx, size in db.execute(_INDEX_SIZES, {"tables": list(TABLES)}):
+        out.setdefault(tbl, {})[idx] = int(size or 0)
+    return out
+
+
+def time_query(db, sql: str, params: dict, runs: int) -> dict:
+    stmt = text(sql)
+    db.execute(stmt, params).all()  # calentamiento (caché de páginas)
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        db.execute(stmt, params).all()
+        timings.append((time.perf_counter() - t0) * 1000)
+    timings.sort()
+    return {
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tamaño de índices y latencia de JOINs por client_id")
+    parser.add_argument("--runs", type=int, default=20, help="Ejecuciones por consulta")
+    parser.add_argument("--json", help="Guarda el resultado en este archivo (para comparar antes/después)")
+    args = parser.parse_args()
+
+    with SessionLocal() as db:
+        types = dict(db.execute(text(
+            "SELECT table_name || '.' || column_name, data_type FROM information_schema.columns "
+            "WHERE (table_name, column_name) IN (('clients', 'id'), ('payments', 'client_id'), ('payments', 'amount'))"
+        )).all())
+        last = db.execute(text("SELECT max(checkin_at) FROM attendances")).scalar()
+        # último mes de datos (no de reloj): la base puede estar sembrada hace tiempo
+        params = {"since": (last or datetime.utcnow()) - timedelta(days=30)}
+        sizes = index_sizes(db)
+        timings = {name: time_query(db, sql, params, args.runs) for name, sql in QUERIES.items()}
+        revenue = db.execute(text(QUERIES["revenue_total"])).scalar()
+        db.rollback()
+
+    print("Tipos: " + ", ".join(f"{k}={v}" for k, v in sorted(types.items())))
+    print("\nÍndices (MB):")
+    for tbl, idxs in sizes.items():
+        print(f"  {tbl}: {sum(idxs.values()) / 2**20:.1f}")
+        for idx, size in idxs.items():
+            print(f"    {idx:42s} {size / 2**20:8.1f}")
+    print("\nConsultas:")
+    for name, t in timings.items():
+        print(f"  {name:26s} p50={t['p50_ms']:8.2f}ms  p95={t['p95_ms']:8.2f}ms")
+    print(f"\nsum(amount) = {revenue!r}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"types": types, "index_bytes": sizes, "queries": timings, "revenue_total": str(revenue)}, f, indent=2)
+        print(f"✅ Resultado en {args.json}")
+
+
+if __name__ == "__main__":
+    main()
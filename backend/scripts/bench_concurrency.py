@@ -0,0 +1,93 @@
+# scripts/bench_concurrency.py
+"""
+Carga concurrente contra una API levantada (uvicorn) para medir throughput y latencia
+de las lecturas calientes: listados, check-in por q y reportes.
+
+  uvicorn app.main:app --port 8000 --workers 1
+  python scripts/bench_concurrency.py --url http://127.0.0.1:8000 --concurrency 200 --requests 4000
+
+Sirve para comparar antes/después (p.ej. handlers sync en el threadpool vs. async con asyncpg)
+con la misma base y la misma cantidad de workers.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+# Lecturas cortas (sin COUNT exacto): se mide el costo por request del servidor,
+# no el de un escaneo grande que satura la base igual con cualquier modelo de I/O.
+RANGE = "start=2026-09-01&end=2026-09-07"
+ENDPOINTS = [
+    "/clients/?limit=50&count=none",
+    "/clients/?q=mar&limit=20&count=none",
+    "/payments/?limit=50&cursor=&count=none",
+    "/attendance/?limit=50&cursor=&count=none",
+    f"/reports/attendance?{RANGE}&bucket=day",
+    f"/payments/reports/kpis?{RANGE}",
+]
+
+
+def pct(values: list[float], p: float) -> float:
+    return statistics.quantiles(values, n=100)[int(p) - 1] if len(values) > 1 else values[0]
+
+
+async def worker(client: httpx.AsyncClient, queue: asyncio.Queue, timings: list, errors: list):
+    while True:
+        try:
+            path = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        t0 = time.perf_counter()
+        try:
+            r = await client.get(path)
+            if r.status_code >= 400:
+                errors.append(r.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        timings.append((time.perf_counter() - t0) * 1000)
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.url, limits=limits, timeout=60) as client:
+        r = await client.post("/auth/token", data={"username": args.email, "password": args.password})
+        r.raise_for_status()
+        client.headers["Authorization"] = f"Bearer {r.json()['access_token']}"
+
+        queue: asyncio.Queue = asyncio.Queue()
+        for _ in range(args.requests):
+            queue.put_nowait(random.choice(ENDPOINTS))
+
+        timings: list[float] = []
+        errors: list = []
+        t0 = time.perf_counter()
+        await asyncio.gather(*(worker(client, queue, timings, errors) for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - t0
+
+    print(f"requests={len(timings)} concurrency={args.concurrency} errores={len(errors)}")
+    print(f"rps={len(timings) / elapsed:8.1f}  p50={pct(timings, 50):7.1f}ms  "
+          f"p95={pct(timings, 95):7.1f}ms  max={max(timings):7.1f}ms")
+    if errors:
+        print(f"⚠️  primeros errores: {errors[:10]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de concurrencia de la API.")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--concurrency", type=int, default=200, help="Requests simultáneos")
+    parser.add_argument("--requests", type=int, default=4000, help="Total de requests")
+    parser.add_argument("--email", default="owner@librefuncional.com")
+    parser.add_argument("--password", default="Cambiar123")
+    args = parser.parse_args()
+
+    random.seed(4242)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
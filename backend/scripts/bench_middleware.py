@@ -0,0 +1,139 @@
+# scripts/bench_middleware.py
+"""
+Micro-benchmark del overhead por request del middleware de log de acceso.
+
+Llama a la app ASGI directamente (sin red ni servidor) con un endpoint trivial y mide
+µs por request para: sin middleware, el RequestLogMiddleware anterior (BaseHTTPMiddleware)
+y el actual (ASGI puro), sin y con métricas por ruta. El logger "request" va a un
+NullHandler: se mide el middleware, no la escritura del log. También mide el costo de
+los eventos before/after_cursor_execute de QueryMetrics por consulta.
+
+  python scripts/bench_middleware.py --requests 20000
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from typing import Callable
+
+from fastapi import FastAPI, Request
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.auth import create_access_token, token_claims
+from app.metrics import QueryMetrics, RequestMetrics, current_scope
+from app.middleware import RequestLogMiddleware, logger
+
+
+class LegacyRequestLogMiddleware(BaseHTTPMiddleware):
+    # Copia de la versión anterior (BaseHTTPMiddleware), solo para comparar
+    async def dispatch(self, request: Request, call_next: Callable):
+        start_ns = time.perf_counter_ns()
+        method, path = request.method, request.url.path
+        client = request.client.host if request.client else "unknown"
+        user_label = "Anonymous"
+        payload = token_claims(request)
+        if payload:
+            user_label = payload.get("name") or payload.get("email") or payload.get("sub", "UnknownUser")
+        response = await call_next(request)
+        dur_ms = (time.perf_counter_ns() - start_ns) / 1_000_000
+        logger.info("[%s] %s %s -> %d in %.2fms from %s", user_label, method, path, response.status_code, dur_ms, client)
+        return response
+
+
+def build_app(middleware, **options) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    if middleware:
+        app.add_middleware(middleware, **options)
+    return app
+
+
+async def call(app, headers) -> None:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/ping", "raw_path": b"/ping",
+        "root_path": "", "query_string": b"", "headers": headers,
+        "client": ("127.0.0.1", 5000), "server": ("testserver", 80),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app, headers, n: int) -> float:
+    for _ in range(200):  # calentamiento
+        await call(app, headers)
+    t0 = time.perf_counter()
+    for _ in range(n):
+        await call(app, headers)
+    return (time.perf_counter() - t0) / n * 1_000_000
+
+
+class _Context:
+    # lo único que QueryMetrics usa del ExecutionContext es un atributo propio
+    pass
+
+
+def measure_query_events(n: int) -> float:
+    metrics, context = QueryMetrics(), _Context()
+    statement = "SELECT clients.id, clients.full_name FROM clients WHERE clients.id = $1::UUID"
+    token = current_scope.set({"method": "GET", "route": None})
+    try:
+        t0 = time.perf_counter()
+        for _ in range(n):
+            metrics._before(None, None, statement, (), context, False)
+            metrics._after(None, None, statement, (), context, False)
+        return (time.perf_counter() - t0) / n * 1_000_000
+    finally:
+        current_scope.reset(token)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Overhead del middleware de log por request.")
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5, help="Se reporta la mediana de las rondas")
+    args = parser.parse_args()
+
+    logger.handlers[:] = [logging.NullHandler()]
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+    token = create_access_token({"sub": "bench", "name": "Bench"})
+    headers = [(b"authorization", f"Bearer {token}".encode())]
+
+    variants = [
+        ("sin middleware", None, {}),
+        ("BaseHTTPMiddleware", LegacyRequestLogMiddleware, {}),
+        ("ASGI puro", RequestLogMiddleware, {}),
+        ("ASGI + métricas", RequestLogMiddleware, {"metrics": RequestMetrics()}),
+    ]
+    results = {}
+    for name, mw, options in variants:
+        app = build_app(mw, **options)
+        rounds = [asyncio.run(measure(app, headers, args.requests)) for _ in range(args.rounds)]
+        results[name] = statistics.median(rounds)
+
+    base = results["sin middleware"]
+    print(f"requests={args.requests} x {args.rounds} rondas")
+    for name, us in results.items():
+        extra = f"  (+{us - base:6.1f}µs)" if name != "sin middleware" else ""
+        print(f"{name:20s} {us:8.1f}µs/request{extra}")
+    print(f"métricas por request: +{results['ASGI + métricas'] - results['ASGI puro']:.1f}µs")
+    query_us = statistics.median(measure_query_events(args.requests) for _ in range(args.rounds))
+    print(f"eventos de consulta:  {query_us:.2f}µs/consulta")
+
+
+if __name__ == "__main__":
+    main()
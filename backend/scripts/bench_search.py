@@ -0,0 +1,92 @@
+# scripts/bench_search.py
+"""
+Compara la latencia de la búsqueda de clientes (q) con y sin los índices pg_trgm.
+
+  python scripts/seed.py --n 100000
+  python scripts/bench_search.py --runs 200
+
+El modo "seqscan" desactiva los index/bitmap scans en la transacción, así que
+reproduce el plan anterior a la migración b7d41c9e2f3a sin tener que bajarla.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import random
+import statistics
+import time
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app import models
+from app.search import client_search_filter, client_search_rank
+
+
+def pick_terms(db, n: int) -> list[str]:
+    # Fragmentos reales de nombre / email / teléfono, como los tipea la recepción
+    rows = db.execute(
+        select(models.Client.full_name, models.Client.email, models.Client.phone)
+        .order_by(models.Client.id)
+        .limit(2000)
+    ).all()
+    terms = []
+    for _ in range(n):
+        name, email, phone = random.choice(rows)
+        kind = random.choice(["name", "email", "phone"])
+        if kind == "name" or not (email or phone):
+            terms.append(random.choice(name.split())[:5])
+        elif kind == "email" and email:
+            terms.append(email.split("@")[0][:6])
+        elif phone:
+            terms.append(phone[-4:])
+        else:
+            terms.append(name[:4])
+    return terms
+
+
+def run(db, terms: list[str], force_seqscan: bool) -> list[float]:
+    timings = []
+    for q in terms:
+        stmt = (
+            select(models.Client.id)
+            .where(client_search_filter(q))
+            .order_by(client_search_rank(q).desc(), models.Client.full_name.asc())
+            .limit(50)
+        )
+        with db.begin():
+            if force_seqscan:
+                db.execute(text("SET LOCAL enable_indexscan = off"))
+                db.execute(text("SET LOCAL enable_bitmapscan = off"))
+            t0 = time.perf_counter()
+            db.execute(stmt).all()
+            timings.append((time.perf_counter() - t0) * 1000)
+    return timings
+
+
+def pct(values: list[float], p: float) -> float:
+    return statistics.quantiles(values, n=100)[int(p) - 1] if len(values) > 1 else values[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de búsqueda de clientes (ILIKE vs pg_trgm).")
+    parser.add_argument("--runs", type=int, default=200, help="Búsquedas por modo")
+    args = parser.parse_args()
+
+    random.seed(4242)
+    engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+    Session = sessionmaker(bind=engine)
+
+    with Session() as db:
+        n_clients = db.execute(text("SELECT count(*) FROM clients")).scalar()
+        terms = pick_terms(db, args.runs)
+        db.commit()
+        print(f"clients={n_clients} runs={args.runs}")
+        for mode, force in (("seqscan", True), ("trgm", False)):
+            run(db, terms[:10], force)  # calentamiento
+            t = run(db, terms, force)
+            print(f"{mode:8s} p50={pct(t, 50):7.2f}ms  p95={pct(t, 95):7.2f}ms  max={max(t):7.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
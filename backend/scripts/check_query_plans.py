@@ -0,0 +1,156 @@
+# scripts/check_query_plans.py
+"""
+Corre EXPLAIN ANALYZE sobre el SQL real de cada endpoint de lectura y falla (exit 1) si
+alguno recorre entera (Seq Scan) una tabla grande. Pensado para una base sembrada:
+
+  python scripts/seed.py --n 100000
+  python scripts/check_query_plans.py
+  python scripts/check_query_plans.py --verbose   # imprime el plan de cada consulta
+
+Las requests van a la app en el mismo proceso (sin uvicorn); el SQL se captura con el
+evento before_cursor_execute y después se explica con los mismos parámetros. Tablas con
+menos de --min-rows filas estimadas no cuentan: ahí un Seq Scan es lo más barato.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import asyncio
+import json
+import logging
+from datetime import date, timedelta
+
+import httpx
+from sqlalchemy import event, select
+
+from app.auth import create_access_token
+from app.database import SessionLocal, async_engine
+from app.main import app
+from app import models
+
+
+def endpoints(db) -> list[str]:
+    """Lecturas a revisar, con ids/rangos reales de la base."""
+    client_id = db.execute(
+        select(models.Payment.client_id).order_by(models.Payment.created_at.desc()).limit(1)
+    ).scalar()
+    last = db.execute(select(models.Attendance.checkin_at).order_by(models.Attendance.checkin_at.desc()).limit(1)).scalar()
+    end = (last.date() if last else date.today())
+    start = end - timedelta(days=13)
+    rng = f"start={start}&end={end}"
+    dt_rng = f"start={start}T00:00:00&end={end}T23:59:59"
+    return [
+        "/clients/?limit=50&count=none",
+        "/clients/?q=mar&limit=20&count=none",
+        "/clients/?order_by=join_date&order_dir=desc&cursor=&limit=50&count=none",
+        "/clients/?order_by=last_payment&order_dir=desc&cursor=&limit=50&count=none",
+        "/clients/status?up_to_date=true&limit=50&count=none",
+        f"/clients/{client_id}/status",
+        "/payments/?limit=50&cursor=&count=none",
+        f"/payments/?client_id={client_id}&limit=50&cursor=&count=none",
+        "/attendance/?limit=50&cursor=&count=none",
+        f"/attendance/?{dt_rng}&limit=50&cursor=&count=none",
+        f"/attendance/?client_id={client_id}&{dt_rng}&limit=50&cursor=&count=none",
+        f"/payments/reports/kpis?{rng}",
+        f"/payments/reports/kpis?{rng}&method=transfer",
+        f"/payments/reports/by_method?{rng}",
+        f"/payments/reports/by_channel?{rng}",
+        f"/payments/reports/timeseries?{rng}&bucket=day",
+        f"/reports/attendance?{rng}&bucket=day",
+        f"/reports/new_clients?{rng}",
+        f"/reports/revenue?{rng}&bucket=week",
+    ]
+
+
+def _nodes(plan: dict):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _nodes(child)
+
+
+def big_seq_scans(plan: dict, sizes: dict[str, float], min_rows: int) -> list[str]:
+    return [
+        n["Relation Name"] for n in _nodes(plan)
+        if n["Node Type"] == "Seq Scan" and sizes.get(n["Relation Name"], 0) >= min_rows
+    ]
+
+
+async def check(paths: list[str], token: str, min_rows: int, verbose: bool) -> list[tuple[str, str, list[str]]]:
+    captured: list[tuple[str, tuple]] = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((statement, parameters))
+
+    async with async_engine.connect() as conn:
+        # filas estimadas por tabla (incluye cada partición de attendances)
+        sizes = dict((await conn.exec_driver_sql(
+            "SELECT relname, reltuples FROM pg_class WHERE relkind = 'r'"
+        )).all())
+
+    failures = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://check",
+                                 headers={"Authorization": f"Bearer {token}"}) as client:
+        for path in paths:
+            captured.clear()
+            event.listen(async_engine.sync_engine, "before_cursor_execute", capture)
+            try:
+                r = await client.get(path)
+            finally:
+                event.remove(async_engine.sync_engine, "before_cursor_execute", capture)
+            if r.status_code != 200:
+                failures.append((path, f"HTTP {r.status_code}", []))
+                print(f"❌ {path}: HTTP {r.status_code}")
+                continue
+
+            bad = []
+            async with async_engine.connect() as conn:
+                for statement, params in captured:
+                    plan = (await conn.exec_driver_sql(
+                        "EXPLAIN (ANALYZE, FORMAT JSON) " + statement, params)).scalar()
+                    plan = json.loads(plan) if isinstance(plan, str) else plan
+                    root = plan[0]["Plan"]
+                    scans = big_seq_scans(root, sizes, min_rows)
+                    if scans:
+                        bad.append((statement, scans))
+                    if verbose:
+                        print(f"\n-- {path} ({plan[0]['Execution Time']:.2f}ms)\n{statement}")
+                        print(json.dumps(root, indent=1)[:4000])
+            if bad:
+                for statement, scans in bad:
+                    failures.append((path, statement, scans))
+                print(f"❌ {path}: Seq Scan en {', '.join(sorted({t for _, s in bad for t in s}))}")
+            else:
+                print(f"✅ {path} ({len(captured)} consultas)")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Falla si alguna lectura de la API hace Seq Scan de una tabla grande")
+    parser.add_argument("--min-rows", type=int, default=10000, help="tablas más chicas que esto se ignoran")
+    parser.add_argument("--verbose", action="store_true", help="imprime SQL y plan de cada consulta")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)  # sin el access log de cada request
+
+    with SessionLocal() as db:
+        owner = db.execute(
+            select(models.User).where(models.User.role == models.UserRole.owner, models.User.is_active.is_(True))
+        ).scalars().first()
+        if owner is None:
+            sys.exit("❌ No hay un usuario owner activo (scripts/create_owner.py)")
+        paths = endpoints(db)
+    token = create_access_token({"sub": str(owner.id)})
+
+    failures = asyncio.run(check(paths, token, args.min_rows, args.verbose))
+    if failures:
+        print(f"\n❌ {len(failures)} consultas con Seq Scan sobre tablas grandes:")
+        for path, statement, scans in failures:
+            print(f"  {path}: {', '.join(scans) or statement}")
+            if scans:
+                print("    " + " ".join(statement.split())[:300])
+        sys.exit(1)
+    print(f"\n✅ {len(paths)} endpoints sin Seq Scan sobre tablas grandes")
+
+
+if __name__ == "__main__":
+    main()
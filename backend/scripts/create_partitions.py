@@ -0,0 +1,35 @@
+# scripts/create_partitions.py
+"""
+Crea las particiones mensuales que faltan (mes actual + los N siguientes) de las tablas
+particionadas (hoy: attendances). Idempotente: pensado para correr por cron, p.ej. diario.
+
+  python scripts/create_partitions.py             # 3 meses adelante
+  python scripts/create_partitions.py --ahead 12
+  python scripts/create_partitions.py --backfill  # + meses con filas en el default (seeds, imports)
+
+Si la partición default ya tiene filas de un mes nuevo, se mueven a su partición.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+
+from app.database import engine
+from app.partitions import PARTITIONED, ensure_partitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea las particiones mensuales de los próximos meses")
+    parser.add_argument("--ahead", type=int, default=3, help="meses a crear después del actual")
+    parser.add_argument("--backfill", action="store_true", help="crear también los meses que hoy están en el default")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        for table in PARTITIONED:
+            created = ensure_partitions(conn, table, args.ahead, backfill=args.backfill)
+            for name, moved in created:
+                print(f"  {name}" + (f" ({moved} filas movidas desde {table}_default)" if moved else ""))
+            print(f"✅ {table}: {len(created)} particiones nuevas")
+
+
+if __name__ == "__main__":
+    main()
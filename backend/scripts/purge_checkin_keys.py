@@ -0,0 +1,65 @@
+# scripts/purge_checkin_keys.py
+"""
+Borra las idempotency_key de /attendance/checkin/batch que ya salieron de la ventana de
+reenvío (CHECKIN_KEY_RETENTION_DAYS desde created_at). El endpoint ya las ignora; esto
+solo evita que la tabla crezca para siempre. Borra por tandas con un commit cada una,
+así no bloquea los check-ins que están entrando.
+
+  python scripts/purge_checkin_keys.py            # borra
+  python scripts/purge_checkin_keys.py --dry-run  # solo cuenta
+
+Pensado para un cron diario.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, func
+
+from app.config import settings
+from app.database import SessionLocal
+from app import models
+
+BATCH = 10_000
+
+
+def purge(db, days: int, dry_run: bool = False, batch: int = BATCH) -> int:
+    """Claves con created_at anterior a `days` días: cantidad (borradas salvo dry_run)."""
+    K = models.CheckinIdempotencyKey
+    expired = K.created_at < datetime.utcnow() - timedelta(days=days)
+    if dry_run:
+        return db.execute(select(func.count()).select_from(K).where(expired)).scalar()
+    total = 0
+    while True:
+        n = db.execute(
+            delete(K).where(K.key.in_(select(K.key).where(expired).limit(batch)))
+        ).rowcount
+        db.commit()
+        total += n
+        if n < batch:
+            return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Purga las claves de idempotencia de check-ins vencidas")
+    parser.add_argument("--days", type=int, default=settings.CHECKIN_KEY_RETENTION_DAYS,
+                        help="ventana de reenvío en días (default: CHECKIN_KEY_RETENTION_DAYS)")
+    parser.add_argument("--dry-run", action="store_true", help="no borra, solo informa")
+    args = parser.parse_args()
+    if args.days < settings.CHECKIN_KEY_RETENTION_DAYS:
+        print(f"⚠️  --days {args.days} es menor que la ventana del endpoint "
+              f"({settings.CHECKIN_KEY_RETENTION_DAYS}): reenvíos todavía válidos se registrarían de nuevo")
+
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        n = purge(db, args.days, args.dry_run)
+    if args.dry_run:
+        print(f"⚠️  {n} claves vencidas (sin cambios, --dry-run)")
+    else:
+        print(f"✅ {n} claves borradas en {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+# scripts/rebuild_rollups.py
+"""
+Recalcula desde cero los rollups de reportes (pagos por día/mes, asistencias y altas
+por día) a partir de las tablas crudas, en una sola transacción.
+
+  python scripts/rebuild_rollups.py
+
+Correrlo después de cualquier carga que no pase por la API (seeds, imports, SQL a mano).
+También sube las versiones de payments/attendances/clients: los ETags y el cache de
+reportes de la API cambian sin reiniciarla.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import time
+
+from sqlalchemy import select, func
+
+from app.database import SessionLocal
+from app import models
+from app.rollups import rebuild_statements
+
+
+def rebuild(db) -> dict:
+    for stmt in rebuild_statements():
+        db.execute(stmt)
+    return {
+        m.__tablename__: db.execute(select(func.count()).select_from(m)).scalar()
+        for m in (models.PaymentDailyRollup, models.PaymentMonthlyRollup,
+                  models.AttendanceDailyRollup, models.ClientDailyRollup)
+    }
+
+
+def main():
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        counts = rebuild(db)
+        db.commit()
+    for table, n in counts.items():
+        print(f"  {table}: {n} filas")
+    print(f"✅ Rollups recalculados en {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+# scripts/reconcile_client_activity.py
+"""
+Recalcula las columnas desnormalizadas de clients (last_paid_year / last_paid_month /
+last_checkin_at) desde pagos y asistencias, solo en los clientes que no coinciden.
+
+  python scripts/reconcile_client_activity.py            # corrige
+  python scripts/reconcile_client_activity.py --dry-run  # solo cuenta las diferencias
+
+Correrlo después de cualquier carga que no pase por la API (seeds, imports, SQL a mano).
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import time
+
+from app.database import SessionLocal
+from app.client_activity import drift_count, reconcile_statements
+
+
+def reconcile(db, dry_run: bool = False) -> int:
+    """Cantidad de clientes con valores desactualizados (corregidos salvo dry_run)."""
+    drift = db.execute(drift_count()).scalar()
+    if drift and not dry_run:
+        for stmt in reconcile_statements():
+            db.execute(stmt)
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconcilia last_paid_* / last_checkin_at de clients")
+    parser.add_argument("--dry-run", action="store_true", help="no escribe, solo informa")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    with SessionLocal() as db:
+        drift = reconcile(db, args.dry_run)
+        db.commit()
+    if not drift:
+        print(f"✅ Sin diferencias ({time.perf_counter() - t0:.2f}s)")
+    elif args.dry_run:
+        print(f"⚠️  {drift} clientes con valores desactualizados (sin cambios, --dry-run)")
+    else:
+        print(f"✅ {drift} clientes corregidos en {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+# scripts/seed.py
+"""
+Siembra clientes, pagos y asistencias con datos falsos, en lotes generados en memoria y
+escritos con COPY FROM STDIN (sin objetos del ORM ni una consulta por fila).
+
+  python scripts/seed.py --n 200
+  python scripts/seed.py --n 1000000 --workers 8
+
+Los valores salen de las mismas secuencias que los scripts anteriores (seed_clients.py,
+seed_payments.py y seed_attendance.py): Faker y random con --seed para los clientes, otra
+pasada de random con --seed para los pagos y --attendance-seed para las asistencias. Los
+clientes son los mismos; pagos y asistencias recorren los clientes en orden de alta (los
+scripts viejos, en el orden físico de la tabla, que según cómo se llenaron las páginas podía
+correr alguno). Por eso la generación es secuencial (en este proceso) y los workers solo
+cargan: cada lote de CHUNK_SIZE clientes, con sus pagos, va en una transacción. Los ids, que
+antes eran uuid4, también salen de la semilla. Los pagos de cada cliente son meses distintos
+de su antigüedad (random.sample), así que uq_payment_period no puede fallar y no hace falta
+consultar antes.
+
+Pagos y asistencias son solo de los clientes de esta corrida. Si algo falla se borran los
+clientes ya cargados (pagos y asistencias se van en cascada): la base queda como estaba. Al
+final recalcula rollups y actividad de clientes (igual que cualquier carga por fuera de la
+API) y hace ANALYZE de las tablas cargadas.
+"""
+import os, sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import argparse
+import random
+import time
+import uuid
+from collections import deque
+from collections.abc import Sequence
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from multiprocessing import Pool
+from typing import Iterable, Iterator
+
+from sqlalchemy import create_engine, delete, select, func, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app import models
+from app.client_activity import checkins_added
+from app.partitions import add_months, create_month_partition, month_start
+from scripts.rebuild_rollups import rebuild as rebuild_rollups
+from scripts.reconcile_client_activity import reconcile as reconcile_client_activity
+
+CHUNK_SIZE = 10_000  # clientes por lote (y por transacción)
+
+DIGITS = "0123456789"
+METHODS = ["cash", "transfer"]  # schemas.PaymentMethod
+PRICES = [Decimal("8000.00"), Decimal("9000.00"), Decimal("10000.00"), Decimal("12000.00")]
+MINUTES = [0, 15, 30, 45]
+
+# columna -> tipo de Postgres: el COPY va en formato binario (sin pasar cada valor a texto)
+CLIENT_COLUMNS = {"id": "uuid", "full_name": "varchar", "email": "varchar", "phone": "varchar",
+                  "is_active": "bool", "join_date": "timestamp", "last_paid_year": "int4",
+                  "last_paid_month": "int4"}
+PAYMENT_COLUMNS = {"id": "uuid", "client_id": "uuid", "amount": "numeric", "method": "varchar",
+                   "period_year": "int4", "period_month": "int4", "created_at": "timestamp"}
+ATTENDANCE_COLUMNS = {"id": "uuid", "client_id": "uuid", "checkin_at": "timestamp"}
+
+
+@dataclass(frozen=True)
+class Options:
+    seed: int
+    attendance_seed: int
+    now: datetime  # referencia: altas hacia atrás, pagos y ventana de asistencias
+    locale: str
+    active_rate: float
+    months_back: int
+    days: int  # ventana de asistencias hacia atrás desde now
+    checkins_per_day: tuple[int, int]
+
+
+class Ids(Sequence):
+    """Lista de uuids guardados como 16 bytes c/u (1M de clientes ~ 16 MB)."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def append(self, value: uuid.UUID) -> None:
+        self._buf += value.bytes
+
+    def __len__(self) -> int:
+        return len(self._buf) // 16
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return uuid.UUID(bytes=bytes(self._buf[16 * i:16 * i + 16]))
+
+
+def _uuid(rnd: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rnd.getrandbits(128), version=4)
+
+
+# ---------- generación ----------
+def generate_clients(n: int, offset: int, opts: Options, created: Ids, active: Ids) -> Iterator[tuple[list, list]]:
+    """
+    Lotes (clientes, pagos) en el orden de *_COLUMNS. Anota en `created` los ids de todos
+    los clientes y en `active` los de los activos (para las asistencias).
+    """
+    from faker import Faker
+    fake = Faker(opts.locale)
+    Faker.seed(opts.seed)
+    rnd = random.Random(opts.seed)  # seed_clients.py: random.seed(12345)
+    pay_rnd = random.Random(opts.seed)  # seed_payments.py: random.seed(12345) otra vez
+    ids = random.Random(f"{opts.seed}:{offset}")  # corrido de nuevo sobre la misma base: otros ids
+
+    for start in range(0, n, CHUNK_SIZE):
+        clients, payments = [], []
+        for _ in range(min(CHUNK_SIZE, n - start)):
+            full_name = fake.name()
+            email = fake.unique.email()
+            phone = "".join(rnd.choice(DIGITS) for _ in range(10))
+            is_active = rnd.random() < opts.active_rate
+            joined = opts.now - timedelta(days=rnd.randint(0, opts.months_back * 30))
+            cid = _uuid(ids)
+
+            # 3–8 meses pagados entre el de alta y el actual, sin repetir (uq_payment_period)
+            months = max(1, (opts.now.year - joined.year) * 12 + (opts.now.month - joined.month))
+            paid = sorted(pay_rnd.sample(range(months), k=min(months, pay_rnd.randint(3, 8))))
+            for i in paid:
+                period = add_months(joined.date(), i)
+                amount = pay_rnd.choice(PRICES)
+                payments.append((_uuid(ids), cid, amount, pay_rnd.choice(METHODS),
+                                 period.year, period.month, opts.now))
+            last_period = add_months(joined.date(), paid[-1])
+
+            clients.append((cid, full_name, email, phone, is_active, joined,
+                            last_period.year, last_period.month))
+            created.append(cid)
+            if is_active:
+                active.append(cid)
+        yield clients, payments
+
+
+def generate_attendances(active: Ids, offset: int, opts: Options) -> Iterator[tuple]:
+    """Entre checkins_per_day check-ins por día de la ventana, de clientes activos al azar."""
+    rnd = random.Random(opts.attendance_seed)  # seed_attendance.py: random.seed(54321)
+    ids = random.Random(f"{opts.attendance_seed}:{offset}")
+    start = opts.now - timedelta(days=opts.days)
+    for day in range(opts.days):
+        d = start + timedelta(days=day)
+        for _ in range(rnd.randint(*opts.checkins_per_day)):
+            cid = rnd.choice(active)
+            hour = rnd.randint(8, 21)
+            minute = rnd.choice(MINUTES)
+            yield _uuid(ids), cid, d.replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+
+# ---------- carga ----------
+_engine = None
+
+
+def _init_worker(url: str) -> None:
+    global _engine
+    _engine = create_engine(url, pool_size=1, max_overflow=0)
+
+
+def _copy(raw, table: str, columns: dict[str, str], rows: Iterable) -> int:
+    n = 0
+    with raw.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(columns)}) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types(list(columns.values()))
+            for n, row in enumerate(rows, 1):
+                copy.write_row(row)
+    return n
+
+
+def load_chunk(chunk: tuple[list, list]) -> tuple[int, int]:
+    clients, payments = chunk
+    raw = _engine.raw_connection()  # conexión psycopg: cursor.copy()
+    try:
+        # una transacción por lote: si falla no queda un cliente sin sus pagos
+        _copy(raw, "clients", CLIENT_COLUMNS, clients)
+        _copy(raw, "payments", PAYMENT_COLUMNS, payments)
+        raw.commit()
+    finally:
+        raw.close()
+    return len(clients), len(payments)
+
+
+def load_attendances(engine, rows: Iterable, opts: Options) -> int:
+    """Asistencias (a medida que se generan) y last_checkin_at de sus clientes, en una transacción."""
+    window = select(models.Attendance.id).where(
+        models.Attendance.checkin_at >= opts.now - timedelta(days=opts.days))
+    with engine.begin() as conn:
+        n = _copy(conn.connection.dbapi_connection, "attendances", ATTENDANCE_COLUMNS, rows)
+        for stmt in checkins_added(window):  # greatest: las que ya estaban no cambian nada
+            conn.execute(stmt)
+    return n
+
+
+def delete_clients(engine, ids: Ids, batch: int = CHUNK_SIZE) -> None:
+    """Deshace una carga a medias: borra los clientes de `ids` (pagos y asistencias en cascada)."""
+    with engine.begin() as conn:
+        for start in range(0, len(ids), batch):
+            conn.execute(delete(models.Client).where(models.Client.id.in_(ids[start:start + batch])))
+
+
+# Índices que no respaldan una constraint (PK / uq_payment_period quedan): en una base de prueba
+# vacía conviene bajarlos, cargar y crearlos de una pasada al final
+_SECONDARY_INDEXES = text("""
+SELECT c.relname, pg_get_indexdef(i.indexrelid)
+  FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+ WHERE i.indrelid::regclass::text = ANY(:tables)
+   AND NOT EXISTS (SELECT 1 FROM pg_constraint k WHERE k.conindid = i.indexrelid)
+""")
+LOADED_TABLES = ["clients", "payments", "attendances"]
+
+
+def drop_secondary_indexes(conn) -> list[str]:
+    """Baja los índices secundarios de las tablas cargadas y devuelve sus CREATE INDEX."""
+    rows = conn.execute(_SECONDARY_INDEXES, {"tables": LOADED_TABLES}).all()
+    for name, _ in rows:
+        conn.execute(text(f"DROP INDEX {name}"))  # en attendances baja también los de cada partición
+    # los de la tabla particionada salen como "ON ONLY": sin ONLY se crean también en las particiones
+    return [ddl.replace(" ON ONLY ", " ON ") for _, ddl in rows]
+
+
+def _create_index(ddl: str) -> float:
+    t0 = time.perf_counter()
+    with _engine.begin() as conn:
+        conn.execute(text("SET maintenance_work_mem = '256MB'"))
+        conn.execute(text(ddl))
+    return time.perf_counter() - t0
+
+
+def ensure_attendance_partitions(conn, opts: Options) -> int:
+    """Meses de la ventana de asistencias (y los 3 siguientes), antes de cargar: nada va al default."""
+    first = month_start((opts.now - timedelta(days=opts.days)).date())
+    months, m = [], first
+    while m <= add_months(month_start(opts.now.date()), 3):
+        months.append(m)
+        m = add_months(m, 1)
+    for month in months:
+        create_month_partition(conn, "attendances", month)
+    return len(months)
+
+
+def _map(func, items, workers: int, url: str):
+    """
+    func sobre items en `workers` procesos (o en este, con 1), en orden. Con a lo sumo
+    2 * workers ítems en vuelo: items puede ser un generador que arma cada lote recién
+    cuando hace falta.
+    """
+    if workers <= 1:
+        _init_worker(url)
+        yield from map(func, items)
+        return
+    with Pool(workers, initializer=_init_worker, initargs=(url,)) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.apply_async(func, (item,)))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Siembra clientes, pagos y asistencias con COPY.")
+    parser.add_argument("--n", type=int, default=200, help="Cantidad de clientes a crear")
+    parser.add_argument("--workers", type=int, default=1, help="Procesos que cargan lotes en paralelo")
+    parser.add_argument("--seed", type=int, default=12345, help="Semilla de clientes y pagos")
+    parser.add_argument("--attendance-seed", type=int, default=54321, help="Semilla de asistencias")
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="Fecha de referencia YYYY-MM-DD (default: ahora UTC); fijarla para datos idénticos entre días")
+    parser.add_argument("--locale", type=str, default="es_AR", help="Locale de Faker (es_AR recomendado)")
+    parser.add_argument("--active-rate", type=float, default=0.85, help="Proporción de clientes activos (0..1)")
+    parser.add_argument("--months-back", type=int, default=18, help="Antigüedad máxima de join_date en meses")
+    parser.add_argument("--days", type=int, default=60, help="Días hacia atrás con asistencias")
+    parser.add_argument("--checkins-per-day", type=int, nargs=2, default=(10, 30), metavar=("MIN", "MAX"),
+                        help="Check-ins por día de la ventana (al azar entre MIN y MAX)")
+    parser.add_argument("--drop-indexes", action="store_true",
+                        help="Baja los índices secundarios durante la carga y los recrea al final (solo bases de prueba)")
+    args = parser.parse_args()
+
+    now = datetime.combine(args.today, datetime.min.time()) if args.today else datetime.utcnow()
+    opts = Options(seed=args.seed, attendance_seed=args.attendance_seed, now=now, locale=args.locale,
+                   active_rate=args.active_rate, months_back=args.months_back, days=args.days,
+                   checkins_per_day=tuple(args.checkins_per_day))
+    url = settings.DATABASE_URL
+    engine = create_engine(url, pool_pre_ping=True)
+    with engine.begin() as conn:
+        offset = conn.execute(select(func.count()).select_from(models.Client)).scalar()
+        ensure_attendance_partitions(conn, opts)
+        indexes = drop_secondary_indexes(conn) if args.drop_indexes else []
+
+    created, active = Ids(), Ids()
+    t0 = time.perf_counter()
+    totals = [0, 0, 0]
+    try:
+        try:
+            for counts in _map(load_chunk, generate_clients(args.n, offset, opts, created, active), args.workers, url):
+                totals[:2] = [t + c for t, c in zip(totals, counts)]
+                print(f"Insertados {totals[0]}/{args.n} clientes, {totals[1]} pagos...")
+            if active:
+                totals[2] = load_attendances(engine, generate_attendances(active, offset, opts), opts)
+            else:
+                print("⚠️ No hay clientes activos: sin asistencias.")
+        except BaseException:
+            if len(created):
+                # también los de lotes generados que no llegaron a cargarse: borrar esos no hace nada
+                print("❌ Falló la carga: borrando los clientes de esta corrida...")
+                delete_clients(engine, created)
+            raise
+    finally:
+        # aunque la carga falle: la base no puede quedar sin índices
+        if indexes:
+            t1 = time.perf_counter()
+            list(_map(_create_index, indexes, args.workers, url))
+            print(f"✅ {len(indexes)} índices recreados en {time.perf_counter() - t1:.1f}s.")
+    print(f"✅ Listo en {time.perf_counter() - t0:.1f}s: {totals[0]} clientes, {totals[1]} pagos, "
+          f"{totals[2]} asistencias.")
+
+    t0 = time.perf_counter()
+    with engine.begin() as conn:
+        for table in LOADED_TABLES:
+            conn.execute(text(f"ANALYZE {table}"))
+    with sessionmaker(bind=engine)() as db:
+        # los seeds escriben directo en la tabla: los reportes leen de los rollups
+        rebuild_rollups(db)
+        drift = reconcile_client_activity(db)  # debería dar 0: se cargan ya calculadas
+        db.commit()
+    print(f"✅ Rollups recalculados y actividad de clientes reconciliada ({drift} corregidos) "
+          f"en {time.perf_counter() - t0:.1f}s.")
+
+
+if __name__ == "__main__":
+    main()
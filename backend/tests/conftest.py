@@ -0,0 +1,129 @@
+# tests/conftest.py
+"""
+Los tests de la API corren contra un Postgres real (keyset, triggers de table_versions,
+ON CONFLICT... no tienen equivalente en SQLite), en una base aparte: TEST_DATABASE_URL o,
+si no está, la de DATABASE_URL (.env) con el sufijo _test. Se crea y migra sola; cada test
+arranca con las tablas de datos vacías. Sin servidor, esos tests se saltean.
+
+  TEST_DATABASE_URL=postgresql+psycopg://postgres@localhost:5432/gym_test pytest
+"""
+import os
+from pathlib import Path
+
+import pytest
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+# Antes de importar app: settings se lee una sola vez y los engines se crean al importar
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+elif not (BACKEND / ".env").exists():
+    os.environ.setdefault("DATABASE_URL", "postgresql+psycopg://postgres@localhost:5432/gym")
+os.environ.setdefault("SECRET_KEY", "test")
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.engine import make_url  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.config import settings  # noqa: E402
+
+_url = make_url(settings.DATABASE_URL)
+if not os.environ.get("TEST_DATABASE_URL"):
+    _url = _url.set(database=f"{_url.database}_test")
+TEST_DATABASE_URL = _url.render_as_string(hide_password=False)
+settings.DATABASE_URL = TEST_DATABASE_URL
+settings.ASYNC_DATABASE_URL = None  # el engine async sale de DATABASE_URL (con asyncpg)
+
+# Tablas que se vacían entre tests (users queda: owner y coach se crean una vez)
+DATA_TABLES = [
+    "clients", "payments", "attendances", "checkin_idempotency_keys",
+    "payment_rollup_daily", "payment_rollup_monthly", "attendance_rollup_daily", "client_rollup_daily",
+]
+OWNER = {"username": "owner@test.local", "password": "owner-test"}
+COACH = {"username": "coach@test.local", "password": "coach-test"}
+
+
+@pytest.fixture(scope="session")
+def db_engine():
+    """Base de tests creada (si falta) y migrada a head."""
+    admin = create_engine(_url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            exists = conn.execute(text("SELECT 1 FROM pg_database WHERE datname = :n"),
+                                  {"n": _url.database}).scalar()
+            if not exists:
+                conn.execute(text(f'CREATE DATABASE "{_url.database}"'))
+    except OperationalError as e:
+        pytest.skip(f"Postgres no disponible ({_url.render_as_string()}): {e.orig}")
+    finally:
+        admin.dispose()
+
+    from alembic import command
+    from alembic.config import Config
+    cfg = Config(str(BACKEND / "alembic.ini"))
+    cfg.set_main_option("script_location", str(BACKEND / "migrations"))
+    cfg.set_main_option("sqlalchemy.url", TEST_DATABASE_URL.replace("%", "%%"))
+    command.upgrade(cfg, "head")
+
+    engine = create_engine(TEST_DATABASE_URL)
+    _create_users(engine)
+    yield engine
+    engine.dispose()
+
+
+def _create_users(engine) -> None:
+    from sqlalchemy.orm import Session
+    from app.auth import hash_password
+    from app.models import User, UserRole
+    with Session(engine) as db:
+        for creds, role in ((OWNER, UserRole.owner), (COACH, UserRole.coach)):
+            if db.query(User).filter(User.email == creds["username"]).first() is None:
+                db.add(User(full_name=role.value.title(), email=creds["username"],
+                            password_hash=hash_password(creds["password"]), role=role))
+        db.commit()
+
+
+@pytest.fixture(scope="session")
+def _client(db_engine):
+    # Uno por sesión: las conexiones del pool async quedan atadas al event loop del TestClient
+    from fastapi.testclient import TestClient
+    from app.main import app
+    with TestClient(app) as c:
+        yield c
+
+
+def _login(client, creds: dict) -> dict:
+    token = client.post("/auth/token", data=creds).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture(scope="session")
+def auth(_client) -> dict:
+    return _login(_client, OWNER)
+
+
+@pytest.fixture(scope="session")
+def coach_auth(_client) -> dict:
+    return _login(_client, COACH)
+
+
+@pytest.fixture
+def client(_client, db_engine):
+    """TestClient sobre tablas vacías, cache de reportes vacío e índice de clientes recargado."""
+    from app.client_index import client_index
+    from app.report_cache import report_cache
+    with db_engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE {', '.join(DATA_TABLES)} CASCADE"))
+    report_cache.clear()
+    _client.portal.call(client_index.load)
+    return _client
+
+
+@pytest.fixture
+def make_client(client, auth):
+    """Alta por la API (mantiene rollups, índice y table_versions como en producción)."""
+    def _make(full_name: str, **fields) -> dict:
+        r = client.post("/clients/", json={"full_name": full_name, **fields}, headers=auth)
+        assert r.status_code == 201, r.text
+        return r.json()
+    return _make
@@ -0,0 +1,139 @@
+import json
+
+from app.routers import clients as clients_router
+
+CSV = {"Content-Type": "text/csv"}
+NDJSON = {"Content-Type": "application/x-ndjson"}
+
+
+def _bulk(client, auth, body: str, headers=CSV) -> tuple[dict[int, dict], dict]:
+    r = client.post("/clients/bulk", content=body.encode(), headers={**auth, **headers})
+    assert r.status_code == 200, r.text
+    items = [json.loads(line) for line in r.text.splitlines()]
+    summary = items.pop()["summary"]
+    return {it["line"]: it for it in items}, summary
+
+
+def _get(client, auth, client_id: str) -> dict:
+    return client.get(f"/clients/{client_id}", headers=auth).json()
+
+
+def test_creates_and_reports_per_line(client, auth):
+    lines, summary = _bulk(client, auth, "full_name,email,phone\n"
+                                         "Ana Pérez,ana@test.com,1111\n"
+                                         "Beto Gil,,2222\n")
+    assert summary == {"created": 2, "updated": 0, "merged": 0, "errors": 0}
+    assert {n: it["status"] for n, it in lines.items()} == {2: "created", 3: "created"}
+    assert _get(client, auth, lines[3]["id"])["email"] is None
+    assert client.get("/clients/", headers=auth).headers["X-Total-Count"] == "2"
+
+
+def test_rows_in_the_same_file_merge_field_by_field(client, auth):
+    # 2 y 4 comparten email (sin importar mayúsculas): la última gana, pero un vacío no pisa
+    lines, summary = _bulk(client, auth, "full_name,email,phone\n"
+                                         "Caro Díaz,caro@test.com,11 4444-5555\n"
+                                         "Otra Persona,otra@test.com,\n"
+                                         "Carolina Díaz,CARO@test.com,\n")
+    assert summary == {"created": 2, "updated": 0, "merged": 1, "errors": 0}
+    assert lines[2] == {"line": 2, "status": "merged", "into_line": 4}
+    caro = _get(client, auth, lines[4]["id"])
+    assert caro["full_name"] == "Carolina Díaz"
+    assert caro["phone"] == "11 4444-5555"
+
+
+def test_merge_is_transitive(client, auth):
+    # 2 (email) y 3 (teléfono) no se conocen entre sí, pero 4 trae los dos: queda un solo cliente
+    lines, summary = _bulk(client, auth, "full_name,email,phone\n"
+                                         "Dani,dani@test.com,\n"
+                                         "Daniel,,(351) 555-0101\n"
+                                         "Daniel Ruiz,dani@test.com,3515550101\n")
+    assert summary["created"] == 1 and summary["merged"] == 2
+    assert lines[2]["into_line"] == lines[3]["into_line"] == 4
+
+
+def test_existing_clients_are_updated_not_duplicated(client, auth, make_client):
+    by_email = make_client("Eva Viejo", email="eva@test.com", phone="1234")
+    by_phone = make_client("Fede Viejo", phone="(11) 5555-0000")
+    lines, summary = _bulk(client, auth, "full_name,email,phone,is_active\n"
+                                         "Eva Nuevo,EVA@test.com,,true\n"
+                                         "Fede Nuevo,fede@test.com,1155550000,false\n")
+    assert summary == {"created": 0, "updated": 2, "merged": 0, "errors": 0}
+    assert lines[2]["id"] == by_email["id"] and lines[3]["id"] == by_phone["id"]
+
+    eva = _get(client, auth, by_email["id"])
+    assert (eva["full_name"], eva["phone"]) == ("Eva Nuevo", "1234")  # teléfono vacío: queda el guardado
+    fede = _get(client, auth, by_phone["id"])
+    assert (fede["email"], fede["is_active"]) == ("fede@test.com", False)
+    assert client.get("/clients/", headers=auth).headers["X-Total-Count"] == "2"
+
+
+def test_reimport_is_idempotent(client, auth):
+    body = "full_name,email,phone\nGabi,gabi@test.com,3000\nHugo,,4000\n"
+    first, _ = _bulk(client, auth, body)
+    again, summary = _bulk(client, auth, body)
+    assert summary == {"created": 0, "updated": 2, "merged": 0, "errors": 0}
+    assert {n: it["id"] for n, it in again.items()} == {n: it["id"] for n, it in first.items()}
+
+
+def test_invalid_lines_do_not_stop_the_rest(client, auth):
+    lines, summary = _bulk(client, auth, "\n".join([
+        json.dumps({"full_name": "Ok Uno", "email": "uno@test.com"}),
+        json.dumps({"full_name": "", "email": "mal@test.com"}),
+        "{no es json",
+        json.dumps({"full_name": "Ok Dos", "email": "no-es-un-email"}),
+        json.dumps({"full_name": "Ok Tres"}),
+    ]), headers=NDJSON)
+    assert summary == {"created": 2, "updated": 0, "merged": 0, "errors": 3}
+    assert set(lines) == {1, 2, 3, 4, 5}
+    assert all("error" in lines[n] for n in (2, 3, 4))
+
+
+def test_merge_across_flushes(client, auth, monkeypatch):
+    # con lotes de 2 filas, la 4 ya no ve a la 2 en el lote: la encuentra en la base y la actualiza
+    monkeypatch.setattr(clients_router, "_UPSERT_BATCH", 2)
+    lines, summary = _bulk(client, auth, "full_name,email,phone\n"
+                                         "Ine,ine@test.com,\n"
+                                         "Juan,juan@test.com,\n"
+                                         "Inés,ine@test.com,5000\n")
+    assert summary == {"created": 2, "updated": 1, "merged": 0, "errors": 0}
+    assert lines[4]["id"] == lines[2]["id"]
+    assert _get(client, auth, lines[2]["id"])["phone"] == "5000"
+
+
+def test_new_clients_report_and_checkin_index_see_the_import(client, auth):
+    lines, _ = _bulk(client, auth, "full_name,email\nKarina Importada,kari@test.com\n")
+    r = client.get("/reports/new_clients", params={"start": "2000-01-01", "end": "2100-01-01"}, headers=auth)
+    assert sum(b["count"] for b in r.json()) == 1
+    r = client.post("/attendance/checkin", json={"q": "kari@test.com"}, headers=auth)
+    assert r.status_code == 201 and r.json()["client_id"] == lines[2]["id"]
+
+
+def test_reimport_without_is_active_keeps_deactivated_clients(client, auth, make_client):
+    lucas = make_client("Lucas Baja", email="lucas@test.com")
+    assert client.patch(f"/clients/{lucas['id']}", json={"is_active": False}, headers=auth).status_code == 200
+    lines, summary = _bulk(client, auth, "full_name,email\nLucas Baja,lucas@test.com\nNueva Alta,alta@test.com\n")
+    assert summary == {"created": 1, "updated": 1, "merged": 0, "errors": 0}
+    assert _get(client, auth, lucas["id"])["is_active"] is False
+    assert _get(client, auth, lines[3]["id"])["is_active"] is True  # el default solo vale en el alta
+
+
+def test_later_row_without_is_active_keeps_an_earlier_false(client, auth):
+    lines, _ = _bulk(client, auth, "\n".join([
+        json.dumps({"full_name": "Mora", "email": "mora@test.com", "is_active": False}),
+        json.dumps({"full_name": "Mora Gil", "email": "mora@test.com"}),
+    ]), headers=NDJSON)
+    assert lines[1] == {"line": 1, "status": "merged", "into_line": 2}
+    assert _get(client, auth, lines[2]["id"])["is_active"] is False
+
+
+def test_rows_matching_the_same_client_by_different_keys_collapse(client, auth, make_client):
+    # 2 lo encuentra por email y 3 por teléfono: en el lote no comparten clave, en la base sí
+    nico = make_client("Nico Viejo", email="nico@test.com", phone="3000")
+    lines, summary = _bulk(client, auth, "full_name,email,phone,is_active\n"
+                                         "Nico Email,nico@test.com,,false\n"
+                                         "Nico Tel,,3000,\n")
+    assert summary == {"created": 0, "updated": 1, "merged": 1, "errors": 0}
+    assert lines[2] == {"line": 2, "status": "merged", "into_line": 3}
+    assert lines[3]["id"] == nico["id"] and lines[3]["status"] == "updated"
+    got = _get(client, auth, nico["id"])
+    assert (got["full_name"], got["is_active"]) == ("Nico Tel", False)  # la última gana, campo a campo
@@ -0,0 +1,136 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+
+from app import models
+from app.routers import payments as payments_router
+
+CSV = {"Content-Type": "text/csv"}
+HEADER = "client_id,amount,method,period_year,period_month\n"
+KPIS = "/payments/reports/kpis?start=2000-01-01&end=2100-01-01"
+
+
+def _import(client, auth, body: str, on_conflict: str = "skip", status: int = 200) -> tuple[dict[int, str], dict]:
+    r = client.post("/payments/bulk", params={"on_conflict": on_conflict}, content=body.encode(),
+                    headers={**auth, **CSV})
+    assert r.status_code == status, r.text
+    items = [json.loads(line) for line in r.text.splitlines()]
+    summary = items.pop()["summary"]
+    return {it["line"]: it["error"] for it in items}, summary
+
+
+def _pay(client, auth, cid: str, month: int, amount: int, method: str = "cash") -> None:
+    r = client.post("/payments/", json={"client_id": cid, "amount": amount, "method": method,
+                                        "period_year": 2026, "period_month": month}, headers=auth)
+    assert r.status_code == 201, r.text
+
+
+def _payments(client, auth, cid: str) -> dict[int, tuple[float, str]]:
+    rows = client.get("/payments/", params={"client_id": cid}, headers=auth).json()
+    return {p["period_month"]: (p["amount"], p["method"]) for p in rows}
+
+
+@pytest.fixture
+def socios(make_client):
+    return {n: make_client(n)["id"] for n in ("Ana Pago", "Beto Pago", "Caro Pago")}
+
+
+def test_skip_keeps_existing_payments(client, auth, socios):
+    ana, beto = socios["Ana Pago"], socios["Beto Pago"]
+    _pay(client, auth, ana, 3, 1000)
+    errors, summary = _import(client, auth, HEADER + f"{ana},2000,transfer,2026,3\n"
+                                                     f"{ana},500,cash,2026,4\n"
+                                                     f"{beto},700.50,transfer,2026,3\n")
+    assert errors == {}
+    assert summary == {"status": "ok", "received": 3, "inserted": 2, "updated": 0, "skipped": 1, "errors": 0}
+    assert _payments(client, auth, ana) == {3: (1000.0, "cash"), 4: (500.0, "cash")}
+    assert _payments(client, auth, beto) == {3: (700.5, "transfer")}
+
+
+def test_unknown_clients_duplicates_and_invalid_rows(client, auth, socios):
+    ana = socios["Ana Pago"]
+    errors, summary = _import(client, auth, HEADER + f"{ana},100,cash,2026,5\n"
+                                                     f"{uuid4()},100,cash,2026,5\n"
+                                                     f"{ana},300,transfer,2026,5\n"
+                                                     f"{ana},-1,cash,2026,6\n"
+                                                     f"{ana},100,cheque,2026,7\n")
+    assert set(errors) == {2, 3, 5, 6}
+    assert errors[3] == "client_id: client not found"
+    assert "later row wins" in errors[2]
+    assert summary["inserted"] == 1 and summary["errors"] == 4
+    assert _payments(client, auth, ana) == {5: (300.0, "transfer")}  # la última fila del período
+
+
+def test_update_overwrites_and_rollups_match_raw_payments(client, auth, db_engine, socios):
+    ana, beto, caro = socios.values()
+    _pay(client, auth, ana, 3, 1000)
+    _pay(client, auth, beto, 3, 500, "transfer")
+    client.get(KPIS, headers=auth)  # en cache: la importación tiene que invalidarlo
+    errors, summary = _import(client, auth, HEADER + f"{ana},1500.25,transfer,2026,3\n"
+                                                     f"{caro},800,cash,2026,3\n", on_conflict="update")
+    assert errors == {}
+    assert (summary["inserted"], summary["updated"], summary["skipped"]) == (1, 1, 0)
+    assert _payments(client, auth, ana) == {3: (1500.25, "transfer")}
+
+    with db_engine.connect() as conn:
+        raw = dict(conn.execute(text("SELECT method, sum(amount) FROM payments GROUP BY method")).all())
+        for rollup in (models.PaymentDailyRollup, models.PaymentMonthlyRollup):
+            totals = dict(conn.execute(text(f"SELECT method, sum(amount_sum) FROM {rollup.__tablename__} "
+                                            "GROUP BY method HAVING sum(n_payments) > 0")).all())
+            assert totals == raw, rollup.__tablename__
+    kpis = client.get(KPIS, headers=auth).json()
+    assert (kpis["n_payments"], kpis["unique_clients"]) == (3, 3)
+    assert kpis["amount_sum"] == pytest.approx(float(sum(raw.values()))) == 2800.25
+
+
+def test_fail_aborts_the_whole_import(client, auth, socios):
+    ana, caro = socios["Ana Pago"], socios["Caro Pago"]
+    _pay(client, auth, ana, 3, 1000)
+    errors, summary = _import(client, auth, HEADER + f"{caro},800,cash,2026,3\n"
+                                                     f"{ana},2000,cash,2026,3\n", on_conflict="fail", status=409)
+    assert errors == {3: "Payment for this period already exists"}
+    assert summary == {"status": "aborted", "received": 2, "inserted": 0, "updated": 0, "skipped": 0, "errors": 1}
+    assert _payments(client, auth, caro) == {}
+    assert _payments(client, auth, ana) == {3: (1000.0, "cash")}
+
+
+@pytest.fixture
+def race(monkeypatch, db_engine):
+    """Otro request crea el período de `target` justo antes del INSERT de la importación."""
+    target = {}
+
+    class _Racing(datetime):
+        @classmethod
+        def utcnow(cls):
+            if target:
+                with db_engine.begin() as conn:
+                    conn.execute(text("INSERT INTO payments (id, client_id, amount, method, period_year, "
+                                      "period_month, created_at) VALUES (gen_random_uuid(), :cid, 1, 'cash', "
+                                      "2026, 8, now())"), target)
+                target.clear()
+            return datetime.utcnow()
+
+    monkeypatch.setattr(payments_router, "datetime", _Racing)
+    return target
+
+
+def test_lost_race_is_reported_per_line(client, auth, socios, race):
+    ana, beto = socios["Ana Pago"], socios["Beto Pago"]
+    race["cid"] = ana
+    body = HEADER + f"{ana},900,cash,2026,8\n{beto},900,cash,2026,8\n"
+    errors, summary = _import(client, auth, body)
+    assert errors == {2: "Payment for this period was created by another request during the import"}
+    assert (summary["inserted"], summary["errors"]) == (1, 1)
+    assert _payments(client, auth, ana) == {8: (1.0, "cash")}  # queda el del otro request
+
+
+def test_lost_race_aborts_with_fail(client, auth, socios, race):
+    ana, beto = socios["Ana Pago"], socios["Beto Pago"]
+    race["cid"] = ana
+    body = HEADER + f"{ana},900,cash,2026,8\n{beto},900,cash,2026,8\n"
+    _, summary = _import(client, auth, body, on_conflict="fail", status=409)
+    assert summary["status"] == "aborted"
+    assert _payments(client, auth, beto) == {}
@@ -0,0 +1,147 @@
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from scripts.purge_checkin_keys import purge
+
+
+def _batch(client, auth, *items: dict) -> dict:
+    r = client.post("/attendance/checkin/batch", json={"items": list(items)}, headers=auth)
+    assert r.status_code == 200, r.text
+    return r.json()
+
+
+def _attendances(client, auth) -> int:
+    return int(client.get("/attendance/", params={"limit": 1}, headers=auth).headers["X-Total-Count"])
+
+
+def _report_total(client, auth) -> int:
+    r = client.get("/reports/attendance", params={"start": "2000-01-01", "end": "2100-01-01"}, headers=auth)
+    return sum(b["count"] for b in r.json())
+
+
+@pytest.fixture
+def socios(make_client):
+    return {
+        "ana": make_client("Ana Torres", email="ana@test.com", phone="1111111111")["id"],
+        "beto": make_client("Beto Torres", email="beto@test.com")["id"],
+        "caro": make_client("Carolina Fernández", email="caro@test.com")["id"],
+        "baja": make_client("Dado De Baja", email="baja@test.com", is_active=False)["id"],
+    }
+
+
+def test_resend_returns_the_original_checkins(client, auth, socios):
+    items = [
+        {"client_id": socios["ana"], "checkin_at": "2026-05-04T09:15:00-03:00", "idempotency_key": "t1-1"},
+        {"q": "beto@test.com", "checkin_at": "2026-05-04T10:00:00Z", "idempotency_key": "t1-2"},
+    ]
+    first = _batch(client, auth, *items)
+    assert (first["created"], first["duplicates"], first["failed"]) == (2, 0, 0)
+    assert first["results"][0]["checkin_at"] == "2026-05-04T12:15:00"  # a UTC sin zona
+
+    again = _batch(client, auth, *items)
+    assert (again["created"], again["duplicates"], again["failed"]) == (0, 2, 0)
+    for a, b in zip(first["results"], again["results"]):
+        assert b["status"] == "duplicate"
+        assert (b["attendance_id"], b["client_id"], b["checkin_at"]) == (a["attendance_id"], a["client_id"], a["checkin_at"])
+    assert _attendances(client, auth) == 2
+    assert _report_total(client, auth) == 2
+
+
+def test_repeated_key_within_a_batch_counts_once(client, auth, socios):
+    out = _batch(client, auth,
+                 {"client_id": socios["ana"], "idempotency_key": "k"},
+                 {"client_id": socios["beto"], "idempotency_key": "otra"},
+                 {"client_id": socios["beto"], "idempotency_key": "k"})  # vale la primera con esa clave
+    assert [r["status"] for r in out["results"]] == ["created", "created", "duplicate"]
+    assert [r["index"] for r in out["results"]] == [0, 1, 2]
+    assert out["results"][2]["attendance_id"] == out["results"][0]["attendance_id"]
+    assert out["results"][2]["client_id"] == socios["ana"]
+    assert (out["created"], out["duplicates"]) == (2, 1)
+    assert _attendances(client, auth) == 2
+
+
+def test_resend_mixed_with_new_items(client, auth, socios):
+    _batch(client, auth, {"client_id": socios["ana"], "idempotency_key": "a"})
+    out = _batch(client, auth,
+                 {"client_id": socios["ana"], "idempotency_key": "a"},
+                 {"client_id": socios["ana"], "idempotency_key": "b"})
+    assert [r["status"] for r in out["results"]] == ["duplicate", "created"]
+    assert _attendances(client, auth) == 2
+
+
+def test_lookup_outcomes(client, auth, socios):
+    out = _batch(client, auth,
+                 {"q": "1111111111", "idempotency_key": "tel"},  # índice: teléfono
+                 {"q": "ernánd", "idempotency_key": "db"},  # no es prefijo de palabra: lo resuelve la base
+                 {"q": "Torres", "idempotency_key": "amb"},
+                 {"q": "baja@test.com", "idempotency_key": "inactivo"},
+                 {"client_id": socios["baja"], "idempotency_key": "inactivo-id"},
+                 {"client_id": str(uuid4()), "idempotency_key": "no-existe"},
+                 {"idempotency_key": "vacio"})
+    by_key = {r["idempotency_key"]: r for r in out["results"]}
+    assert by_key["tel"]["status"] == "created" and by_key["tel"]["client_id"] == socios["ana"]
+    assert by_key["db"]["status"] == "created" and by_key["db"]["client_id"] == socios["caro"]
+    assert by_key["amb"]["status"] == "ambiguous"
+    assert {c["id"] for c in by_key["amb"]["candidates"]} == {socios["ana"], socios["beto"]}
+    assert by_key["inactivo"]["status"] == "not_found"  # q busca solo entre los activos
+    assert by_key["inactivo-id"]["status"] == "created"  # con id explícito, como POST /checkin
+    assert by_key["no-existe"]["status"] == "not_found"
+    assert by_key["vacio"]["status"] == "invalid"
+    assert (out["created"], out["duplicates"], out["failed"]) == (3, 0, 4)
+
+
+def test_failed_items_can_be_retried_with_the_same_key(client, auth, socios):
+    out = _batch(client, auth, {"q": "Torres", "idempotency_key": "r"})
+    assert out["results"][0]["status"] == "ambiguous"
+    out = _batch(client, auth, {"client_id": socios["beto"], "idempotency_key": "r"})
+    assert out["results"][0]["status"] == "created"
+
+
+def test_last_checkin_keeps_the_latest(client, auth, socios):
+    _batch(client, auth,
+           {"client_id": socios["ana"], "checkin_at": "2026-03-02T10:00:00", "idempotency_key": "1"},
+           {"client_id": socios["ana"], "checkin_at": "2026-03-01T10:00:00", "idempotency_key": "2"})
+    # una terminal que sincroniza tarde no hace retroceder el último check-in
+    _batch(client, auth, {"client_id": socios["ana"], "checkin_at": "2026-02-01T10:00:00", "idempotency_key": "3"})
+    ana = client.get(f"/clients/{socios['ana']}", headers=auth).json()
+    assert ana["last_checkin_at"] == "2026-03-02T10:00:00"
+    assert _report_total(client, auth) == 3
+
+
+def _age_keys(db_engine, days: int, *keys: str) -> None:
+    with db_engine.begin() as conn:
+        conn.execute(text("UPDATE checkin_idempotency_keys SET created_at = now() at time zone 'utc' - "
+                          "make_interval(days => :d) WHERE key = ANY(:k)"), {"d": days, "k": list(keys)})
+
+
+def test_keys_expire_after_the_replay_window(client, auth, db_engine, socios):
+    days = settings.CHECKIN_KEY_RETENTION_DAYS
+    first = _batch(client, auth, {"client_id": socios["ana"], "idempotency_key": "vieja"},
+                   {"client_id": socios["ana"], "idempotency_key": "al-limite"})
+    _age_keys(db_engine, days + 1, "vieja")
+    _age_keys(db_engine, days - 1, "al-limite")
+    again = _batch(client, auth, {"client_id": socios["beto"], "idempotency_key": "vieja"},
+                   {"client_id": socios["beto"], "idempotency_key": "al-limite"})
+    assert [r["status"] for r in again["results"]] == ["created", "duplicate"]
+    assert again["results"][0]["attendance_id"] != first["results"][0]["attendance_id"]
+    assert again["results"][0]["client_id"] == socios["beto"]
+    # la clave reclamada vuelve a valer como duplicado
+    assert _batch(client, auth, {"client_id": socios["ana"], "idempotency_key": "vieja"})["duplicates"] == 1
+    assert _attendances(client, auth) == 3
+
+
+def test_purge_removes_only_expired_keys(client, auth, db_engine, socios):
+    keys = [f"p{i}" for i in range(5)]
+    _batch(client, auth, *({"client_id": socios["ana"], "idempotency_key": k} for k in keys))
+    _age_keys(db_engine, 40, *keys[:3])
+    with Session(db_engine) as db:
+        assert purge(db, 30, dry_run=True) == 3
+        assert purge(db, 30, batch=2) == 3  # dos tandas
+    with db_engine.connect() as conn:
+        left = conn.execute(text("SELECT key FROM checkin_idempotency_keys ORDER BY key")).scalars().all()
+    assert left == keys[3:]
+    assert _attendances(client, auth) == 5  # los check-ins no se tocan
@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import text
+
+from app.etag import _matches
+
+KPIS = "/payments/reports/kpis?start=2026-01-01&end=2026-12-31"
+
+
+@pytest.mark.parametrize("header, ok", [
+    ('W/"abc"', True),
+    ('"abc"', True),  # comparación débil
+    ('W/"zzz", W/"abc"', True),
+    ("*", True),
+    ('W/"abcd"', False),
+    ('"zzz"', False),
+])
+def test_if_none_match_parsing(header, ok):
+    assert _matches(header, 'W/"abc"') is ok
+
+
+def test_not_modified_until_a_write(client, auth, make_client):
+    make_client("Primera")
+    r = client.get("/clients/", headers=auth)
+    tag = r.headers["ETag"]
+    assert tag.startswith('W/"') and r.headers["Cache-Control"] == "no-cache"
+
+    r = client.get("/clients/", headers={**auth, "If-None-Match": tag})
+    assert r.status_code == 304
+    assert r.content == b""
+    assert r.headers["ETag"] == tag
+    assert client.get("/clients/", headers={**auth, "If-None-Match": tag.removeprefix("W/")}).status_code == 304
+
+    make_client("Segunda")
+    r = client.get("/clients/", headers={**auth, "If-None-Match": tag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != tag
+    assert len(r.json()) == 2
+
+
+def test_tag_depends_on_query(client, auth, make_client):
+    make_client("Alguien")
+    a = client.get("/clients/", params={"limit": 1}, headers=auth).headers["ETag"]
+    b = client.get("/clients/", params={"limit": 2}, headers=auth).headers["ETag"]
+    assert a != b
+    assert client.get("/clients/", params={"limit": 2}, headers={**auth, "If-None-Match": a}).status_code == 200
+
+
+def test_writes_outside_the_api_invalidate(client, auth, db_engine, make_client):
+    cid = make_client("Por SQL")["id"]
+    tag = client.get(f"/clients/{cid}", headers=auth).headers["ETag"]
+    with db_engine.begin() as conn:  # el trigger de table_versions cubre también scripts y SQL a mano
+        conn.execute(text("UPDATE clients SET phone = '123' WHERE id = :id"), {"id": cid})
+    r = client.get(f"/clients/{cid}", headers={**auth, "If-None-Match": tag})
+    assert r.status_code == 200
+    assert r.json()["phone"] == "123"
+
+
+def test_only_dependent_tables_invalidate(client, auth, make_client):
+    cid = make_client("Socio")["id"]
+    tag = client.get(KPIS, headers=auth).headers["ETag"]
+    # un check-in toca attendances y clients, no payments
+    assert client.post("/attendance/checkin", json={"client_id": cid}, headers=auth).status_code == 201
+    assert client.get(KPIS, headers={**auth, "If-None-Match": tag}).status_code == 304
+    client.post("/payments/", json={"client_id": cid, "amount": 100, "method": "cash",
+                                    "period_year": 2026, "period_month": 5}, headers=auth)
+    assert client.get(KPIS, headers={**auth, "If-None-Match": tag}).status_code == 200
+
+
+def test_role_is_checked_before_304(client, auth):
+    tag = client.get(KPIS, headers=auth).headers["ETag"]
+    assert client.get(KPIS, headers={"If-None-Match": tag}).status_code == 401
+    assert client.get(KPIS, headers={"If-None-Match": "*"}).status_code == 401
+
+
+def test_status_tag_changes_with_the_month(client, auth, make_client, monkeypatch):
+    # "al día" depende del mes en curso: sin escrituras, el 1ro del mes siguiente cambia igual
+    make_client("Mensual")
+    tag = client.get("/clients/status", headers=auth).headers["ETag"]
+    assert client.get("/clients/status", headers={**auth, "If-None-Match": tag}).status_code == 304
+
+    now = datetime.now()
+    next_month = datetime(now.year + now.month // 12, now.month % 12 + 1, 1)
+
+    class _NextMonth(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return next_month
+
+    monkeypatch.setattr("app.utils.datetime", _NextMonth)
+    assert client.get("/clients/status", headers={**auth, "If-None-Match": tag}).status_code == 200
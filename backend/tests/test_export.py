@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from uuid import UUID
+
+import pytest
+from sqlalchemy import text
+
+EXPORTS = ["/payments/export", "/attendance/export", "/clients/export"]
+
+
+def _export(client, auth, url: str, fmt: str = "csv", **params) -> list[dict]:
+    r = client.get(url, params={**params, "format": fmt}, headers=auth)
+    assert r.status_code == 200, r.text
+    ext = "csv" if fmt == "csv" else "ndjson"
+    assert r.headers["Content-Disposition"].endswith(f'.{ext}"')
+    if fmt == "csv":
+        assert r.headers["Content-Type"].startswith("text/csv")
+        return list(csv.DictReader(io.StringIO(r.text)))
+    return [json.loads(line) for line in r.text.splitlines()]
+
+
+def _ids(client, auth, url: str, **params) -> list[str]:
+    r = client.get(url, params={**params, "limit": 200}, headers=auth)
+    assert r.status_code == 200, r.text
+    return [row["id"] for row in r.json()]
+
+
+@pytest.fixture
+def data(client, auth, make_client):
+    ana = make_client("Ana Export", email="ana@test.com", phone="1111")
+    beto = make_client("Beto Export", is_active=False)
+    for cid, amount, month in ((ana["id"], "1500.25", 1), (ana["id"], "99.90", 2), (beto["id"], "700", 1)):
+        r = client.post("/payments/", json={"client_id": cid, "amount": amount, "method": "transfer",
+                                            "method_channel": "mercadopago", "period_year": 2026,
+                                            "period_month": month}, headers=auth)
+        assert r.status_code == 201, r.text
+    r = client.post("/attendance/checkin/batch", headers=auth, json={"items": [
+        {"client_id": ana["id"], "checkin_at": "2026-03-01T10:00:00", "idempotency_key": "e1"},
+        {"client_id": ana["id"], "checkin_at": "2026-03-05T10:00:00", "idempotency_key": "e2"},
+        {"client_id": beto["id"], "checkin_at": "2026-03-03T10:00:00", "idempotency_key": "e3"},
+    ]})
+    assert r.json()["created"] == 3
+    return {"ana": ana, "beto": beto}
+
+
+def test_payments_csv_round_trip(client, auth, data):
+    rows = _export(client, auth, "/payments/export")
+    assert list(rows[0]) == ["id", "client_id", "client_name", "amount", "method", "method_channel",
+                             "note", "period_month", "period_year", "created_at"]
+    listed = client.get("/payments/", headers=auth).json()
+    assert [r["id"] for r in rows] == [p["id"] for p in listed]
+    by_amount = {r["amount"]: r for r in rows}
+    assert set(by_amount) == {"1500.25", "99.90", "700.00"}  # Numeric con sus 2 decimales, sin float
+    ana = by_amount["1500.25"]
+    assert UUID(ana["id"]) and ana["client_id"] == data["ana"]["id"]
+    assert (ana["client_name"], ana["method"], ana["method_channel"], ana["note"]) == \
+        ("Ana Export", "transfer", "mercadopago", "")
+    assert next(p for p in listed if p["id"] == ana["id"])["created_at"] == ana["created_at"]
+
+
+def test_payments_ndjson_types(client, auth, data):
+    rows = _export(client, auth, "/payments/export", "ndjson")
+    assert {r["amount"] for r in rows} == {1500.25, 99.9, 700.0}  # número, como en el JSON de la API
+    row = rows[0]
+    assert isinstance(row["id"], str) and UUID(row["id"])
+    assert row["note"] is None and isinstance(row["period_month"], int)
+
+
+def test_clients_csv_round_trip(client, auth, data):
+    rows = {r["full_name"]: r for r in _export(client, auth, "/clients/export")}
+    ana, beto = rows["Ana Export"], rows["Beto Export"]
+    assert (ana["id"], ana["email"], ana["phone"], ana["is_active"]) == (data["ana"]["id"], "ana@test.com", "1111", "true")
+    assert (beto["email"], beto["is_active"]) == ("", "false")
+    assert (ana["last_paid_year"], ana["last_paid_month"]) == ("2026", "2")
+    assert ana["last_checkin_at"] == "2026-03-05T10:00:00"
+    ndjson = {r["full_name"]: r for r in _export(client, auth, "/clients/export", "ndjson")}
+    assert ndjson["Beto Export"]["is_active"] is False and ndjson["Beto Export"]["email"] is None
+
+
+@pytest.mark.parametrize("url, params", [
+    ("/payments/export", {}),
+    ("/payments/export", {"q": "beto"}),
+    ("/payments/export", {"client": "ana"}),
+    ("/attendance/export", {}),
+    ("/attendance/export", {"q": "ana export"}),
+    ("/attendance/export", {"client": "beto"}),
+    ("/attendance/export", {"start": "2026-03-02T00:00:00", "end": "2026-03-04T00:00:00"}),
+    ("/clients/export", {}),
+    ("/clients/export", {"q": "export", "order_by": "last_checkin", "order_dir": "desc"}),
+    ("/clients/export", {"order_by": "full_name", "order_dir": "desc"}),
+])
+def test_filters_and_order_match_the_listing(client, auth, data, url, params):
+    if "client" in params:
+        params = {"client_id": data[params.pop("client")]["id"], **params}
+    expected = _ids(client, auth, url.removesuffix("export"), **params)
+    assert expected
+    for fmt in ("csv", "ndjson"):
+        assert [r["id"] for r in _export(client, auth, url, fmt, **params)] == expected
+
+
+def test_empty_export_has_only_the_header(client, auth):
+    r = client.get("/attendance/export", headers=auth)
+    assert r.text.splitlines() == ["id,client_id,client_name,checkin_at"]
+    assert client.get("/attendance/export", params={"format": "ndjson"}, headers=auth).text == ""
+
+
+@pytest.mark.parametrize("url", EXPORTS)
+def test_exports_need_an_active_owner_or_coach(client, auth, coach_auth, db_engine, url):
+    # solo hay dos roles y los dos exportan: lo que queda afuera es sin token o con un usuario dado de baja
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers={"Authorization": "Bearer no-es-un-jwt"}).status_code == 401
+    assert client.get(url, headers=coach_auth).status_code == 200
+    assert client.get(url, params={"format": "xlsx"}, headers=auth).status_code == 422
+
+    from app.auth import user_cache
+    with db_engine.begin() as conn:
+        coach_id = conn.execute(text("UPDATE users SET is_active = false WHERE email = 'coach@test.local' "
+                                     "RETURNING id")).scalar()
+    user_cache.invalidate(str(coach_id))
+    try:
+        assert client.get(url, headers=coach_auth).status_code == 401
+    finally:
+        with db_engine.begin() as conn:
+            conn.execute(text("UPDATE users SET is_active = true WHERE id = :id"), {"id": coach_id})
@@ -0,0 +1,47 @@
+import re
+
+import pytest
+
+from app.config import settings
+
+OPS = ["/metrics", "/healthz/pool", "/healthz/report-cache"]
+SAMPLE = re.compile(r'^(\w+)\{(.*)\} (\S+)$')
+
+
+def _samples(text: str, name: str) -> list[tuple[dict, float]]:
+    out = []
+    for line in text.splitlines():
+        m = SAMPLE.match(line)
+        if m and m.group(1) == name:
+            out.append((dict(re.findall(r'(\w+)="([^"]*)"', m.group(2))), float(m.group(3))))
+    return out
+
+
+@pytest.mark.parametrize("url", OPS)
+def test_ops_endpoints_need_an_owner(client, auth, coach_auth, url):
+    assert client.get(url).status_code == 401
+    assert client.get(url, headers=coach_auth).status_code == 403
+    assert client.get(url, headers=auth).status_code == 200
+    assert client.get("/healthz").status_code == 200  # el liveness sigue abierto
+
+
+@pytest.mark.parametrize("url", OPS)
+def test_metrics_token_for_scrapers(client, monkeypatch, url):
+    monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-me")
+    assert client.get(url, headers={"Authorization": "Bearer scrape-me"}).status_code == 200
+    assert client.get(url, headers={"Authorization": "Bearer otro"}).status_code == 401
+
+
+def test_request_labels_use_the_route_template(client, auth, make_client):
+    cid = make_client("Métricas")["id"]
+    assert client.get(f"/clients/{cid}", headers=auth).status_code == 200
+    r = client.get("/metrics", headers=auth)
+    assert r.headers["Content-Type"].startswith("text/plain")
+    assert cid not in r.text
+
+    requests = _samples(r.text, "http_requests_total")
+    by_route = {(lb["method"], lb["route"], lb["status"]): n for lb, n in requests}
+    assert by_route[("GET", "/clients/{client_id}", "200")] >= 1
+    assert by_route[("POST", "/clients/", "201")] >= 1
+    queries = _samples(r.text, "db_query_duration_seconds_count")
+    assert any(lb["route"] == "/clients/{client_id}" for lb, _ in queries)
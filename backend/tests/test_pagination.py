@@ -0,0 +1,186 @@
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import text
+
+from app.pagination import encode_cursor, decode_cursor
+
+
+# ---------- cursor ----------
+def test_cursor_roundtrip_keeps_types():
+    values = [datetime(2026, 3, 1, 12, 30, 15, 123456), uuid4(), None, 7, True, "Pérez"]
+    assert decode_cursor(encode_cursor(values, "clients:full_name:asc"), "clients:full_name:asc", 6) == values
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(["a/b+c?=" * 5, uuid4()], "t")
+    assert set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_")
+
+
+@pytest.mark.parametrize("cursor, tag, n_keys", [
+    (encode_cursor(["x", 1], "clients:full_name:asc"), "clients:email:asc", 2),  # otro orden
+    (encode_cursor(["x", 1], "clients:full_name:asc"), "clients:full_name:asc", 3),  # otras claves
+    ("no-es-un-cursor", "t", 1),
+    ("", "t", 1),
+    (encode_cursor([], "t")[:-3], "t", 0),  # truncado
+])
+def test_cursor_rejects_foreign_or_broken(cursor, tag, n_keys):
+    with pytest.raises(HTTPException) as e:
+        decode_cursor(cursor, tag, n_keys)
+    assert e.value.status_code == 400
+
+
+# ---------- keyset por la API ----------
+def _walk(client, auth, url: str, limit: int, **params) -> list[str]:
+    """Recorre todas las páginas siguiendo el Link rel=next; devuelve los ids en orden."""
+    ids, cursor = [], ""
+    while cursor is not None:
+        r = client.get(url, params={**params, "limit": limit, "cursor": cursor}, headers=auth)
+        assert r.status_code == 200, r.text
+        page = [row["id"] for row in r.json()]
+        assert len(page) <= limit
+        ids += page
+        nxt = r.links.get("next")
+        cursor = parse_qs(urlsplit(nxt["url"]).query)["cursor"][0] if nxt else None
+        if cursor is not None:
+            assert len(page) == limit
+    return ids
+
+
+def _all(client, auth, url: str, **params) -> list[str]:
+    r = client.get(url, params={**params, "limit": 200}, headers=auth)
+    assert r.status_code == 200, r.text
+    return [row["id"] for row in r.json()]
+
+
+@pytest.fixture
+def clients_with_gaps(client, auth, make_client):
+    """Clientes con y sin check-ins / pagos (columnas de orden con NULL) y nombres repetidos."""
+    ids = [make_client(name)["id"] for name in
+           ["Ana Gómez", "Ana Gómez", "Bruno Díaz", "Carla Ruiz", "Dario Sosa", "Eva Luna", "Fede Paz"]]
+    for cid in ids[1::2]:
+        assert client.post("/attendance/checkin", json={"client_id": cid}, headers=auth).status_code == 201
+    for cid, (year, month) in zip(ids[::3], [(2026, 1), (2026, 1), (2025, 12)]):
+        r = client.post("/payments/", json={"client_id": cid, "amount": 1000, "method": "cash",
+                                            "period_year": year, "period_month": month}, headers=auth)
+        assert r.status_code == 201, r.text
+    return ids
+
+
+@pytest.mark.parametrize("order_by", ["full_name", "last_checkin", "last_payment", "is_active"])
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3])
+def test_clients_cursor_pages_match_full_listing(client, auth, clients_with_gaps, order_by, order_dir, limit):
+    params = {"order_by": order_by, "order_dir": order_dir}
+    full = _all(client, auth, "/clients/", **params)
+    assert sorted(full) == sorted(clients_with_gaps)
+    assert _walk(client, auth, "/clients/", limit, **params) == full
+
+
+@pytest.mark.parametrize("order_dir", ["asc", "desc"])
+def test_clients_nulls_go_last_in_both_directions(client, auth, clients_with_gaps, order_dir):
+    rows = client.get("/clients/", params={"order_by": "last_checkin", "order_dir": order_dir, "limit": 200},
+                      headers=auth).json()
+    checked_in = [r["last_checkin_at"] is not None for r in rows]
+    assert checked_in == sorted(checked_in, reverse=True)
+
+
+def test_clients_cursor_with_search(client, auth, make_client):
+    # orden por relevancia (similarity), con empates exactos entre los dos nombres iguales
+    for name in ["Lucía Fernández", "Fernanda Ruiz", "Luciano Fernández", "Lucía Fernández", "Otro Nombre"]:
+        make_client(name)
+    full = _all(client, auth, "/clients/", q="fern")
+    assert len(full) == 4
+    for limit in (1, 2, 3):
+        assert _walk(client, auth, "/clients/", limit, q="fern") == full
+
+
+def test_payments_cursor_with_ties(client, auth, db_engine, make_client):
+    cids = [make_client(f"Cliente {i}")["id"] for i in range(3)]
+    for cid in cids:
+        for month in (1, 2):
+            client.post("/payments/", json={"client_id": cid, "amount": 500, "method": "transfer",
+                                            "period_year": 2026, "period_month": month}, headers=auth)
+    with db_engine.begin() as conn:  # como una importación: mismo período y created_at, solo el id desempata
+        conn.execute(text("UPDATE payments SET created_at = '2026-02-01 10:00'"))
+    full = _all(client, auth, "/payments/")
+    assert len(full) == 6
+    for limit in (1, 2, 4):
+        assert _walk(client, auth, "/payments/", limit) == full
+
+
+def test_attendance_cursor(client, auth, make_client):
+    cids = [make_client(f"Socio {i}")["id"] for i in range(2)]
+    for i in range(5):
+        client.post("/attendance/checkin", json={"client_id": cids[i % 2]}, headers=auth)
+    full = _all(client, auth, "/attendance/")
+    assert len(full) == 5
+    assert _walk(client, auth, "/attendance/", 2) == full
+    assert _walk(client, auth, "/attendance/", 2, client_id=cids[0]) == _all(client, auth, "/attendance/", client_id=cids[0])
+
+
+def test_cursor_errors(client, auth):
+    assert client.get("/clients/", params={"cursor": "basura"}, headers=auth).status_code == 400
+    # un cursor de otro orden no se reinterpreta
+    other = encode_cursor(["x", str(uuid4())], "clients:email:asc")
+    assert client.get("/clients/", params={"cursor": other, "order_by": "full_name"}, headers=auth).status_code == 400
+    assert client.get("/clients/", params={"cursor": "", "offset": 10}, headers=auth).status_code == 400
+
+
+# ---------- X-Total-Count ----------
+@pytest.fixture
+def twelve_clients(client, auth, make_client, db_engine):
+    for i in range(12):
+        make_client(f"{'Martina' if i % 3 == 0 else 'Tomás'} Prueba {i}")
+    with db_engine.begin() as conn:
+        conn.execute(text("ANALYZE clients"))
+
+
+@pytest.mark.parametrize("params, expected", [({}, 12), ({"q": "martina"}, 4)])
+def test_count_exact(client, auth, twelve_clients, params, expected):
+    r = client.get("/clients/", params={**params, "limit": 5}, headers=auth)
+    assert r.headers["X-Total-Count"] == str(expected)
+    assert len(r.json()) == min(5, expected)
+
+
+def test_count_none_skips_header_but_still_pages(client, auth, twelve_clients):
+    r = client.get("/clients/", params={"count": "none", "limit": 5, "cursor": ""}, headers=auth)
+    assert "X-Total-Count" not in r.headers
+    assert len(r.json()) == 5
+    nxt = r.links["next"]["url"]
+    assert "count=none" in nxt  # la página siguiente tampoco cuenta
+    assert _walk(client, auth, "/clients/", 5, count="none") == _all(client, auth, "/clients/")
+
+
+def test_count_exact_is_not_repeated_in_links(client, auth, twelve_clients):
+    r = client.get("/clients/", params={"limit": 5, "cursor": ""}, headers=auth)
+    assert "count=" not in r.links["next"]["url"]
+    r = client.get("/clients/", params={"limit": 5}, headers=auth)
+    assert "count=" not in r.links["next"]["url"]
+    r = client.get("/clients/", params={"limit": 5, "count": "estimate"}, headers=auth)
+    assert "count=estimate" in r.links["next"]["url"]
+
+
+def test_count_estimate_uses_planner(client, auth, twelve_clients):
+    # con estadísticas al día, la estimación de la tabla completa es la cantidad real
+    r = client.get("/clients/", params={"count": "estimate", "limit": 5}, headers=auth)
+    assert r.status_code == 200
+    assert int(r.headers["X-Total-Count"]) == 12
+    # con filtro es una estimación: solo se garantiza que sea un entero no negativo
+    r = client.get("/clients/", params={"count": "estimate", "q": "martina"}, headers=auth)
+    assert int(r.headers["X-Total-Count"]) >= 0
+
+
+@pytest.mark.parametrize("url", ["/clients/", "/payments/", "/attendance/", "/clients/status"])
+def test_count_modes_on_every_list(client, auth, make_client, url):
+    cid = make_client("Cuenta Total")["id"]
+    client.post("/payments/", json={"client_id": cid, "amount": 100, "method": "cash",
+                                    "period_year": 2026, "period_month": 3}, headers=auth)
+    client.post("/attendance/checkin", json={"client_id": cid}, headers=auth)
+    assert client.get(url, headers=auth).headers["X-Total-Count"] == "1"
+    assert "X-Total-Count" not in client.get(url, params={"count": "none"}, headers=auth).headers
+    assert "X-Total-Count" in client.get(url, params={"count": "estimate"}, headers=auth).headers
+    assert client.get(url, params={"count": "todos"}, headers=auth).status_code == 422
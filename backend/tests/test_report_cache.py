@@ -0,0 +1,111 @@
+from datetime import date, datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from app import report_cache as rc
+from app.report_cache import ReportCache, report_cache, touch
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    c = ReportCache(max_entries=10, ttl=60, closed_ttl=0)
+    monkeypatch.setattr(rc, "report_cache", c)  # touch() invalida el cache global
+    return c
+
+
+def _put(c, name, domain, start, end):
+    key = c.key(name, {"start": start, "end": end})
+    c.put(key, name, domain, start, end)
+    return key
+
+
+def test_touch_invalidates_only_ranges_with_that_day(cache):
+    today = datetime.utcnow().date()
+    this_month = today.replace(day=1)
+    hit = _put(cache, "a", "attendance", this_month, today)
+    before = _put(cache, "b", "attendance", date(2020, 1, 1), date(2020, 1, 31))
+    other = _put(cache, "c", "payments", this_month, today)
+
+    touch("attendance", datetime.combine(today, datetime.min.time()))
+    assert cache.get(hit) is None
+    assert cache.get(before) == "b"
+    assert cache.get(other) == "c"
+
+    touch("payments", today)  # también acepta date
+    assert cache.get(other) is None
+
+
+def test_touch_without_timestamp_is_a_noop(cache):
+    key = _put(cache, "a", "clients", date(2020, 1, 1), date(2030, 1, 1))
+    touch("clients", None)
+    assert cache.get(key) == "a"
+
+
+def test_range_edges_are_inclusive(cache):
+    start, end = date(2021, 3, 1), date(2021, 3, 31)
+    key = _put(cache, "a", "payments", start, end)
+    touch("payments", end + timedelta(days=1))
+    assert cache.get(key) == "a"
+    touch("payments", end)
+    assert cache.get(key) is None
+    key = _put(cache, "a", "payments", start, end)
+    touch("payments", start)
+    assert cache.get(key) is None
+
+
+def test_open_ranges_expire_and_closed_ones_do_not(cache, monkeypatch):
+    today = datetime.utcnow().date()
+    open_key = _put(cache, "open", "payments", today.replace(day=1), today)
+    closed_key = _put(cache, "closed", "payments", date(2020, 1, 1), date(2020, 12, 31))
+    clock = rc.time.monotonic() + 61
+    monkeypatch.setattr(rc, "time", SimpleNamespace(monotonic=lambda: clock))
+    assert cache.get(open_key) is None
+    assert cache.get(closed_key) == "closed"
+
+
+def test_key_ignores_param_order_and_none(cache):
+    a = cache.key("r", {"start": date(2026, 1, 1), "end": date(2026, 2, 1), "bucket": None})
+    b = cache.key("r", {"end": date(2026, 2, 1), "start": date(2026, 1, 1)})
+    assert a == b
+
+
+# ---------- por la API ----------
+def _attendance(client, auth, start: date, end: date) -> int:
+    r = client.get("/reports/attendance", params={"start": start.isoformat(), "end": end.isoformat()}, headers=auth)
+    assert r.status_code == 200, r.text
+    return sum(b["count"] for b in r.json())
+
+
+def test_checkin_refreshes_cached_report(client, auth, make_client):
+    cid = make_client("Cache")["id"]
+    today = datetime.utcnow().date()
+    start, end = today - timedelta(days=7), today + timedelta(days=1)
+    closed = (date(2020, 1, 1), date(2020, 1, 31))
+
+    assert _attendance(client, auth, start, end) == 0
+    assert _attendance(client, auth, *closed) == 0
+    hits = report_cache.stats()["hits"]
+    assert _attendance(client, auth, start, end) == 0
+    assert report_cache.stats()["hits"] == hits + 1
+
+    assert client.post("/attendance/checkin", json={"client_id": cid}, headers=auth).status_code == 201
+    assert _attendance(client, auth, start, end) == 1  # invalidada: no devuelve el 0 cacheado
+    assert _attendance(client, auth, *closed) == 0
+    hits = report_cache.stats()["hits"]
+    assert _attendance(client, auth, *closed) == 0  # nueva versión de attendances: vuelve a cachear
+    assert report_cache.stats()["hits"] == hits + 1
+
+
+def test_write_from_another_worker_changes_the_key(client, auth, make_client, monkeypatch):
+    # otro worker (o un script) no llama a touch() en este proceso: la versión de la tabla
+    # en la clave alcanza, también para los períodos cerrados que no vencen por TTL
+    from app.routers import attendance
+    monkeypatch.setattr(attendance, "touch", lambda *a: None)
+    cid = make_client("Otro Worker")["id"]
+    closed = (date(2020, 1, 1), date(2020, 1, 31))
+    assert _attendance(client, auth, *closed) == 0
+    r = client.post("/attendance/checkin/batch", headers=auth, json={"items": [
+        {"client_id": cid, "checkin_at": "2020-01-15T10:00:00", "idempotency_key": "tarde"}]})
+    assert r.json()["created"] == 1
+    assert _attendance(client, auth, *closed) == 1
@@ -0,0 +1,71 @@
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app import models
+from app.rollups import rebuild_statements
+from scripts.rebuild_rollups import rebuild
+
+# Rollup -> columna de conteo: el incremental deja filas en 0 al restar, el rebuild no las crea
+ROLLUPS = {
+    models.PaymentDailyRollup: "n_payments",
+    models.PaymentMonthlyRollup: "n_payments",
+    models.AttendanceDailyRollup: "n_checkins",
+    models.ClientDailyRollup: "n_new",
+}
+
+
+def _snapshot(conn) -> dict[str, list]:
+    return {m.__tablename__: sorted(tuple(r) for r in conn.execute(select(m.__table__).where(m.__table__.c[n] != 0)))
+            for m, n in ROLLUPS.items()}
+
+
+def _pay(client, auth, cid: str, month: int, amount: int = 1000, method: str = "cash") -> str:
+    r = client.post("/payments/", json={"client_id": cid, "amount": amount, "method": method,
+                                        "period_year": 2026, "period_month": month}, headers=auth)
+    assert r.status_code == 201, r.text
+    return r.json()["id"]
+
+
+def test_incremental_rollups_match_a_rebuild(client, auth, db_engine, make_client):
+    ana, beto, caro = (make_client(n)["id"] for n in ("Ana Rollup", "Beto Rollup", "Caro Rollup"))
+    _pay(client, auth, ana, 1)
+    _pay(client, auth, ana, 2, amount=1500, method="transfer")
+    gone = _pay(client, auth, beto, 1)
+    _pay(client, auth, caro, 1, amount=700)
+    assert client.delete(f"/payments/{gone}", headers=auth).status_code == 204
+    for cid in (ana, beto, caro, caro):
+        assert client.post("/attendance/checkin", json={"client_id": cid}, headers=auth).status_code == 201
+    r = client.post("/attendance/checkin/batch", headers=auth, json={"items": [
+        {"client_id": ana, "checkin_at": "2026-01-10T23:30:00", "idempotency_key": "r1"},  # otro día local
+        {"client_id": caro, "checkin_at": "2025-12-31T12:00:00", "idempotency_key": "r2"},
+    ]})
+    assert r.json()["created"] == 2
+    assert client.delete(f"/clients/{caro}", headers=auth).status_code == 204  # con pagos y asistencias
+
+    with db_engine.connect() as conn:
+        incremental = _snapshot(conn)
+    assert all(incremental.values())
+    with db_engine.begin() as conn:
+        for stmt in rebuild_statements():
+            conn.execute(stmt)
+        assert _snapshot(conn) == incremental
+
+
+def test_rebuild_is_visible_to_etags_and_cache(client, auth, db_engine, make_client):
+    # una carga por SQL sin rollups, un GET en el medio (que cachea el 0 con la versión nueva)
+    # y recién después el rebuild: el reporte tiene que dejar de dar 0
+    cid = make_client("Carga SQL")["id"]
+    url, params = "/reports/attendance", {"start": "2020-01-01", "end": "2020-01-31"}
+    with db_engine.begin() as conn:
+        conn.execute(text("INSERT INTO attendances (id, client_id, checkin_at) "
+                          "VALUES (gen_random_uuid(), :c, '2020-01-15 10:00')"), {"c": cid})
+    r = client.get(url, params=params, headers=auth)
+    assert r.json() == []
+    tag = r.headers["ETag"]
+
+    with Session(db_engine) as db:
+        rebuild(db)
+        db.commit()
+    r = client.get(url, params=params, headers={**auth, "If-None-Match": tag})
+    assert r.status_code == 200
+    assert sum(b["count"] for b in r.json()) == 1